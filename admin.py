@@ -1,16 +1,28 @@
-import os
-from werkzeug.utils import secure_filename
 from flask import (
     Blueprint,
+    Response,
+    abort,
+    flash,
     render_template,
     session,
     redirect,
     url_for,
     request,
-    g,
     current_app,
 )
 from db import get_db
+from agenda import STATUS, HorarioIndisponivel, alterar_status_lote
+import catalogo
+import condicional
+import imagens
+import metricas
+import painel
+import relatorios
+import senhas
+import sessoes
+import tarefas
+from datetime import date, datetime, timedelta
+from paginacao import ler_limite, paginar
 from functools import wraps
 
 admin = Blueprint("admin", __name__, url_prefix="/admin")
@@ -32,61 +44,76 @@ def admin_required(f):
     return decorated
 
 
-from uuid import uuid4
-import os
-from PIL import Image
+@admin.route("/")
+@admin_required
+def dashboard():
+    db = get_db()
 
+    return render_template("admin/dashboard.html", **painel.resumo(db))
 
-def salvar_imagem(file, pasta):
-    if not file or not file.filename:
-        return None
 
-    ext = file.filename.rsplit(".", 1)[1].lower()
+@admin.route("/metricas")
+@admin_required
+def metricas_requests():
+    if request.args.get("zerar"):
+        metricas.zerar()
 
-    upload_dir = os.path.join(current_app.root_path, "static", "uploads", pasta)
-    os.makedirs(upload_dir, exist_ok=True)
+    return {
+        "ativo": current_app.config.get("METRICAS", True),
+        **metricas.resumo(),
+        "senhas": senhas.estatisticas,
+        "sessoes": sessoes.estatisticas,
+        "tarefas": tarefas.estado(get_db()),
+    }
 
-    nome_arquivo = f"{uuid4().hex}.jpg"
-    caminho_final = os.path.join(upload_dir, nome_arquivo)
 
-    # Converte WEBP → JPG
-    img = Image.open(file)
-    img = img.convert("RGB")
-    img.save(caminho_final, "JPEG", quality=85)
+@admin.route("/cache")
+@admin_required
+def cache_catalogo():
+    return {
+        **catalogo.estatisticas,
+        "versao": catalogo._versao_banco(get_db()),
+        "etag": condicional.estatisticas,
+    }
 
-    print("✅ Imagem salva em:", caminho_final)
 
-    return nome_arquivo
+# -----------------------------
+# RELATÓRIOS
+# -----------------------------
+def _periodo_relatorio():
+    periodo = relatorios.periodo(request.args)
+    if periodo is None:
+        flash("Datas inválidas; mostrando os últimos dias.", "error")
+        periodo = relatorios.periodo({})
+    return periodo
 
 
-@admin.route("/")
+@admin.route("/relatorios")
 @admin_required
-def dashboard():
-    db = get_db()
-    print("📦 DB EM USO:", db.execute("PRAGMA database_list").fetchall())
-    print("🧾 SERVICOS:", db.execute("SELECT id, nome, ativo FROM servicos").fetchall())
+def relatorios_periodo():
+    inicio, fim = _periodo_relatorio()
 
+    return render_template(
+        "admin/relatorios.html",
+        inicio=inicio,
+        fim=fim,
+        **relatorios.relatorio(get_db(), inicio, fim),
+    )
 
-    def count_safe(query):
-        try:
-            return db.execute(query).fetchone()[0]
-        except Exception:
-            return 0
 
-    total_clientes = count_safe("SELECT COUNT(*) FROM clientes")
-    total_agendamentos = count_safe("SELECT COUNT(*) FROM agendamentos")
-    total_pendentes = count_safe(
-        "SELECT COUNT(*) FROM agendamentos WHERE status = 'pendente'"
-    )
-    total_servicos = count_safe("SELECT COUNT(*) FROM servicos WHERE ativo = 1")
+@admin.route("/relatorios/<tipo>.csv")
+@admin_required
+def relatorio_csv(tipo):
+    if tipo not in relatorios.COLUNAS_CSV:
+        abort(404)
 
-    return render_template(
-        "admin/dashboard.html",
-        total_clientes=total_clientes,
-        total_agendamentos=total_agendamentos,
-        total_pendentes=total_pendentes,
-        total_servicos=total_servicos,
-        agendamentos_hoje=None,
+    inicio, fim = _periodo_relatorio()
+    nome = f"{tipo}_{inicio.isoformat()}_{fim.isoformat()}.csv"
+
+    return Response(
+        relatorios.exportar_csv(get_db(), tipo, inicio, fim),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={nome}"},
     )
 
 
@@ -99,30 +126,36 @@ def servicos():
     db = get_db()
 
     if request.method == "POST":
-        print("🔥 POST /servicos recebido")
-        print("📦 request.form:", request.form)
-        print("📁 request.files:", request.files)
-
         nome = request.form.get("nome")
         descricao = request.form.get("descricao")
         preco = request.form.get("preco")
         duracao = request.form.get("duracao")
 
         imagem_file = request.files.get("imagem")
-        print("📸 imagem_file:", imagem_file)
 
-        imagem_nome = salvar_imagem(imagem_file, "servicos")
+        imagem_nome = imagens.salvar_original(imagem_file, "servicos")
 
         db.execute(
             """
             INSERT INTO servicos
-            (nome, descricao, preco, duracao_min, imagem, ativo)
-            VALUES (?, ?, ?, ?, ?, 1)
+            (nome, descricao, preco, duracao_min, imagem, imagem_variantes, ativo)
+            VALUES (?, ?, ?, ?, ?, ?, 1)
             """,
-            (nome, descricao, preco, duracao, imagem_nome),
+            (
+                nome,
+                descricao,
+                preco,
+                duracao,
+                imagem_nome,
+                imagens.PENDENTE if imagem_nome else None,
+            ),
         )
+        catalogo.invalidar(db)
         db.commit()
 
+        # redimensiona em segundo plano; a página mostra um placeholder até lá
+        imagens.processar("servicos", imagem_nome)
+
         return redirect(url_for("admin.servicos"))
 
     # 👇👇👇 ISSO É O QUE ESTAVA FALTANDO 👇👇👇
@@ -136,21 +169,15 @@ def servicos():
 def excluir_servico(id):
     db = get_db()
 
-    servico = db.execute("SELECT imagem FROM servicos WHERE id = ?", (id,)).fetchone()
+    servico = db.execute(
+        "SELECT imagem, imagem_variantes FROM servicos WHERE id = ?", (id,)
+    ).fetchone()
 
     if servico:
-        if servico["imagem"]:
-            caminho = os.path.join(
-                current_app.root_path,
-                "static",
-                "uploads",
-                "servicos",
-                servico["imagem"],
-            )
-            if os.path.exists(caminho):
-                os.remove(caminho)
+        imagens.remover("servicos", servico["imagem"], servico["imagem_variantes"])
 
         db.execute("DELETE FROM servicos WHERE id = ?", (id,))
+        catalogo.invalidar(db)
         db.commit()
 
     return redirect(url_for("admin.servicos"))
@@ -169,6 +196,7 @@ def toggle_servico(id):
             "UPDATE servicos SET ativo = ? WHERE id = ?",
             (novo_status, id),
         )
+        catalogo.invalidar(db)
         db.commit()
 
     return redirect(url_for("admin.servicos"))
@@ -188,16 +216,19 @@ def barbeiros():
         bio = request.form.get("bio")
 
         foto_file = request.files.get("foto")
-        foto_nome = salvar_imagem(foto_file, "barbeiros")
+        foto_nome = imagens.salvar_original(foto_file, "barbeiros")
         db.execute(
             """
-            INSERT INTO barbeiros (nome, foto, bio, ativo)
-            VALUES (?, ?, ?, 1)
+            INSERT INTO barbeiros (nome, foto, foto_variantes, bio, ativo)
+            VALUES (?, ?, ?, ?, 1)
             """,
-            (nome, foto_nome, bio),
+            (nome, foto_nome, imagens.PENDENTE if foto_nome else None, bio),
         )
+        catalogo.invalidar(db)
         db.commit()
 
+        imagens.processar("barbeiros", foto_nome)
+
         return redirect(url_for("admin.barbeiros"))
 
     barbeiros = db.execute("SELECT * FROM barbeiros ORDER BY nome").fetchall()
@@ -217,6 +248,7 @@ def toggle_barbeiro(id):
             "UPDATE barbeiros SET ativo = ? WHERE id = ?",
             (0 if b["ativo"] else 1, id),
         )
+        catalogo.invalidar(db)
         db.commit()
 
     return redirect(url_for("admin.barbeiros"))
@@ -225,84 +257,169 @@ def toggle_barbeiro(id):
 # -----------------------------
 # AGENDAMENTOS
 # -----------------------------
+CONSULTA_AGENDAMENTOS = """
+    SELECT a.id, a.data, a.hora, a.status,
+           c.nome AS cliente,
+           s.nome AS servico,
+           b.nome AS barbeiro
+    FROM agendamentos a
+    JOIN clientes c ON c.id = a.cliente_id
+    JOIN servicos s ON s.id = a.servico_id
+    LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
+"""
+
+# lista -> (condições, ordem decrescente?)
+LISTAS_AGENDAMENTOS = {
+    "hoje": (["a.data = :hoje", "a.status IN ('pendente','confirmado')"], False),
+    "pendentes": (["a.status = 'pendente'", "a.data >= :hoje"], False),
+    "historico": (["a.status IN ('cancelado','finalizado') OR a.data < :hoje"], True),
+}
+
+
+def filtros_agendamentos(args):
+    """Filtros opcionais da querystring: barbeiro_id, status, de, ate."""
+    condicoes = []
+    params = {}
+
+    if args.get("barbeiro_id"):
+        condicoes.append("a.barbeiro_id = :barbeiro_id")
+        params["barbeiro_id"] = args["barbeiro_id"]
+
+    if args.get("status"):
+        condicoes.append("a.status = :status")
+        params["status"] = args["status"]
+
+    if args.get("de"):
+        condicoes.append("a.data >= :de")
+        params["de"] = args["de"]
+
+    if args.get("ate"):
+        condicoes.append("a.data <= :ate")
+        params["ate"] = args["ate"]
+
+    return condicoes, params
+
+
+def listar_agendamentos(db, lista, args, cursor=None):
+    condicoes, desc = LISTAS_AGENDAMENTOS[lista]
+    filtros, params = filtros_agendamentos(args)
+    params["hoje"] = date.today().isoformat()
+
+    return paginar(
+        db,
+        CONSULTA_AGENDAMENTOS,
+        condicoes + filtros,
+        params,
+        desc=desc,
+        cursor=cursor,
+        limite=ler_limite(args.get("limite")),
+    )
+
+
 @admin.route("/agendamentos")
 @admin_required
 def agendamentos():
     db = get_db()
 
-    # Hoje
-    hoje = db.execute(
-        """
-        SELECT a.id, a.data, a.hora, a.status,
-               c.nome AS cliente,
-               s.nome AS servico,
-               b.nome AS barbeiro
-        FROM agendamentos a
-        JOIN clientes c ON c.id = a.cliente_id
-        JOIN servicos s ON s.id = a.servico_id
-        LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
-        WHERE a.data = DATE('now')
-          AND a.status IN ('pendente','confirmado')
-        ORDER BY a.hora
-    """
-    ).fetchall()
+    paginas = {
+        lista: listar_agendamentos(db, lista, request.args)
+        for lista in LISTAS_AGENDAMENTOS
+    }
 
-    # Pendentes (futuros)
-    pendentes = db.execute(
-        """
-        SELECT a.id, a.data, a.hora, a.status,
-               c.nome AS cliente,
-               s.nome AS servico,
-               b.nome AS barbeiro
-        FROM agendamentos a
-        JOIN clientes c ON c.id = a.cliente_id
-        JOIN servicos s ON s.id = a.servico_id
-        LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
-        WHERE a.status = 'pendente'
-          AND a.data >= DATE('now')
-        ORDER BY a.data, a.hora
-    """
-    ).fetchall()
+    return render_template(
+        "admin/agendamentos.html",
+        hoje=paginas["hoje"][0],
+        pendentes=paginas["pendentes"][0],
+        historico=paginas["historico"][0],
+        proximos={lista: p[1] for lista, p in paginas.items()},
+        filtros=request.args,
+        barbeiros=catalogo.barbeiros(db),
+    )
 
-    # Histórico
-    historico = db.execute(
-        """
-        SELECT a.id, a.data, a.hora, a.status,
-               c.nome AS cliente,
-               s.nome AS servico,
-               b.nome AS barbeiro
-        FROM agendamentos a
-        JOIN clientes c ON c.id = a.cliente_id
-        JOIN servicos s ON s.id = a.servico_id
-        LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
-        WHERE a.status IN ('cancelado','finalizado')
-           OR a.data < DATE('now')
-        ORDER BY a.data DESC, a.hora DESC
-    """
-    ).fetchall()
 
-    return render_template(
-        "admin/agendamentos.html", hoje=hoje, pendentes=pendentes, historico=historico
+@admin.route("/api/agendamentos/<lista>")
+@admin_required
+def api_agendamentos(lista):
+    if lista not in LISTAS_AGENDAMENTOS:
+        return {"error": "lista inválida"}, 404
+
+    itens, proximo = listar_agendamentos(
+        get_db(), lista, request.args, request.args.get("cursor")
     )
 
+    return {"itens": [dict(a) for a in itens], "proximo": proximo}
+
 
 @admin.route("/agendamentos/status/<int:id>/<status>")
 @admin_required
 def alterar_status_agendamento(id, status):
 
-    if status not in ["pendente", "confirmado", "cancelado", "finalizado"]:
+    if status not in STATUS:
         return redirect(url_for("admin.agendamentos"))
 
-    db = get_db()
-    db.execute(
-        "UPDATE agendamentos SET status = ? WHERE id = ?",
-        (status, id),
-    )
-    db.commit()
+    # mesmo caminho do lote: reativar confere a sobreposição com a duração
+    try:
+        resultado = alterar_status_lote(get_db(), status, ["a.id = :id"], {"id": id})
+    except HorarioIndisponivel:
+        resultado = {"conflitos": 1}
+
+    if resultado["conflitos"]:
+        flash("Este horário já está ocupado por outro agendamento.", "error")
 
     return redirect(url_for("admin.agendamentos"))
 
 
+# ids aceitos num único request de alteração em lote
+LOTE_MAXIMO_IDS = 500
+CHAVES_FILTRO_LOTE = {"barbeiro_id", "status", "de", "ate", "antes"}
+
+
+@admin.route("/api/agendamentos/status", methods=["POST"])
+@admin_required
+def alterar_status_em_lote():
+    """
+    JSON: {"status": "finalizado", "ids": [1, 2]} e/ou
+    {"status": "finalizado", "filtro": {"status": "confirmado", "antes": "2026-10-18"}}.
+    Filtro: barbeiro_id, status, de/ate (inclusivos) e antes (exclusivo).
+    Ids e filtro juntos valem os dois. Uma transação; retorna as contagens.
+    """
+    dados = request.get_json(silent=True) or {}
+    ids = dados.get("ids")
+    filtro = dados.get("filtro") or {}
+
+    if dados.get("status") not in STATUS:
+        return {"error": "status inválido"}, 400
+    if not isinstance(filtro, dict) or set(filtro) - CHAVES_FILTRO_LOTE:
+        # chave desconhecida ignorada alargaria o lote sem aviso
+        return {"error": "filtro inválido"}, 400
+
+    condicoes, params = filtros_agendamentos(filtro)
+    if filtro.get("antes"):
+        condicoes.append("a.data < :antes")
+        params["antes"] = filtro["antes"]
+
+    if ids is not None:
+        if (
+            not isinstance(ids, list)
+            or not ids
+            or len(ids) > LOTE_MAXIMO_IDS
+            or not all(isinstance(i, int) for i in ids)
+        ):
+            return {"error": f"ids: lista de 1 a {LOTE_MAXIMO_IDS} inteiros"}, 400
+
+        nomes = [f":id{n}" for n in range(len(ids))]
+        condicoes.append(f"a.id IN ({', '.join(nomes)})")
+        params.update({nome[1:]: i for nome, i in zip(nomes, ids)})
+
+    if not condicoes:
+        return {"error": "informe ids ou filtro"}, 400
+
+    try:
+        return alterar_status_lote(get_db(), dados["status"], condicoes, params)
+    except HorarioIndisponivel:
+        return {"error": "dois agendamentos do lote ocupam o mesmo horário"}, 409
+
+
 # -----------------------------
 # HORÁRIOS (ADMIN)
 # -----------------------------
@@ -342,48 +459,81 @@ def horarios():
     )
 
 
-@admin.route("/horarios/gerar", methods=["POST"])
-@admin_required
-def gerar_horarios():
-    from datetime import datetime, timedelta
+DIAS_SEMANA_VALIDOS = {str(d) for d in range(7)}
 
-    barbeiro_id = request.form["barbeiro_id"]
-    dia_semana = request.form["dia_semana"]
-    hora_inicio = request.form["hora_inicio"]
-    hora_fim = request.form["hora_fim"]
-    duracao = int(request.form["duracao"])
 
-    db = get_db()
+def hora_valida(hora):
+    try:
+        datetime.strptime(hora, "%H:%M")
+    except (TypeError, ValueError):
+        return False
+    return True
 
-    inicio = datetime.strptime(hora_inicio, "%H:%M")
-    fim = datetime.strptime(hora_fim, "%H:%M")
 
-    atual = inicio
-    while atual <= fim:
-        hora = atual.strftime("%H:%M")
+def gerar_slots(faixas, duracao):
+    """
+    Horários de início para cada faixa (inicio, fim), de `duracao` em
+    `duracao` minutos, incluindo o fim. Ex.: 09:00-12:00 e 13:00-18:00.
+    """
+    slots = set()
 
-        existe = db.execute(
-            """
-            SELECT 1 FROM horarios
-            WHERE barbeiro_id = ?
-              AND dia_semana = ?
-              AND hora = ?
-            """,
-            (barbeiro_id, dia_semana, hora),
-        ).fetchone()
+    for hora_inicio, hora_fim in faixas:
+        if not hora_inicio or not hora_fim:
+            continue
+
+        atual = datetime.strptime(hora_inicio, "%H:%M")
+        fim = datetime.strptime(hora_fim, "%H:%M")
+
+        while atual <= fim:
+            slots.add(atual.strftime("%H:%M"))
+            atual += timedelta(minutes=duracao)
 
-        if not existe:
-            db.execute(
-                """
-                INSERT INTO horarios (barbeiro_id, dia_semana, hora, ativo)
-                VALUES (?, ?, ?, 1)
-                """,
-                (barbeiro_id, dia_semana, hora),
-            )
+    return sorted(slots)
 
-        atual += timedelta(minutes=duracao)
 
+@admin.route("/horarios/gerar", methods=["POST"])
+@admin_required
+def gerar_horarios():
+    # vários barbeiros x vários dias x várias faixas em uma única transação
+    barbeiro_ids = request.form.getlist("barbeiro_id")
+    dias_semana = request.form.getlist("dia_semana")
+    faixas = [
+        (inicio, fim)
+        for inicio, fim in zip(
+            request.form.getlist("hora_inicio"), request.form.getlist("hora_fim")
+        )
+        if inicio or fim
+    ]
+    duracao = request.form.get("duracao", 0, type=int)
+
+    if duracao <= 0 or not barbeiro_ids or not dias_semana:
+        flash("Escolha ao menos um barbeiro, um dia e a duração.", "error")
+        return redirect(url_for("admin.horarios"))
+
+    if (
+        not all(b.isdigit() for b in barbeiro_ids)
+        or not all(d in DIAS_SEMANA_VALIDOS for d in dias_semana)
+        or not faixas
+        or not all(hora_valida(h) for faixa in faixas for h in faixa)
+    ):
+        flash("Confira as faixas de horário (HH:MM) e os dias escolhidos.", "error")
+        return redirect(url_for("admin.horarios"))
+
+    slots = gerar_slots(faixas, duracao)
+
+    db = get_db()
+
+    cur = db.executemany(
+        """
+        INSERT OR IGNORE INTO horarios (barbeiro_id, dia_semana, hora, ativo)
+        VALUES (?, ?, ?, 1)
+        """,
+        [(b, d, h) for b in barbeiro_ids for d in dias_semana for h in slots],
+    )
+    catalogo.invalidar(db)
     db.commit()
+
+    flash(f"{cur.rowcount} horário(s) criado(s).", "success")
     return redirect(url_for("admin.horarios"))
 
 
@@ -393,6 +543,7 @@ def excluir_horario(id):
 
     db = get_db()
     db.execute("DELETE FROM horarios WHERE id = ?", (id,))
+    catalogo.invalidar(db)
     db.commit()
 
     return redirect(request.referrer or url_for("admin.horarios"))
@@ -407,25 +558,15 @@ def add_horario():
 
     db = get_db()
 
-    existe = db.execute(
+    db.execute(
         """
-        SELECT 1 FROM horarios
-        WHERE barbeiro_id = ?
-          AND dia_semana = ?
-          AND hora = ?
+        INSERT OR IGNORE INTO horarios (barbeiro_id, dia_semana, hora, ativo)
+        VALUES (?, ?, ?, 1)
         """,
         (barbeiro_id, dia_semana, hora),
-    ).fetchone()
-
-    if not existe:
-        db.execute(
-            """
-            INSERT INTO horarios (barbeiro_id, dia_semana, hora, ativo)
-            VALUES (?, ?, ?, 1)
-            """,
-            (barbeiro_id, dia_semana, hora),
-        )
-        db.commit()
+    )
+    catalogo.invalidar(db)
+    db.commit()
 
     return redirect(url_for("admin.horarios", barbeiro_id=barbeiro_id))
 
@@ -441,6 +582,7 @@ def status_horario(id, acao):
         "UPDATE horarios SET ativo = ? WHERE id = ?",
         (novo_status, id),
     )
+    catalogo.invalidar(db)
     db.commit()
 
     return redirect(url_for("admin.horarios"))
@@ -0,0 +1,489 @@
+import heapq
+import sqlite3
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from itertools import groupby, islice
+
+import catalogo
+import eventos
+import slots
+
+
+DIAS_PT = [
+    "Segunda",
+    "Terça",
+    "Quarta",
+    "Quinta",
+    "Sexta",
+    "Sábado",
+    "Domingo",
+]
+
+# status que ocupam o horário do barbeiro
+STATUS_ATIVOS = ("pendente", "confirmado")
+STATUS = STATUS_ATIVOS + ("cancelado", "finalizado")
+
+
+class HorarioIndisponivel(Exception):
+    """O horário foi reservado por outro cliente."""
+
+
+def dia_semana_sqlite(dia):
+    """Converte date.weekday() (0=segunda) para o padrão da tabela horarios (0=domingo)."""
+    return (dia.weekday() + 1) % 7
+
+
+# -----------------------------
+# CONSULTAS EM LOTE
+# -----------------------------
+def carregar_ocupacao(db, barbeiro_id, inicio, fim):
+    """
+    Mapa data -> Ocupacao do barbeiro no intervalo [inicio, fim), em uma
+    única consulta. Cada agendamento ocupa [hora, hora + duracao_min).
+    """
+    rows = db.execute(
+        """
+        SELECT a.data, a.hora, s.duracao_min
+        FROM agendamentos a
+        LEFT JOIN servicos s ON s.id = a.servico_id
+        WHERE a.barbeiro_id = ?
+          AND a.data >= ?
+          AND a.data < ?
+          AND a.status IN ('pendente', 'confirmado')
+        """,
+        (barbeiro_id, inicio.isoformat(), fim.isoformat()),
+    ).fetchall()
+
+    intervalos = defaultdict(list)
+    for r in rows:
+        ini = minutos(r["hora"])
+        intervalos[r["data"]].append((ini, ini + max(r["duracao_min"] or 0, 1)))
+
+    return {data: Ocupacao(lista) for data, lista in intervalos.items()}
+
+
+def duracao_servico(db, servico_id):
+    if not servico_id:
+        return None
+
+    servico = catalogo.servico(db, servico_id)
+    return servico["duracao_min"] if servico else None
+
+
+# -----------------------------
+# OCUPAÇÃO POR INTERVALOS
+# -----------------------------
+def minutos(hora):
+    """'09:30' -> 570"""
+    h, m = hora.split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+class Ocupacao:
+    """
+    Intervalos ocupados de um barbeiro em um dia, fundidos e ordenados.
+
+    Como os intervalos são disjuntos e ordenados, os fins também ficam
+    ordenados e cada consulta é uma busca binária: O(log n).
+    """
+
+    __slots__ = ("inicios", "fins")
+
+    def __init__(self, intervalos):
+        self.inicios = []
+        self.fins = []
+
+        for ini, fim in sorted(intervalos):
+            if self.fins and ini <= self.fins[-1]:
+                self.fins[-1] = max(self.fins[-1], fim)
+            else:
+                self.inicios.append(ini)
+                self.fins.append(fim)
+
+    def livre(self, ini, fim):
+        """True se [ini, fim) não cruza nenhum intervalo ocupado."""
+        i = bisect_right(self.fins, ini)
+        return i == len(self.fins) or self.inicios[i] >= fim
+
+
+LIVRE = Ocupacao(())
+
+
+# -----------------------------
+# MOTOR DE DISPONIBILIDADE
+# -----------------------------
+def montar_agenda(db, barbeiro_id, inicio=None, dias=7, duracao=None):
+    """
+    Grade de dias/horários do barbeiro a partir de `inicio` por `dias` dias.
+
+    Com `duracao` (minutos do serviço escolhido), um horário só fica
+    disponível se o serviço inteiro couber antes do próximo agendamento.
+    Dentro do horizonte materializado é uma leitura por faixa em `slots`;
+    fora dele (passado, muito à frente) expande o modelo semanal.
+    """
+    inicio = inicio or date.today()
+
+    if slots.cobre(db, inicio, inicio + timedelta(days=dias)):
+        return agenda_materializada(db, barbeiro_id, inicio, dias, duracao)
+
+    return expandir_agenda(db, barbeiro_id, inicio, dias, duracao)
+
+
+def agenda_materializada(db, barbeiro_id, inicio, dias=7, duracao=None):
+    """Mesma grade de montar_agenda, lida da tabela slots (uma consulta)."""
+    cur = db.cursor()
+    cur.row_factory = None  # tuplas: centenas de linhas por request
+
+    rows = cur.execute(
+        """
+        SELECT data, hora,
+               estado = 'livre' AND (livre_ate IS NULL OR livre_ate >= minuto + ?)
+                   AS disponivel
+        FROM slots
+        WHERE barbeiro_id = ?
+          AND data >= ?
+          AND data < ?
+        ORDER BY data, hora
+        """,
+        (
+            max(duracao or 0, 1),
+            int(barbeiro_id),
+            inicio.isoformat(),
+            (inicio + timedelta(days=dias)).isoformat(),
+        ),
+    ).fetchall()
+
+    agenda = []
+    dia = None
+    for data, hora, disponivel in rows:
+        if data != dia:
+            dia = data
+            agenda.append(
+                {
+                    "data": data,
+                    "dia": DIAS_PT[date.fromisoformat(data).weekday()],
+                    "slots": [],
+                }
+            )
+        agenda[-1]["slots"].append({"hora": hora, "disponivel": bool(disponivel)})
+
+    return agenda
+
+
+def expandir_agenda(db, barbeiro_id, inicio, dias=7, duracao=None):
+    """
+    Grade calculada na hora: modelo semanal + agendamentos do período, no
+    máximo duas consultas independentemente do tamanho do intervalo.
+    """
+    modelo = catalogo.modelo_semanal(db, barbeiro_id)
+
+    if not modelo:
+        return []
+
+    fim = inicio + timedelta(days=dias)
+    ocupacao = carregar_ocupacao(db, barbeiro_id, inicio, fim)
+    duracao = max(duracao or 0, 1)
+
+    agenda = []
+
+    for i in range(dias):
+        data_atual = inicio + timedelta(days=i)
+        horas = modelo.get(dia_semana_sqlite(data_atual))
+
+        if not horas:
+            continue
+
+        ocupado = ocupacao.get(data_atual.isoformat(), LIVRE)
+
+        slots = []
+        for h in horas:
+            ini = minutos(h)
+            slots.append({"hora": h, "disponivel": ocupado.livre(ini, ini + duracao)})
+
+        agenda.append(
+            {
+                "data": data_atual.isoformat(),
+                "dia": DIAS_PT[data_atual.weekday()],
+                "slots": slots,
+            }
+        )
+
+    return agenda
+
+
+def horarios_do_dia(db, barbeiro_id, dia, duracao=None):
+    """Slots de um único dia, no formato usado por /api/horarios."""
+    agenda = montar_agenda(db, barbeiro_id, dia, 1, duracao)
+    return agenda[0]["slots"] if agenda else []
+
+
+# -----------------------------
+# PRIMEIROS HORÁRIOS (TODOS OS BARBEIROS)
+# -----------------------------
+def proximos_livres(db, duracao=None, inicio=None, dias=14, limite=5, agora=None):
+    """
+    Os `limite` primeiros horários livres entre todos os barbeiros ativos
+    em [inicio, inicio + dias), em ordem de data/hora. Horários de hoje
+    que já passaram ficam de fora.
+
+    Dentro do horizonte materializado é uma consulta que percorre `slots`
+    em ordem e para no K-ésimo resultado; fora dele, junta (heap) as
+    agendas de cada barbeiro, geradas uma semana por vez.
+    """
+    agora = agora or datetime.now()
+    inicio = max(inicio or agora.date(), agora.date())
+    fim = inicio + timedelta(days=dias)
+    duracao = max(duracao or 0, 1)
+    depois_de = (agora.date().isoformat(), agora.hour * 60 + agora.minute)
+
+    if slots.cobre(db, inicio, fim):
+        encontrados = _proximos_materializados(db, duracao, inicio, fim, limite, depois_de)
+    else:
+        fluxos = [
+            _livres_do_barbeiro(db, b["id"], inicio, dias, duracao, depois_de)
+            for b in catalogo.barbeiros_ativos(db)
+        ]
+        encontrados = [
+            (data, hora, barbeiro_id)
+            for data, _, barbeiro_id, hora in islice(heapq.merge(*fluxos), limite)
+        ]
+
+    resultado = []
+    for data, hora, barbeiro_id in encontrados:
+        barbeiro = catalogo.barbeiro(db, barbeiro_id)
+        resultado.append(
+            {
+                "barbeiro_id": barbeiro_id,
+                "barbeiro": barbeiro["nome"] if barbeiro else None,
+                "data": data,
+                "dia": DIAS_PT[date.fromisoformat(data).weekday()],
+                "hora": hora,
+            }
+        )
+
+    return resultado
+
+
+def _proximos_materializados(db, duracao, inicio, fim, limite, depois_de):
+    hoje, minuto_agora = depois_de
+    # CROSS JOIN fixa slots por fora: percorre em ordem e para no LIMIT,
+    # sem custo proporcional ao número de barbeiros
+    cur = db.cursor()
+    cur.row_factory = None
+
+    return cur.execute(
+        """
+        SELECT s.data, s.hora, s.barbeiro_id
+        FROM slots s INDEXED BY idx_slots_data_minuto
+        CROSS JOIN barbeiros b ON b.id = s.barbeiro_id
+        WHERE s.data >= ?
+          AND s.data < ?
+          AND (s.data > ? OR s.minuto > ?)
+          AND s.estado = 'livre'
+          AND (s.livre_ate IS NULL OR s.livre_ate >= s.minuto + ?)
+          AND b.ativo = 1
+        ORDER BY s.data, s.minuto, s.barbeiro_id
+        LIMIT ?
+        """,
+        (inicio.isoformat(), fim.isoformat(), hoje, minuto_agora, duracao, limite),
+    ).fetchall()
+
+
+def _livres_do_barbeiro(db, barbeiro_id, inicio, dias, duracao, depois_de):
+    """Horários livres de um barbeiro em ordem, calculados sob demanda."""
+    for semana in range(0, dias, 7):
+        agenda = expandir_agenda(
+            db, barbeiro_id, inicio + timedelta(days=semana), min(7, dias - semana), duracao
+        )
+        for dia in agenda:
+            for slot in dia["slots"]:
+                chave = (dia["data"], minutos(slot["hora"]))
+                if slot["disponivel"] and chave > depois_de:
+                    yield chave[0], chave[1], barbeiro_id, slot["hora"]
+
+
+# -----------------------------
+# RESERVA
+# -----------------------------
+def reservar_horario(db, cliente_id, barbeiro_id, servico_id, data, hora):
+    """
+    Grava o agendamento de forma atômica.
+
+    BEGIN IMMEDIATE serializa as reservas concorrentes, então a checagem
+    de sobreposição (considerando a duração dos serviços) é confiável; o
+    índice único parcial uq_agendamentos_slot_ativo é a garantia final.
+    Levanta HorarioIndisponivel se o horário já estiver ocupado.
+    """
+    db.execute("BEGIN IMMEDIATE")
+
+    try:
+        dia = date.fromisoformat(data)
+        ocupado = carregar_ocupacao(
+            db, barbeiro_id, dia, dia + timedelta(days=1)
+        ).get(data, LIVRE)
+
+        ini = minutos(hora)
+        duracao = max(duracao_servico(db, servico_id) or 0, 1)
+
+        if not ocupado.livre(ini, ini + duracao):
+            raise HorarioIndisponivel(hora)
+
+        cur = db.execute(
+            """
+            INSERT INTO agendamentos
+            (cliente_id, barbeiro_id, servico_id, data, hora, status)
+            VALUES (?, ?, ?, ?, ?, 'pendente')
+            """,
+            (cliente_id, barbeiro_id, servico_id, data, hora),
+        )
+        db.commit()
+        eventos.notificar()
+    except sqlite3.IntegrityError:
+        db.rollback()
+        raise HorarioIndisponivel(hora)
+    except Exception:
+        db.rollback()
+        raise
+
+    return cur.lastrowid
+
+
+# -----------------------------
+# STATUS EM LOTE
+# -----------------------------
+def alterar_status_lote(db, status, condicoes, params):
+    """
+    Leva para `status`, numa transação só, os agendamentos (alias `a`) que
+    atendem a todas as `condicoes`. Os que já estão no status ficam como
+    estão; reativar um agendamento cujo intervalo cruza o de outro ativo
+    é pulado (conflito), com a mesma regra de reservar_horario. Se dois do
+    próprio lote disputarem o horário, nada é gravado e levanta
+    HorarioIndisponivel.
+
+    Retorna as contagens: encontrados, alterados, inalterados, conflitos e
+    `anteriores` (status de origem -> quantidade).
+    """
+    if status not in STATUS:
+        raise ValueError(f"status inválido: {status}")
+    if not condicoes:
+        # sem filtro o lote seria a tabela inteira
+        raise ValueError("informe ids ou filtros")
+
+    onde = " AND ".join(f"({c})" for c in condicoes)
+    params = {**params, "novo_status": status}
+
+    db.execute("BEGIN IMMEDIATE")
+
+    try:
+        anteriores = dict(
+            db.execute(
+                f"SELECT a.status, COUNT(*) FROM agendamentos a WHERE {onde} GROUP BY a.status",
+                params,
+            ).fetchall()
+        )
+
+        # reativações (cancelado/finalizado -> ativo) passam por _reativar
+        alterados = db.execute(
+            f"""
+            UPDATE agendamentos SET status = :novo_status
+            WHERE id IN (
+                SELECT a.id FROM agendamentos a
+                WHERE {onde}
+                  AND a.status != :novo_status
+                  AND NOT (
+                      :novo_status IN {STATUS_ATIVOS}
+                      AND a.status NOT IN {STATUS_ATIVOS}
+                  )
+            )
+            """,
+            params,
+        ).rowcount
+        if status in STATUS_ATIVOS:
+            alterados += _reativar(db, status, onde, params)
+        db.commit()
+    except sqlite3.IntegrityError:
+        db.rollback()
+        raise HorarioIndisponivel("dois agendamentos do lote no mesmo horário")
+    except Exception:
+        db.rollback()
+        raise
+
+    if alterados:
+        eventos.notificar()
+
+    encontrados = sum(anteriores.values())
+    inalterados = anteriores.get(status, 0)
+
+    return {
+        "status": status,
+        "encontrados": encontrados,
+        "alterados": alterados,
+        "inalterados": inalterados,
+        "conflitos": encontrados - inalterados - alterados,
+        "anteriores": anteriores,
+    }
+
+
+def _reativar(db, status, onde, params):
+    """
+    Volta para `status` os cancelados/finalizados do lote cujo intervalo
+    [hora, hora + duração) está livre. A ocupação de cada barbeiro vem de
+    carregar_ocupacao (uma consulta para o período do lote) e já inclui os
+    ativos alterados antes na mesma transação.
+    """
+    candidatos = db.execute(
+        f"""
+        SELECT a.id, a.barbeiro_id, a.data, a.hora, s.duracao_min
+        FROM agendamentos a
+        LEFT JOIN servicos s ON s.id = a.servico_id
+        WHERE {onde}
+          AND a.status NOT IN {STATUS_ATIVOS}
+        ORDER BY a.barbeiro_id, a.data, a.hora
+        """,
+        params,
+    ).fetchall()
+
+    ids = []
+    for barbeiro_id, linhas in groupby(candidatos, key=lambda r: r["barbeiro_id"]):
+        linhas = list(linhas)
+        if barbeiro_id is None:
+            # sem barbeiro não ocupa agenda de ninguém
+            ids.extend(r["id"] for r in linhas)
+            continue
+
+        ocupacao = carregar_ocupacao(
+            db,
+            barbeiro_id,
+            date.fromisoformat(linhas[0]["data"]),
+            date.fromisoformat(linhas[-1]["data"]) + timedelta(days=1),
+        )
+        do_lote = defaultdict(list)
+
+        for r in linhas:
+            ini = minutos(r["hora"])
+            fim = ini + max(r["duracao_min"] or 0, 1)
+
+            if not ocupacao.get(r["data"], LIVRE).livre(ini, fim):
+                continue  # conflito com um ativo
+            if not Ocupacao(do_lote[r["data"]]).livre(ini, fim):
+                raise HorarioIndisponivel(r["hora"])
+
+            do_lote[r["data"]].append((ini, fim))
+            ids.append(r["id"])
+
+    db.executemany(
+        "UPDATE agendamentos SET status = ? WHERE id = ?", [(status, i) for i in ids]
+    )
+    return len(ids)
+
+
+def finalizar_passados(db, hoje=None):
+    """Confirmados de dias anteriores viram finalizados (rotina diária)."""
+    hoje = hoje or date.today()
+    return alterar_status_lote(
+        db,
+        "finalizado",
+        ["a.status = 'confirmado'", "a.data < :hoje"],
+        {"hoje": hoje.isoformat()},
+    )
@@ -1,13 +1,53 @@
-from flask import Flask, flash, render_template, session, redirect, url_for, request
-from db import close_db, get_db
+from flask import Flask, Response, flash, render_template, session, redirect, url_for, request
+from db import caminho_db, close_db, get_db
 from auth import auth
 from admin import admin
-from datetime import date, timedelta
-import calendar
+from agenda import (
+    HorarioIndisponivel,
+    duracao_servico,
+    horarios_do_dia,
+    montar_agenda,
+    proximos_livres,
+    reservar_horario,
+)
+from migrations import migrar
+from paginacao import LIMITE_MAXIMO, ler_limite, paginar
+import assets
+import catalogo
+import condicional
+import eventos
+import imagens
+import metricas
+import senhas
+import sessoes
+import slots
+import tarefas
+from datetime import date
+import os
 
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = "barbearia-secret-key"
+app.config["METRICAS"] = os.environ.get("METRICAS", "1") != "0"
+app.config["SESSAO_BACKEND"] = os.environ.get("SESSAO_BACKEND", sessoes.BACKEND)
+app.config["TAREFAS"] = os.environ.get("TAREFAS", "1") != "0"
+
+# Schema / índices
+migrar(caminho_db(app))
+slots.preparar(caminho_db(app))
+
+# Sessão no servidor, só o id no cookie (SESSAO_BACKEND=cookie volta ao padrão)
+sessoes.registrar(app)
+
+# Helpers de template / arquivos com hash (python assets.py)
+assets.registrar(app)
+imagens.registrar(app)
+
+# Tempo/consultas por request e /admin/metricas (METRICAS=0 desliga)
+metricas.registrar(app)
+
+# Manutenção em segundo plano, só no worker líder (python tarefas.py roda à mão)
+tarefas.registrar(app)
 
 # Blueprints
 app.register_blueprint(auth)
@@ -62,17 +102,14 @@ def agendar_servico():
         session["agendamento"] = {"servico_id": servico_id}
         return redirect(url_for("agendar_barbeiro"))
 
-    servicos = db.execute(
-        """
-        SELECT id, nome, preco, descricao, imagem
-        FROM servicos
-        WHERE ativo = 1
-        ORDER BY nome
-    """
-    ).fetchall()
-
-    return render_template(
-        "public/agendar_servico.html", servicos=servicos, voltar_url=url_for("index")
+    return condicional.pagina_catalogo(
+        db,
+        "agendar_servico",
+        lambda: render_template(
+            "public/agendar_servico.html",
+            servicos=catalogo.servicos_ativos(db),
+            voltar_url=url_for("index"),
+        ),
     )
 
 
@@ -98,14 +135,14 @@ def agendar_barbeiro():
 
         return redirect(url_for("agendar_data"))
 
-    barbeiros = db.execute(
-        "SELECT id, nome, foto FROM barbeiros WHERE ativo = 1 ORDER BY nome"
-    ).fetchall()
-
-    return render_template(
-        "public/agendar_barbeiro.html",
-        barbeiros=barbeiros,
-        voltar_url=url_for("agendar_servico"),
+    return condicional.pagina_catalogo(
+        db,
+        "agendar_barbeiro",
+        lambda: render_template(
+            "public/agendar_barbeiro.html",
+            barbeiros=catalogo.barbeiros_ativos(db),
+            voltar_url=url_for("agendar_servico"),
+        ),
     )
 
 
@@ -125,17 +162,7 @@ def agendar_data():
     barbeiro_id = session["agendamento"]["barbeiro_id"]
 
     # dias da semana que o barbeiro atende
-    dias = db.execute(
-        """
-        SELECT DISTINCT dia_semana
-        FROM horarios
-        WHERE barbeiro_id = ? AND ativo = 1
-        ORDER BY dia_semana
-        """,
-        (barbeiro_id,),
-    ).fetchall()
-
-    dias_semana = [d["dia_semana"] for d in dias]
+    dias_semana = sorted(catalogo.modelo_semanal(db, barbeiro_id))
 
     if request.method == "POST":
         data = request.form.get("data")
@@ -153,6 +180,7 @@ def agendar_data():
     return render_template(
         "public/agendar_data.html",
         barbeiro_id=barbeiro_id,
+        servico_id=session["agendamento"].get("servico_id"),
         dias=dias_semana,
         voltar_url=url_for("agendar_barbeiro"),
     )
@@ -173,15 +201,8 @@ def agendar_revisao():
 
     db = get_db()
 
-    servico = db.execute(
-        "SELECT nome, preco FROM servicos WHERE id = ?",
-        (agendamento["servico_id"],),
-    ).fetchone()
-
-    barbeiro = db.execute(
-        "SELECT nome FROM barbeiros WHERE id = ?",
-        (agendamento["barbeiro_id"],),
-    ).fetchone()
+    servico = catalogo.servico(db, agendamento["servico_id"])
+    barbeiro = catalogo.barbeiro(db, agendamento["barbeiro_id"])
 
     data_iso = agendamento["data"]
 
@@ -189,21 +210,22 @@ def agendar_revisao():
     hora = agendamento["hora"]
 
     if request.method == "POST":
-        db.execute(
-            """
-            INSERT INTO agendamentos
-            (cliente_id, barbeiro_id, servico_id, data, hora, status)
-            VALUES (?, ?, ?, ?, ?, 'pendente')
-            """,
-            (
+        try:
+            reservar_horario(
+                db,
                 session["cliente_id"],
                 agendamento["barbeiro_id"],
                 agendamento["servico_id"],
                 data_iso,
                 hora,
-            ),
-        )
-        db.commit()
+            )
+        except HorarioIndisponivel:
+            session["agendamento"].pop("data", None)
+            session["agendamento"].pop("hora", None)
+            session.modified = True
+
+            flash("Este horário acabou de ser reservado. Escolha outro.", "error")
+            return redirect(url_for("agendar_data"))
 
         session["agendamento_sucesso"] = {
             "servico": servico["nome"],
@@ -243,6 +265,40 @@ def agendar_sucesso():
 # -----------------------------
 # MEUS AGENDAMENTOS
 # -----------------------------
+CONSULTA_MEUS_AGENDAMENTOS = """
+    SELECT
+        a.id,
+        a.data,
+        a.hora,
+        a.status,
+        s.nome AS servico,
+        b.nome AS barbeiro
+    FROM agendamentos a
+    JOIN servicos s ON s.id = a.servico_id
+    LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
+"""
+
+# lista -> (condições, ordem decrescente?)
+LISTAS_CLIENTE = {
+    "proximos": (["a.data >= :hoje", "a.status IN ('pendente', 'confirmado')"], False),
+    "passados": (["a.data < :hoje OR a.status NOT IN ('pendente', 'confirmado')"], True),
+}
+
+
+def listar_meus_agendamentos(db, cliente_id, lista, cursor=None, limite=None):
+    condicoes, desc = LISTAS_CLIENTE[lista]
+
+    return paginar(
+        db,
+        CONSULTA_MEUS_AGENDAMENTOS,
+        ["a.cliente_id = :cliente_id"] + condicoes,
+        {"cliente_id": cliente_id, "hoje": date.today().isoformat()},
+        desc=desc,
+        cursor=cursor,
+        limite=limite,
+    )
+
+
 @app.route("/meus-agendamentos")
 def meus_agendamentos():
     if "cliente_id" not in session:
@@ -250,33 +306,39 @@ def meus_agendamentos():
 
     db = get_db()
 
-    agendamentos = db.execute(
-        """
-        SELECT 
-            a.id,
-            a.data,
-            a.hora,
-            a.status,
-            s.nome AS servico,
-            b.nome AS barbeiro
-        FROM agendamentos a
-        JOIN servicos s ON s.id = a.servico_id
-        LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
-        WHERE a.cliente_id = ?
-        ORDER BY a.data DESC, a.hora DESC
-    """,
-        (session["cliente_id"],),
-    ).fetchall()
+    proximos, proximos_cursor = listar_meus_agendamentos(
+        db, session["cliente_id"], "proximos", limite=LIMITE_MAXIMO
+    )
+    passados, passados_cursor = listar_meus_agendamentos(
+        db, session["cliente_id"], "passados"
+    )
 
-    return render_template("public/meus_agendamentos.html", agendamentos=agendamentos)
+    return render_template(
+        "public/meus_agendamentos.html",
+        proximos=proximos,
+        passados=passados,
+        proximos_cursor=proximos_cursor,
+        passados_cursor=passados_cursor,
+    )
 
 
-@app.route("/admin/agendamentos/confirmar/<int:id>")
-def confirmar_agendamento(id):
-    db = get_db()
-    db.execute("UPDATE agendamentos SET status = 'confirmado' WHERE id = ?", (id,))
-    db.commit()
-    return redirect(url_for("admin.agendamentos"))
+@app.route("/api/meus-agendamentos/<lista>")
+def api_meus_agendamentos(lista):
+    if "cliente_id" not in session:
+        return {"error": "unauthorized"}, 401
+
+    if lista not in LISTAS_CLIENTE:
+        return {"error": "lista inválida"}, 404
+
+    itens, proximo = listar_meus_agendamentos(
+        get_db(),
+        session["cliente_id"],
+        lista,
+        request.args.get("cursor"),
+        ler_limite(request.args.get("limite")),
+    )
+
+    return {"itens": [dict(a) for a in itens], "proximo": proximo}
 
 
 # -----------------------------
@@ -315,15 +377,13 @@ def cancelar_agendamento(id):
         (id,),
     )
     db.commit()
+    eventos.notificar()
 
     return redirect(
         url_for("meus_agendamentos", toast="success", msg="Agendamento cancelado")
     )
 
 
-from datetime import datetime
-
-
 @app.route("/api/horarios")
 def api_horarios():
     if "cliente_id" not in session:
@@ -339,125 +399,112 @@ def api_horarios():
     if not data:
         return []
 
+    try:
+        dia = datetime.strptime(data, "%Y-%m-%d").date()
+    except ValueError:
+        return {"error": "data inválida"}, 400
+
     db = get_db()
+    duracao = duracao_servico(db, agendamento.get("servico_id"))
 
-    # dia da semana (0=domingo)
-    from datetime import datetime
+    etag = condicional.etag_horarios(db, barbeiro_id, dia, duracao)
+    return condicional.condicional(
+        etag, lambda: horarios_do_dia(db, barbeiro_id, dia, duracao)
+    )
 
-    dia_semana = datetime.strptime(data, "%Y-%m-%d").weekday()
-    dia_semana = (dia_semana + 1) % 7  # ajuste para padrão SQLite (domingo=0)
 
-    # horários cadastrados do barbeiro
-    horarios = db.execute(
-        """
-        SELECT hora
-        FROM horarios
-        WHERE barbeiro_id = ?
-          AND dia_semana = ?
-          AND ativo = 1
-        ORDER BY hora
-        """,
-        (barbeiro_id, dia_semana),
-    ).fetchall()
+# máximo de dias pedidos a /api/agenda (a janela de slots materializados)
+DIAS_MAXIMO_AGENDA = slots.HORIZONTE
 
-    # horários já ocupados
-    ocupados = db.execute(
-        """
-        SELECT hora
-        FROM agendamentos
-        WHERE barbeiro_id = ?
-          AND data = ?
-          AND status IN ('pendente', 'confirmado')
-        """,
-        (barbeiro_id, data),
-    ).fetchall()
 
-    horas_ocupadas = {o["hora"] for o in ocupados}
+@app.route("/api/agenda/<int:barbeiro_id>")
+def api_agenda(barbeiro_id):
+    if "cliente_id" not in session:
+        return {"error": "unauthorized"}, 401
 
-    resposta = []
-    for h in horarios:
-        resposta.append(
-            {"hora": h["hora"], "disponivel": h["hora"] not in horas_ocupadas}
-        )
+    try:
+        dias = min(max(int(request.args.get("dias", 7)), 1), DIAS_MAXIMO_AGENDA)
+    except ValueError:
+        return {"error": "dias inválido"}, 400
 
-    return resposta
+    # serviço escolhido no funil (ou ?servico_id=) define quanto tempo o slot precisa
+    servico_id = request.args.get("servico_id") or session.get("agendamento", {}).get(
+        "servico_id"
+    )
 
+    db = get_db()
+    duracao = duracao_servico(db, servico_id)
+    hoje = date.today()
 
-@app.route("/api/agenda/<int:barbeiro_id>")
-def api_agenda(barbeiro_id):
+    etag = condicional.etag_agenda(db, barbeiro_id, hoje, dias, duracao)
+    return condicional.condicional(
+        etag, lambda: montar_agenda(db, barbeiro_id, hoje, dias, duracao)
+    )
+
+# máximos aceitos na busca entre barbeiros (dentro da janela de slots:
+# a consulta não depende do número de barbeiros)
+DIAS_MAXIMO_PROXIMOS = slots.HORIZONTE
+LIMITE_MAXIMO_PROXIMOS = 20
+
+
+@app.route("/api/proximos-horarios")
+def api_proximos_horarios():
+    """Primeiros horários livres com qualquer barbeiro (?servico_id, dias, limite)."""
     if "cliente_id" not in session:
         return {"error": "unauthorized"}, 401
 
-    dias = int(request.args.get("dias", 7))
-    hoje = date.today()
-    fim = hoje + timedelta(days=dias)
+    # valor que não é número fica no padrão; fora da faixa vai para o limite
+    dias = min(max(request.args.get("dias", 14, type=int), 1), DIAS_MAXIMO_PROXIMOS)
+    limite = min(max(request.args.get("limite", 5, type=int), 1), LIMITE_MAXIMO_PROXIMOS)
+    servico_id = request.args.get("servico_id") or session.get("agendamento", {}).get(
+        "servico_id"
+    )
 
     db = get_db()
+    duracao = duracao_servico(db, servico_id)
 
-    # horários fixos do barbeiro
-    horarios_base = db.execute(
-        """
-        SELECT dia_semana, hora
-        FROM horarios
-        WHERE barbeiro_id = ?
-          AND ativo = 1
-    """,
-        (barbeiro_id,),
-    ).fetchall()
-
-    if not horarios_base:
-        return []
+    return proximos_livres(db, duracao, dias=dias, limite=limite)
 
-    agenda = []
-
-    for i in range(dias):
-        data_atual = hoje + timedelta(days=i)
-        dia_semana = (data_atual.weekday() + 1) % 7  # 0=Segunda
-
-        horarios_dia = [
-            h["hora"] for h in horarios_base if h["dia_semana"] == dia_semana
-        ]
-
-        if not horarios_dia:
-            continue
-
-        slots = []
-
-        for hora in horarios_dia:
-            ocupado = db.execute(
-                """
-                SELECT 1 FROM agendamentos
-                WHERE barbeiro_id = ?
-                  AND data = ?
-                  AND hora = ?
-                  AND status IN ('pendente', 'confirmado')
-            """,
-                (barbeiro_id, data_atual.isoformat(), hora),
-            ).fetchone()
-
-            slots.append({"hora": hora, "disponivel": not bool(ocupado)})
-
-        DIAS_PT = [
-            "Segunda",
-            "Terça",
-            "Quarta",
-            "Quinta",
-            "Sexta",
-            "Sábado",
-            "Domingo",
-        ]
-
-        agenda.append(
-            {
-                "data": data_atual.isoformat(),
-                "dia": DIAS_PT[data_atual.weekday()],
-                "slots": slots,
-            }
-        )
 
-    return agenda
+@app.route("/agendar/proximo", methods=["POST"])
+def agendar_proximo():
+    """Atalho do funil: horário escolhido na busca entre barbeiros -> revisão."""
+    if "cliente_id" not in session:
+        return redirect(url_for("auth.login"))
+
+    agendamento = session.get("agendamento")
+    barbeiro_id = request.form.get("barbeiro_id")
+    data = request.form.get("data")
+    hora = request.form.get("hora")
+
+    if not agendamento or "servico_id" not in agendamento:
+        return redirect(url_for("agendar_servico"))
+    if not barbeiro_id or not data or not hora:
+        return redirect(url_for("agendar_barbeiro"))
+
+    agendamento.update(barbeiro_id=barbeiro_id, data=data, hora=hora)
+    session.modified = True
 
-from werkzeug.security import check_password_hash, generate_password_hash
+    return redirect(url_for("agendar_revisao"))
+
+
+@app.route("/api/agenda/<int:barbeiro_id>/eventos")
+def api_agenda_eventos(barbeiro_id):
+    """SSE: 'ocupado' / 'liberado' com {data, hora} para o barbeiro."""
+    if "cliente_id" not in session:
+        return {"error": "unauthorized"}, 401
+
+    corpo = eventos.transmitir(
+        barbeiro_id,
+        request.headers.get("Last-Event-ID"),
+        keepalive=app.config.get("SSE_KEEPALIVE", eventos.KEEPALIVE),
+    )
+
+    return Response(
+        corpo,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/alterar-senha", methods=["GET", "POST"])
@@ -488,11 +535,15 @@ def alterar_senha():
         "SELECT senha_hash FROM clientes WHERE id = ?", (session["cliente_id"],)
     ).fetchone()
 
-    if not usuario or not check_password_hash(usuario["senha_hash"], senha_atual):
-        flash("Senha atual incorreta", "error")
-        return redirect(url_for("perfil"))
+    try:
+        if not usuario or not senhas.verificar(usuario["senha_hash"], senha_atual):
+            flash("Senha atual incorreta", "error")
+            return redirect(url_for("perfil"))
 
-    nova_hash = generate_password_hash(nova_senha)
+        nova_hash = senhas.gerar(nova_senha)
+    except senhas.SenhaOcupada:
+        flash("Muitos acessos agora. Tente novamente em instantes.", "error")
+        return redirect(url_for("perfil"))
 
     db.execute(
         "UPDATE clientes SET senha_hash = ? WHERE id = ?",
@@ -0,0 +1,331 @@
+"""
+Modo assíncrono (ASGI), opcional, para os endpoints JSON de leitura.
+
+/api/agenda/<id>, /api/horarios, /api/proximos-horarios,
+/api/meus-agendamentos/<lista> e o SSE /api/agenda/<id>/eventos são
+atendidos direto no event loop: a parte bloqueante (SQLite) roda num pool
+de threads limitado, com as mesmas conexões do db.Pool, e um cliente lento
+ou um ouvinte SSE parado custa uma corrotina, não um worker/thread. O resto
+do site continua sendo o app Flask, servido pelo adaptador WSGI.
+
+Precisa de `uvicorn` e `a2wsgi` (em requirements.txt):
+
+    SERVIDOR=async gunicorn -c gunicorn.conf.py asgi:aplicacao
+    uvicorn asgi:aplicacao --workers 4
+
+As respostas (JSON, ETag/304, eventos) são as mesmas do modo síncrono.
+"""
+
+import asyncio
+import json
+import queue
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from werkzeug.http import parse_etags
+
+try:
+    from a2wsgi import WSGIMiddleware
+except ImportError:
+    from uvicorn.middleware.wsgi import WSGIMiddleware
+
+import condicional
+import eventos
+import sessoes
+from agenda import duracao_servico, horarios_do_dia, montar_agenda, proximos_livres
+from app import (
+    DIAS_MAXIMO_AGENDA,
+    DIAS_MAXIMO_PROXIMOS,
+    LIMITE_MAXIMO_PROXIMOS,
+    LISTAS_CLIENTE,
+    app,
+    listar_meus_agendamentos,
+)
+from db import caminho_db, get_pool
+from paginacao import ler_limite
+
+THREADS_DB = app.config.get("ASYNC_DB_THREADS", 8)
+
+_executor = ThreadPoolExecutor(THREADS_DB, thread_name_prefix="asgi-db")
+_flask = WSGIMiddleware(app)
+
+
+class Requisicao:
+    """O mínimo de um request HTTP a partir do scope ASGI."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope["headers"]}
+        self.args = {
+            k: v[0] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()
+        }
+        self.sessao = {}
+
+    def cookie_sessao(self):
+        cookie = SimpleCookie(self.headers.get("cookie", ""))
+        nome = app.config["SESSION_COOKIE_NAME"]
+        return cookie[nome].value if nome in cookie else None
+
+
+async def _em_thread(funcao, *args):
+    return await asyncio.get_running_loop().run_in_executor(_executor, funcao, *args)
+
+
+def _com_conexao(funcao, *args):
+    pool = get_pool(app)
+    db = pool.obter()
+    try:
+        return funcao(db, *args)
+    finally:
+        pool.devolver(db)
+
+
+async def _json(send, status, dados=None, etag=None):
+    corpo = b"" if status == 304 else json.dumps(dados).encode()
+
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(corpo)).encode()),
+    ]
+    if etag:
+        headers += [
+            (b"etag", f'"{etag}"'.encode()),
+            (b"cache-control", b"private, no-cache"),
+        ]
+
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": corpo})
+
+
+def _condicional(req, etag, gerar):
+    """Versão sem Flask de condicional.condicional; roda na thread."""
+    condicional.estatisticas["respostas"] += 1
+
+    if parse_etags(req.headers.get("if-none-match")).contains(etag):
+        condicional.estatisticas["nao_modificado"] += 1
+        return 304, None
+
+    return 200, gerar()
+
+
+# -----------------------------
+# ENDPOINTS
+# -----------------------------
+async def api_agenda(req, receive, send, barbeiro_id):
+    if "cliente_id" not in req.sessao:
+        return await _json(send, 401, {"error": "unauthorized"})
+
+    barbeiro_id = int(barbeiro_id)
+    try:
+        dias = min(max(int(req.args.get("dias", 7)), 1), DIAS_MAXIMO_AGENDA)
+    except ValueError:
+        return await _json(send, 400, {"error": "dias inválido"})
+    servico_id = req.args.get("servico_id") or req.sessao.get("agendamento", {}).get(
+        "servico_id"
+    )
+
+    def consultar(db):
+        duracao = duracao_servico(db, servico_id)
+        hoje = date.today()
+        etag = condicional.etag_agenda(db, barbeiro_id, hoje, dias, duracao)
+        status, dados = _condicional(
+            req, etag, lambda: montar_agenda(db, barbeiro_id, hoje, dias, duracao)
+        )
+        return status, dados, etag
+
+    await _json(send, *await _em_thread(_com_conexao, consultar))
+
+
+async def api_horarios(req, receive, send):
+    agendamento = req.sessao.get("agendamento")
+    data = req.args.get("data")
+
+    if "cliente_id" not in req.sessao or not agendamento or "barbeiro_id" not in agendamento:
+        return await _json(send, 200, [])
+    if not data:
+        return await _json(send, 200, [])
+
+    barbeiro_id = agendamento["barbeiro_id"]
+    try:
+        dia = datetime.strptime(data, "%Y-%m-%d").date()
+    except ValueError:
+        return await _json(send, 400, {"error": "data inválida"})
+
+    def consultar(db):
+        duracao = duracao_servico(db, agendamento.get("servico_id"))
+        etag = condicional.etag_horarios(db, barbeiro_id, dia, duracao)
+        status, dados = _condicional(
+            req, etag, lambda: horarios_do_dia(db, barbeiro_id, dia, duracao)
+        )
+        return status, dados, etag
+
+    await _json(send, *await _em_thread(_com_conexao, consultar))
+
+
+def _inteiro(valor, padrao):
+    """Como request.args.get(..., type=int): o padrão se não for número."""
+    try:
+        return int(valor) if valor is not None else padrao
+    except ValueError:
+        return padrao
+
+
+async def api_proximos_horarios(req, receive, send):
+    if "cliente_id" not in req.sessao:
+        return await _json(send, 401, {"error": "unauthorized"})
+
+    dias = min(max(_inteiro(req.args.get("dias"), 14), 1), DIAS_MAXIMO_PROXIMOS)
+    limite = min(max(_inteiro(req.args.get("limite"), 5), 1), LIMITE_MAXIMO_PROXIMOS)
+    servico_id = req.args.get("servico_id") or req.sessao.get("agendamento", {}).get(
+        "servico_id"
+    )
+
+    def consultar(db):
+        duracao = duracao_servico(db, servico_id)
+        return 200, proximos_livres(db, duracao, dias=dias, limite=limite)
+
+    await _json(send, *await _em_thread(_com_conexao, consultar))
+
+
+async def api_meus_agendamentos(req, receive, send, lista):
+    if "cliente_id" not in req.sessao:
+        return await _json(send, 401, {"error": "unauthorized"})
+    if lista not in LISTAS_CLIENTE:
+        return await _json(send, 404, {"error": "lista inválida"})
+
+    def consultar(db):
+        itens, proximo = listar_meus_agendamentos(
+            db,
+            req.sessao["cliente_id"],
+            lista,
+            req.args.get("cursor"),
+            ler_limite(req.args.get("limite")),
+        )
+        return 200, {"itens": [dict(a) for a in itens], "proximo": proximo}
+
+    await _json(send, *await _em_thread(_com_conexao, consultar))
+
+
+class FilaAsync:
+    """Fila do barramento (thread) entregando no event loop."""
+
+    def __init__(self, loop, maximo=eventos.MAX_FILA):
+        self.loop = loop
+        self.maximo = maximo
+        self.fila = asyncio.Queue()
+
+    def put_nowait(self, evento):
+        if self.fila.qsize() >= self.maximo:
+            raise queue.Full
+        self.loop.call_soon_threadsafe(self.fila.put_nowait, evento)
+
+    def encerrar(self):
+        self.fila.put_nowait(None)
+
+    async def get(self, timeout):
+        return await asyncio.wait_for(self.fila.get(), timeout)
+
+
+async def api_agenda_eventos(req, receive, send, barbeiro_id):
+    if "cliente_id" not in req.sessao:
+        return await _json(send, 401, {"error": "unauthorized"})
+
+    barbeiro_id = int(barbeiro_id)
+    caminho = caminho_db(app)
+    keepalive = app.config.get("SSE_KEEPALIVE", eventos.KEEPALIVE)
+
+    barramento = eventos.barramento(caminho)
+    fila = FilaAsync(asyncio.get_running_loop())
+    # o primeiro assinante lê o último id do banco: fora do event loop
+    await _em_thread(barramento.assinar, barbeiro_id, fila)
+
+    async def vigiar():
+        while (await receive())["type"] != "http.disconnect":
+            pass
+        fila.encerrar()
+
+    vigia = asyncio.create_task(vigiar())
+
+    async def enviar(texto):
+        await send({"type": "http.response.body", "body": texto.encode(), "more_body": True})
+
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        await enviar("retry: 3000\n\n")
+
+        enviado = 0
+        pendentes = await _em_thread(
+            eventos.atrasados, caminho, barbeiro_id, req.headers.get("last-event-id")
+        )
+        for evento in pendentes:
+            enviado = evento["id"]
+            await enviar(eventos.formatar(evento))
+
+        while True:
+            try:
+                evento = await fila.get(keepalive)
+            except asyncio.TimeoutError:
+                await enviar(": ping\n\n")
+                continue
+
+            if evento is None:
+                break
+
+            if evento["id"] > enviado:
+                enviado = evento["id"]
+                await enviar(eventos.formatar(evento))
+    finally:
+        barramento.cancelar(barbeiro_id, fila)
+        vigia.cancel()
+
+
+ROTAS = [
+    (re.compile(r"^/api/agenda/(\d+)$"), api_agenda),
+    (re.compile(r"^/api/agenda/(\d+)/eventos$"), api_agenda_eventos),
+    (re.compile(r"^/api/horarios$"), api_horarios),
+    (re.compile(r"^/api/proximos-horarios$"), api_proximos_horarios),
+    (re.compile(r"^/api/meus-agendamentos/([^/]+)$"), api_meus_agendamentos),
+]
+
+
+# -----------------------------
+# APLICAÇÃO
+# -----------------------------
+async def _lifespan(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif mensagem["type"] == "lifespan.shutdown":
+            _executor.shutdown(wait=False)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def aplicacao(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+
+    if scope["type"] == "http" and scope["method"] == "GET":
+        for padrao, view in ROTAS:
+            encontrado = padrao.match(scope["path"])
+            if encontrado:
+                req = Requisicao(scope)
+                # a sessão pode vir do SQLite (sessoes.py): fora do event loop
+                req.sessao = await _em_thread(sessoes.carregar, app, req.cookie_sessao())
+                return await view(req, receive, send, *encontrado.groups())
+
+    return await _flask(scope, receive, send)
@@ -0,0 +1,309 @@
+"""
+Build e registro dos arquivos estáticos (CSS, JS e imagens do tema).
+
+`python assets.py` gera em static/dist/:
+  - app.<hash>.css: base + components + app concatenados e minificados,
+    com as url() das imagens reescritas para as versões com hash;
+  - app.<hash>.js minificado;
+  - img/<nome>.<hash>.<ext> (JPEGs grandes são reprocessados);
+  - .gz (e .br, se o pacote `brotli` estiver instalado) de cada texto;
+  - manifest.json: nome lógico -> arquivo gerado.
+
+Os arquivos gerados são servidos em /assets/ com Cache-Control immutable:
+o nome muda sempre que o conteúdo muda. Sem build (desenvolvimento), os
+helpers dos templates apontam para os arquivos originais em /static/.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import (
+    Blueprint,
+    abort,
+    current_app,
+    make_response,
+    render_template,
+    request,
+    send_from_directory,
+    url_for,
+)
+from markupsafe import Markup, escape
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+PACOTES = {
+    "app.css": ["css/base.css", "css/components.css", "css/app.css"],
+    "admin.css": ["css/admin.css"],
+    "app.js": ["js/app.js"],
+}
+
+IMAGENS = ["img/logo.svg", "img/hero-barber.jpg", "img/hero.jpg", "img/hero2.jpg"]
+
+# fundo com background-size: cover; mais que isso só pesa no celular
+LARGURA_MAXIMA_JPEG = 1280
+
+CACHE_IMUTAVEL = "public, max-age=31536000, immutable"
+
+# segundos que o service worker reaproveita uma resposta de /api/agenda
+TTL_AGENDA_SW = 30
+
+assets = Blueprint("assets", __name__)
+
+
+def _pasta_static(raiz):
+    return os.path.join(raiz, "static")
+
+
+def _pasta_dist(raiz):
+    return os.path.join(raiz, "static", "dist")
+
+
+def _hash(conteudo):
+    return hashlib.sha256(conteudo).hexdigest()[:10]
+
+
+def _com_hash(nome, conteudo):
+    base, ext = os.path.splitext(nome)
+    return f"{base}.{_hash(conteudo)}{ext}"
+
+
+# -----------------------------
+# MINIFICAÇÃO
+# -----------------------------
+def minificar_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+def minificar_js(js):
+    """Conservador: tira comentários de linha inteira, indentação e linhas vazias."""
+    linhas = []
+    for linha in js.splitlines():
+        linha = linha.strip()
+        if not linha or linha.startswith("//"):
+            continue
+        linhas.append(linha)
+    return "\n".join(linhas)
+
+
+# -----------------------------
+# BUILD
+# -----------------------------
+def _gravar(dist, nome, conteudo, comprimir):
+    caminho = os.path.join(dist, nome)
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+
+    with open(caminho, "wb") as f:
+        f.write(conteudo)
+
+    if comprimir:
+        with open(caminho + ".gz", "wb") as f:
+            f.write(gzip.compress(conteudo, compresslevel=9, mtime=0))
+
+        if brotli is not None:
+            with open(caminho + ".br", "wb") as f:
+                f.write(brotli.compress(conteudo, quality=11))
+
+
+def _otimizar_jpeg(conteudo):
+    from io import BytesIO
+    from PIL import Image
+
+    with Image.open(BytesIO(conteudo)) as img:
+        if img.width <= LARGURA_MAXIMA_JPEG:
+            return conteudo
+
+        img.draft("RGB", (LARGURA_MAXIMA_JPEG, LARGURA_MAXIMA_JPEG))
+        img = img.convert("RGB")
+        img.thumbnail((LARGURA_MAXIMA_JPEG, LARGURA_MAXIMA_JPEG * 4), reducing_gap=3.0)
+
+        saida = BytesIO()
+        img.save(saida, "JPEG", quality=80, optimize=True, progressive=True)
+
+    otimizado = saida.getvalue()
+    return otimizado if len(otimizado) < len(conteudo) else conteudo
+
+
+def build(raiz):
+    """Gera static/dist e devolve o manifest."""
+    static = _pasta_static(raiz)
+    dist = _pasta_dist(raiz)
+    manifest = {}
+
+    for nome in IMAGENS:
+        with open(os.path.join(static, nome), "rb") as f:
+            conteudo = f.read()
+
+        if nome.endswith(".jpg"):
+            conteudo = _otimizar_jpeg(conteudo)
+
+        gerado = _com_hash(nome, conteudo)
+        _gravar(dist, gerado, conteudo, comprimir=nome.endswith(".svg"))
+        manifest[nome] = gerado
+
+    for pacote, arquivos in PACOTES.items():
+        partes = []
+        for nome in arquivos:
+            with open(os.path.join(static, nome), encoding="utf-8") as f:
+                partes.append(f.read())
+
+        texto = "\n".join(partes)
+
+        if pacote.endswith(".css"):
+            for original, gerado in manifest.items():
+                texto = texto.replace(f"/static/{original}", f"/assets/{gerado}")
+            texto = minificar_css(texto)
+        else:
+            texto = minificar_js(texto)
+
+        conteudo = texto.encode("utf-8")
+        gerado = _com_hash(pacote, conteudo)
+        _gravar(dist, gerado, conteudo, comprimir=True)
+        manifest[pacote] = gerado
+
+    # escrita atômica: workers podem estar lendo o manifest antigo
+    temporario = os.path.join(dist, f"manifest.json.{os.getpid()}")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temporario, os.path.join(dist, "manifest.json"))
+
+    return manifest
+
+
+# -----------------------------
+# REGISTRO / TEMPLATES
+# -----------------------------
+def carregar_manifest(raiz):
+    try:
+        with open(os.path.join(_pasta_dist(raiz), "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _manifest():
+    return current_app.extensions.get("assets_manifest", {})
+
+
+def asset_url(nome):
+    """Como url_for('static', filename=nome), mas com a versão com hash se houver build."""
+    gerado = _manifest().get(nome)
+    if gerado:
+        return url_for("assets.servir", arquivo=gerado)
+    return url_for("static", filename=nome)
+
+
+def _urls(pacote):
+    if pacote in _manifest():
+        return [asset_url(pacote)]
+    return [url_for("static", filename=a) for a in PACOTES[pacote]]
+
+
+def _tags(pacote, modelo):
+    urls = _urls(pacote)
+    return Markup("\n  ".join(modelo.format(escape(u)) for u in urls))
+
+
+def css_tags(pacote):
+    return _tags(pacote, '<link rel="stylesheet" href="{}">')
+
+
+def js_tags(pacote):
+    return _tags(pacote, '<script src="{}"></script>')
+
+
+def shell():
+    """URLs que o service worker guarda na instalação."""
+    return [
+        *_urls("app.css"),
+        *_urls("app.js"),
+        asset_url("img/logo.svg"),
+        url_for("static", filename="manifest.json"),
+    ]
+
+
+def _versao_shell(urls):
+    if _manifest():
+        conteudo = json.dumps(urls)
+    else:
+        # sem build as URLs não mudam: a versão sai do conteúdo dos arquivos
+        static = _pasta_static(current_app.root_path)
+        conteudo = ""
+        for arquivos in PACOTES.values():
+            for nome in arquivos:
+                with open(os.path.join(static, nome), encoding="utf-8") as f:
+                    conteudo += f.read()
+
+    return _hash(conteudo.encode("utf-8"))
+
+
+def registrar(app):
+    app.extensions["assets_manifest"] = carregar_manifest(app.root_path)
+    app.jinja_env.globals.update(asset_url=asset_url, css_tags=css_tags, js_tags=js_tags)
+    app.register_blueprint(assets)
+
+
+# -----------------------------
+# ENTREGA
+# -----------------------------
+@assets.route("/assets/<path:arquivo>")
+def servir(arquivo):
+    dist = _pasta_dist(current_app.root_path)
+
+    if not os.path.isfile(os.path.join(dist, arquivo)):
+        abort(404)
+
+    aceita = request.headers.get("Accept-Encoding", "")
+    mimetype = mimetypes.guess_type(arquivo)[0] or "application/octet-stream"
+
+    codificacao = None
+    for formato, sufixo in (("br", ".br"), ("gzip", ".gz")):
+        if formato in aceita and os.path.isfile(os.path.join(dist, arquivo + sufixo)):
+            codificacao = formato
+            arquivo += sufixo
+            break
+
+    resposta = send_from_directory(dist, arquivo, mimetype=mimetype, conditional=True)
+
+    if codificacao:
+        resposta.headers["Content-Encoding"] = codificacao
+    resposta.headers["Vary"] = "Accept-Encoding"
+    resposta.headers["Cache-Control"] = CACHE_IMUTAVEL
+
+    return resposta
+
+
+@assets.route("/service-worker.js")
+def service_worker():
+    # servido na raiz para que o escopo cubra o site inteiro
+    urls = shell()
+
+    resposta = make_response(
+        render_template(
+            "service-worker.js",
+            versao=_versao_shell(urls),
+            shell=urls,
+            ttl_agenda=current_app.config.get("SW_TTL_AGENDA", TTL_AGENDA_SW),
+        )
+    )
+    resposta.mimetype = "application/javascript"
+    resposta.headers["Cache-Control"] = "no-cache"
+
+    return resposta
+
+
+if __name__ == "__main__":
+    gerado = build(os.path.dirname(os.path.abspath(__file__)))
+
+    for nome, arquivo in sorted(gerado.items()):
+        print(f"{nome:<22} -> {arquivo}")
@@ -1,6 +1,6 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
-from werkzeug.security import generate_password_hash, check_password_hash
-from db import get_db
+from db import caminho_db, get_db
+import senhas
 
 auth = Blueprint("auth", __name__)
 
@@ -19,7 +19,19 @@ def login():
             "SELECT * FROM clientes WHERE email = ?", (email,)
         ).fetchone()
 
-        if cliente and check_password_hash(cliente["senha_hash"], senha):
+        try:
+            valida = cliente and senhas.verificar(cliente["senha_hash"], senha)
+        except senhas.SenhaOcupada:
+            flash("Muitos acessos agora. Tente novamente em instantes.")
+            return render_template("public/login.html"), 503, {"Retry-After": "2"}
+
+        if valida:
+            # hash de um método antigo: refaz com o atual sem atrasar o login
+            if senhas.desatualizado(cliente["senha_hash"]):
+                senhas.atualizar_depois(
+                    caminho_db(), cliente["id"], cliente["senha_hash"], senha
+                )
+
             session.clear()
             session["cliente_id"] = cliente["id"]
             session["cliente_nome"] = cliente["nome"]
@@ -47,7 +59,12 @@ def cadastro():
         telefone = request.form["telefone"]
         senha = request.form["senha"]
 
-        senha_hash = generate_password_hash(senha)
+        try:
+            senha_hash = senhas.gerar(senha)
+        except senhas.SenhaOcupada:
+            flash("Muitos acessos agora. Tente novamente em instantes.")
+            return render_template("public/cadastro.html"), 503, {"Retry-After": "2"}
+
         db = get_db()
 
         try:
@@ -0,0 +1,182 @@
+"""
+Benchmark do motor de disponibilidade (/api/agenda).
+
+Compara o laço antigo (uma consulta por slot) com `agenda.montar_agenda`
+(duas consultas por requisição) para dias = 7, 14, 30, 60 e 90, e mede a
+checagem de sobreposição por intervalos (`agenda.Ocupacao`) contra uma
+varredura linear com milhares de agendamentos no mesmo dia.
+
+Uso:
+    python benchmarks/bench_agenda.py
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from agenda import DIAS_PT, Ocupacao, dia_semana_sqlite, montar_agenda  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+BARBEIRO_ID = 1
+REPETICOES = 20
+
+
+def preparar_banco():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "bench.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+
+    db = sqlite3.connect(caminho)
+    db.row_factory = sqlite3.Row
+
+    db.execute("DELETE FROM horarios WHERE barbeiro_id = ?", (BARBEIRO_ID,))
+    db.execute("DELETE FROM agendamentos WHERE barbeiro_id = ?", (BARBEIRO_ID,))
+
+    horas = [f"{h:02d}:{m:02d}" for h in range(9, 19) for m in (0, 30)]
+    db.executemany(
+        "INSERT INTO horarios (barbeiro_id, dia_semana, hora, ativo) VALUES (?, ?, ?, 1)",
+        [(BARBEIRO_ID, d, h) for d in range(1, 7) for h in horas],
+    )
+
+    random.seed(42)
+    hoje = date.today()
+    agendamentos = []
+    for i in range(90):
+        dia = (hoje + timedelta(days=i)).isoformat()
+        for h in random.sample(horas, 8):
+            agendamentos.append((1, BARBEIRO_ID, 1, dia, h, "confirmado"))
+
+    db.executemany(
+        """
+        INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        agendamentos,
+    )
+    db.commit()
+
+    return db, pasta
+
+
+def agenda_por_slot(db, barbeiro_id, dias):
+    """Implementação anterior: uma consulta por slot."""
+    hoje = date.today()
+
+    horarios_base = db.execute(
+        "SELECT dia_semana, hora FROM horarios WHERE barbeiro_id = ? AND ativo = 1",
+        (barbeiro_id,),
+    ).fetchall()
+
+    agenda = []
+    for i in range(dias):
+        data_atual = hoje + timedelta(days=i)
+        horarios_dia = [
+            h["hora"]
+            for h in horarios_base
+            if h["dia_semana"] == dia_semana_sqlite(data_atual)
+        ]
+        if not horarios_dia:
+            continue
+
+        slots = []
+        for hora in horarios_dia:
+            ocupado = db.execute(
+                """
+                SELECT 1 FROM agendamentos
+                WHERE barbeiro_id = ? AND data = ? AND hora = ?
+                  AND status IN ('pendente', 'confirmado')
+                """,
+                (barbeiro_id, data_atual.isoformat(), hora),
+            ).fetchone()
+            slots.append({"hora": hora, "disponivel": not bool(ocupado)})
+
+        agenda.append(
+            {
+                "data": data_atual.isoformat(),
+                "dia": DIAS_PT[data_atual.weekday()],
+                "slots": slots,
+            }
+        )
+
+    return agenda
+
+
+def medir(db, funcao, dias):
+    consultas = []
+    db.set_trace_callback(consultas.append)
+
+    inicio = time.perf_counter()
+    for _ in range(REPETICOES):
+        funcao(db, dias)
+    total = time.perf_counter() - inicio
+
+    db.set_trace_callback(None)
+
+    return len(consultas) // REPETICOES, total / REPETICOES * 1000
+
+
+def bench_intervalos():
+    """Ocupacao (busca binária) vs. varredura linear, n agendamentos/dia."""
+    rnd = random.Random(7)
+    duracoes = (15, 30, 40, 60)
+
+    print(f"\n{'agend./dia':>10} | {'ms (linear)':>11} | {'ms (Ocupacao)':>13}")
+
+    for n in (1000, 2500, 5000, 10000):
+        # dia "esticado" para caber n agendamentos sem sobreposição total
+        intervalos = []
+        for _ in range(n):
+            ini = rnd.randrange(0, n * 20)
+            intervalos.append((ini, ini + rnd.choice(duracoes)))
+
+        candidatos = [(c, c + 45) for c in range(0, n * 20, 20)]
+
+        inicio = time.perf_counter()
+        linear = [
+            not any(i < b and f > a for i, f in intervalos) for a, b in candidatos
+        ]
+        ms_linear = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        ocupacao = Ocupacao(intervalos)
+        binaria = [ocupacao.livre(a, b) for a, b in candidatos]
+        ms_binaria = (time.perf_counter() - inicio) * 1000
+
+        assert linear == binaria
+        print(f"{n:>10} | {ms_linear:>11.2f} | {ms_binaria:>13.2f}")
+
+
+def main():
+    db, pasta = preparar_banco()
+
+    antigo = lambda db, dias: agenda_por_slot(db, BARBEIRO_ID, dias)
+    novo = lambda db, dias: montar_agenda(db, BARBEIRO_ID, date.today(), dias)
+
+    assert antigo(db, 30) == novo(db, 30)
+
+    print(f"{'dias':>5} | {'consultas (antigo)':>18} | {'ms (antigo)':>11} | "
+          f"{'consultas (novo)':>16} | {'ms (novo)':>9}")
+
+    for dias in (7, 14, 30, 60, 90):
+        q_antigo, ms_antigo = medir(db, antigo, dias)
+        q_novo, ms_novo = medir(db, novo, dias)
+        print(f"{dias:>5} | {q_antigo:>18} | {ms_antigo:>11.2f} | "
+              f"{q_novo:>16} | {ms_novo:>9.2f}")
+
+    db.close()
+    shutil.rmtree(pasta)
+
+    bench_intervalos()
+
+
+if __name__ == "__main__":
+    main()
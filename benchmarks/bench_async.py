@@ -0,0 +1,168 @@
+"""
+Vazão de /api/agenda com muitas conexões simultâneas: gunicorn sync (o
+setup anterior), gthread (padrão do gunicorn.conf.py) e o modo assíncrono
+(asgi.py com workers uvicorn), todos com 2 workers.
+
+Cada cenário abre N conexões keep-alive fazendo GETs seguidos por alguns
+segundos; o cenário "lentos" soma 10 clientes que enviam o request aos
+poucos (como um celular em Wi-Fi ruim) e seguram a conexão.
+
+Precisa de gunicorn e uvicorn instalados. Uso:
+    python benchmarks/bench_async.py
+"""
+
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from comum import cookie_sessao, percentil, porta_livre, preparar_copia
+
+MODOS = {
+    "sync": ["-k", "sync", "app:app"],
+    "gthread": ["app:app"],
+    "async": ["asgi:aplicacao"],
+}
+CONEXOES = (10, 100, 300)
+LENTOS = 10
+DURACAO = 5
+URL = "/api/agenda/1?dias=14"
+
+
+def iniciar(pasta, modo, porta):
+    env = {
+        **os.environ,
+        "SERVIDOR": "async" if modo == "async" else "sync",
+        "WEB_CONCURRENCY": "2",
+        "BIND": f"127.0.0.1:{porta}",
+    }
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", *MODOS[modo]],
+        cwd=pasta,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.1).close()
+            return processo
+        except OSError:
+            time.sleep(0.1)
+
+    processo.kill()
+    raise RuntimeError(f"servidor {modo} não subiu")
+
+
+# -----------------------------
+# CLIENTES
+# -----------------------------
+async def _resposta(reader):
+    status = await reader.readline()
+    if not status:
+        raise ConnectionError
+
+    tamanho, fechar = 0, False
+    while True:
+        linha = (await reader.readline()).strip().lower()
+        if not linha:
+            break
+        if linha.startswith(b"content-length:"):
+            tamanho = int(linha.split(b":")[1])
+        elif linha == b"connection: close":
+            fechar = True
+
+    await reader.readexactly(tamanho)
+    return fechar
+
+
+async def cliente(porta, pedido, fim, latencias, erros):
+    conexao = None
+
+    while time.perf_counter() < fim:
+        try:
+            if conexao is None:
+                conexao = await asyncio.open_connection("127.0.0.1", porta)
+            reader, writer = conexao
+
+            inicio = time.perf_counter()
+            writer.write(pedido)
+            await writer.drain()
+            fechar = await asyncio.wait_for(_resposta(reader), 10)
+            latencias.append(time.perf_counter() - inicio)
+
+            if fechar:
+                writer.close()
+                conexao = None
+        except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            erros.append(1)
+            conexao = None
+            await asyncio.sleep(0.05)
+
+
+async def lento(porta, pedido, fim):
+    """Manda o request um byte a cada 0,5 s e segura a conexão."""
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+        for i in range(len(pedido)):
+            if time.perf_counter() >= fim:
+                break
+            writer.write(pedido[i:i + 1])
+            await writer.drain()
+            await asyncio.sleep(0.5)
+        writer.close()
+    except OSError:
+        pass
+
+
+async def carga(porta, cookie, conexoes, lentos):
+    pedido = (
+        f"GET {URL} HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n\r\n"
+    ).encode()
+    fim = time.perf_counter() + DURACAO
+    latencias, erros = [], []
+
+    tarefas = [lento(porta, pedido, fim) for _ in range(lentos)]
+    tarefas += [cliente(porta, pedido, fim, latencias, erros) for _ in range(conexoes)]
+    await asyncio.gather(*tarefas)
+
+    return latencias, len(erros)
+
+
+def main():
+    pasta = preparar_copia()
+    cookie = cookie_sessao(pasta)
+
+    print(f"{'modo':<8} | {'conexões':>8} | {'lentos':>6} | {'req/s':>8} | "
+          f"{'p50 (ms)':>8} | {'p99 (ms)':>8} | {'erros':>5}")
+
+    try:
+        for modo in MODOS:
+            porta = porta_livre()
+            servidor = iniciar(pasta, modo, porta)
+
+            try:
+                cenarios = [(n, 0) for n in CONEXOES] + [(20, LENTOS)]
+                for conexoes, lentos in cenarios:
+                    latencias, erros = asyncio.run(carga(porta, cookie, conexoes, lentos))
+                    p50 = statistics.median(latencias) * 1000 if latencias else 0
+                    p99 = percentil(latencias, 0.99) * 1000 if latencias else 0
+
+                    print(f"{modo:<8} | {conexoes:>8} | {lentos:>6} | "
+                          f"{len(latencias) / DURACAO:>8.0f} | {p50:>8.1f} | "
+                          f"{p99:>8.1f} | {erros:>5}")
+            finally:
+                servidor.send_signal(signal.SIGTERM)
+                servidor.wait(10)
+    finally:
+        shutil.rmtree(os.path.dirname(pasta))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Latência das páginas do funil de agendamento com e sem o cache do catálogo.
+
+Uso:
+    python benchmarks/bench_catalogo.py
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import catalogo  # noqa: E402
+from app import app  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+REPETICOES = 300
+
+PAGINAS = [
+    ("GET", "/agendar/servico"),
+    ("GET", "/agendar/barbeiro"),
+    ("GET", "/agendar/data"),
+    ("GET", "/api/agenda/1?dias=14"),
+    ("GET", "/agendar/revisao"),
+]
+
+
+def medir(cache):
+    app.config["CATALOGO_CACHE"] = cache
+    c = app.test_client()
+
+    with c.session_transaction() as s:
+        s["cliente_id"] = 1
+        s["agendamento"] = {
+            "servico_id": 1,
+            "barbeiro_id": 1,
+            "data": "2099-01-05",
+            "hora": "10:00",
+        }
+
+    resultados = {}
+    for metodo, url in PAGINAS:
+        c.open(url, method=metodo)  # aquecimento
+
+        inicio = time.perf_counter()
+        for _ in range(REPETICOES):
+            c.open(url, method=metodo)
+        resultados[url] = (time.perf_counter() - inicio) / REPETICOES * 1000
+
+    return resultados
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "bench.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+    app.config["DATABASE"] = caminho
+
+    try:
+        sem = medir(False)
+        com = medir(True)
+    finally:
+        shutil.rmtree(pasta)
+
+    print(f"{'página':<24} | {'sem cache (ms)':>14} | {'com cache (ms)':>14}")
+    for _, url in PAGINAS:
+        print(f"{url:<24} | {sem[url]:>14.3f} | {com[url]:>14.3f}")
+
+    print(f"\nhits={catalogo.estatisticas['hits']} "
+          f"misses={catalogo.estatisticas['misses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+Carga simulada de navegação no funil com e sem GET condicional.
+
+Cada "navegador" guarda o ETag de cada URL e o reenvia em If-None-Match,
+como o cache HTTP faz; clientes alternam o filtro de dias da agenda,
+voltam às páginas de serviço/barbeiro e, de vez em quando, alguém reserva
+um horário (o que muda a versão daquele barbeiro). Conta as respostas 304
+e as consultas executadas, em especial as que leem agendamentos.
+
+Antes da carga, conferir() garante o contrato: a segunda ida à agenda, aos
+horários do dia e às páginas do catálogo volta 304 sem corpo, e uma
+reserva (ou uma mudança no catálogo) troca o ETag e o próximo GET volta 200.
+
+Uso:
+    python benchmarks/bench_etag.py
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from flask import g  # noqa: E402
+
+from app import app  # noqa: E402
+from agenda import dia_semana_sqlite  # noqa: E402
+from db import get_db  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+NAVEGADORES = 20
+PASSOS = 100
+# uma reserva a cada ~500 requests: um dia movimentado numa barbearia
+CHANCE_RESERVA = 0.002
+
+consultas = {"total": 0, "agendamentos": 0}
+
+
+@app.before_request
+def _contar_consultas():
+    def registrar(sql):
+        consultas["total"] += 1
+        if "agendamentos" in sql:
+            consultas["agendamentos"] += 1
+
+    get_db().set_trace_callback(registrar)
+
+
+@app.teardown_request
+def _parar_contagem(e=None):
+    if "db" in g:
+        g.db.set_trace_callback(None)
+
+
+def simular(caminho, condicional):
+    rnd = random.Random(42)
+    externo = sqlite3.connect(caminho)
+
+    barbeiros = [r[0] for r in externo.execute("SELECT id FROM barbeiros WHERE ativo = 1")]
+    servicos = [r[0] for r in externo.execute("SELECT id FROM servicos WHERE ativo = 1")]
+
+    navegadores = []
+    for _ in range(NAVEGADORES):
+        c = app.test_client()
+        barbeiro_id = rnd.choice(barbeiros)
+        with c.session_transaction() as s:
+            s["cliente_id"] = 1
+            s["agendamento"] = {
+                "servico_id": rnd.choice(servicos),
+                "barbeiro_id": barbeiro_id,
+            }
+        navegadores.append((c, {}, barbeiro_id))
+
+    consultas.update(total=0, agendamentos=0)
+    respostas = {200: 0, 304: 0}
+    inicio = time.perf_counter()
+
+    for _ in range(PASSOS):
+        for c, etags, barbeiro_id in navegadores:
+            # o seletor de dias da agenda é o que mais refaz requests
+            url = rnd.choice(
+                [
+                    "/agendar/servico",
+                    "/agendar/barbeiro",
+                    f"/api/agenda/{barbeiro_id}?dias={rnd.choice((7, 14, 30))}",
+                    f"/api/agenda/{barbeiro_id}?dias={rnd.choice((7, 14, 30))}",
+                ]
+            )
+
+            headers = {}
+            if condicional and url in etags:
+                headers["If-None-Match"] = etags[url]
+
+            r = c.get(url, headers=headers)
+            respostas[r.status_code] = respostas.get(r.status_code, 0) + 1
+            if r.headers.get("ETag"):
+                etags[url] = r.headers["ETag"]
+
+            if rnd.random() < CHANCE_RESERVA:
+                dia = date.today() + timedelta(days=rnd.randrange(30))
+                externo.execute(
+                    """
+                    INSERT OR IGNORE INTO agendamentos
+                        (cliente_id, barbeiro_id, servico_id, data, hora, status)
+                    VALUES (1, ?, ?, ?, ?, 'pendente')
+                    """,
+                    (
+                        rnd.choice(barbeiros),
+                        rnd.choice(servicos),
+                        dia.isoformat(),
+                        f"{rnd.randrange(8, 19):02d}:00",
+                    ),
+                )
+                externo.commit()
+
+    tempo = time.perf_counter() - inicio
+    externo.close()
+
+    return respostas, dict(consultas), tempo
+
+
+def _condicional(c, url, etag):
+    r = c.get(url, headers={"If-None-Match": etag})
+    return r.status_code, r.get_data(), r.headers.get("ETag")
+
+
+def conferir(caminho):
+    """Asserções do GET condicional; levanta AssertionError se algo falhar."""
+    app.config["DATABASE"] = caminho
+    externo = sqlite3.connect(caminho)
+    barbeiro_id, servico_id = externo.execute(
+        """
+        SELECT h.barbeiro_id, (SELECT MIN(id) FROM servicos WHERE ativo = 1)
+        FROM horarios h JOIN barbeiros b ON b.id = h.barbeiro_id
+        WHERE h.ativo = 1 AND b.ativo = 1
+        LIMIT 1
+        """
+    ).fetchone()
+
+    # um dia da próxima semana em que o barbeiro atende, e um horário livre
+    for i in range(1, 8):
+        dia = date.today() + timedelta(days=i)
+        hora = externo.execute(
+            """
+            SELECT h.hora FROM horarios h
+            WHERE h.barbeiro_id = ? AND h.dia_semana = ? AND h.ativo = 1
+              AND NOT EXISTS (
+                  SELECT 1 FROM agendamentos a
+                  WHERE a.barbeiro_id = h.barbeiro_id AND a.data = ? AND a.hora = h.hora
+              )
+            ORDER BY h.hora DESC LIMIT 1
+            """,
+            (barbeiro_id, dia_semana_sqlite(dia), dia.isoformat()),
+        ).fetchone()
+        if hora:
+            break
+    assert hora, "barbeiro sem horário livre na próxima semana"
+
+    c = app.test_client()
+    with c.session_transaction() as s:
+        s["cliente_id"] = 1
+        s["agendamento"] = {"servico_id": servico_id, "barbeiro_id": barbeiro_id}
+
+    admin = app.test_client()
+    with admin.session_transaction() as s:
+        s.update(cliente_id=1, role="admin", is_admin=True)
+
+    disponibilidade = [f"/api/agenda/{barbeiro_id}?dias=14", f"/api/horarios?data={dia}"]
+    catalogo_urls = ["/agendar/servico", "/agendar/barbeiro"]
+    etags = {}
+
+    for url in disponibilidade + catalogo_urls:
+        r = c.get(url)
+        assert r.status_code == 200 and r.headers.get("ETag"), f"{url}: sem ETag"
+        etags[url] = r.headers["ETag"]
+
+        status, corpo, _ = _condicional(c, url, etags[url])
+        assert status == 304 and corpo == b"", f"{url}: esperado 304 vazio, veio {status}"
+
+    # reserva: muda a versão do barbeiro, não a do catálogo
+    externo.execute(
+        """
+        INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+        VALUES (1, ?, ?, ?, ?, 'pendente')
+        """,
+        (barbeiro_id, servico_id, dia.isoformat(), hora[0]),
+    )
+    externo.commit()
+
+    for url in disponibilidade:
+        status, corpo, etag = _condicional(c, url, etags[url])
+        assert status == 200 and corpo and etag != etags[url], (
+            f"{url}: reserva não trocou o ETag"
+        )
+    for url in catalogo_urls:
+        status, _, _ = _condicional(c, url, etags[url])
+        assert status == 304, f"{url}: reserva não deveria invalidar o catálogo"
+
+    # mudança no catálogo pelo admin: as páginas do catálogo voltam 200
+    admin.get(f"/admin/servicos/toggle/{servico_id}")
+    admin.get(f"/admin/servicos/toggle/{servico_id}")
+    for url in catalogo_urls:
+        status, corpo, etag = _condicional(c, url, etags[url])
+        assert status == 200 and corpo and etag != etags[url], (
+            f"{url}: catálogo não trocou o ETag"
+        )
+
+    externo.close()
+    print("conferido: 304 vazio na repetição; reserva e catálogo trocam o ETag")
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+
+    try:
+        caminho = os.path.join(pasta, "conferir.db")
+        shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+        migrar(caminho)
+        conferir(caminho)
+
+        resultados = {}
+        for nome, ligado in (("sem ETag", False), ("com ETag", True)):
+            caminho = os.path.join(pasta, f"{nome}.db")
+            shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+            migrar(caminho)
+            app.config["DATABASE"] = caminho
+            resultados[nome] = simular(caminho, ligado)
+    finally:
+        shutil.rmtree(pasta)
+
+    total = NAVEGADORES * PASSOS
+    print(f"{total} requests, {NAVEGADORES} navegadores\n")
+    print(f"{'':<10} | {'304':>6} | {'taxa 304':>8} | {'consultas':>9} | "
+          f"{'em agendamentos':>15} | {'tempo (s)':>9}")
+    for nome, (respostas, cont, tempo) in resultados.items():
+        print(f"{nome:<10} | {respostas.get(304, 0):>6} | "
+              f"{respostas.get(304, 0) / total:>8.0%} | {cont['total']:>9} | "
+              f"{cont['agendamentos']:>15} | {tempo:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Fechar o dia: N agendamentos confirmados viram finalizados.
+
+    um por um   o que o admin fazia: GET /admin/agendamentos/status/<id>/
+                finalizado para cada um, seguido do recarregamento de
+                /admin/agendamentos (o redirect)
+    lote        um POST /admin/api/agendamentos/status com os ids e um
+                recarregamento no fim
+
+Banco de gerar_dados.py, pelo test client.
+
+Uso:
+    python benchmarks/bench_lote.py
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import catalogo  # noqa: E402
+from gerar_dados import gerar  # noqa: E402
+
+TAMANHOS = (10, 50, 200)
+
+
+def confirmar(db, quantidade):
+    """Põe `quantidade` agendamentos passados como confirmados; retorna os ids."""
+    ids = [
+        r[0]
+        for r in db.execute(
+            """
+            SELECT id FROM agendamentos
+            WHERE data < date('now', 'localtime') AND status = 'finalizado'
+            ORDER BY data DESC LIMIT ?
+            """,
+            (quantidade,),
+        )
+    ]
+    db.execute(
+        f"UPDATE agendamentos SET status = 'confirmado' WHERE id IN ({','.join('?' * len(ids))})",
+        ids,
+    )
+    db.commit()
+    return ids
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, "lote.db")
+    gerar(banco)
+
+    from app import app
+    from db import get_db
+
+    logging.getLogger("metricas").setLevel(logging.WARNING)
+    app.config["DATABASE"] = banco
+    app.config["TAREFAS"] = False
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao.update(cliente_id=1, role="admin", is_admin=True)
+
+    print(f"{'N':>4} | {'um por um (ms)':>14} | {'lote (ms)':>9} | {'ganho':>6}")
+
+    with app.app_context():
+        db = get_db()
+        catalogo.invalidar(db)
+        db.commit()
+
+        for n in TAMANHOS:
+            ids = confirmar(db, n)
+            inicio = time.perf_counter()
+            for i in ids:
+                cliente.get(f"/admin/agendamentos/status/{i}/finalizado")
+                cliente.get("/admin/agendamentos")
+            um_por_um = (time.perf_counter() - inicio) * 1000
+
+            ids = confirmar(db, n)
+            inicio = time.perf_counter()
+            resposta = cliente.post(
+                "/admin/api/agendamentos/status", json={"status": "finalizado", "ids": ids}
+            )
+            cliente.get("/admin/agendamentos")
+            lote = (time.perf_counter() - inicio) * 1000
+            assert resposta.get_json()["alterados"] == n
+
+            print(f"{n:>4} | {um_por_um:>14.0f} | {lote:>9.1f} | {um_por_um / lote:>5.0f}x")
+
+    shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
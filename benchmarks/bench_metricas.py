@@ -0,0 +1,86 @@
+"""
+Custo da instrumentação (metricas.py): requests/s nas rotas mais usadas
+com METRICAS ligado e desligado, alternando as rodadas para diluir ruído.
+
+Cada modo usa uma cópia própria do banco: a fábrica de conexões do pool é
+escolhida quando o pool é criado, então desligado o pool usa conexões
+sqlite3 comuns (como em produção com METRICAS=0).
+
+Uso:
+    python benchmarks/bench_metricas.py
+"""
+
+import logging
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from app import app  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+ROTAS = [
+    "/api/agenda/1?dias=14",
+    "/api/horarios?data={data}",
+    "/agendar/servico",
+    "/meus-agendamentos",
+]
+RODADAS = 6
+REQUESTS = 300
+
+
+def preparar(pasta, nome):
+    caminho = os.path.join(pasta, nome)
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+    return caminho
+
+
+def rodada(cliente, urls):
+    inicio = time.perf_counter()
+    for i in range(REQUESTS):
+        resposta = cliente.get(urls[i % len(urls)])
+        assert resposta.status_code == 200, resposta.status_code
+    return REQUESTS / (time.perf_counter() - inicio)
+
+
+def main():
+    # a linha JSON por request iria para o stderr: aqui só interessa o custo
+    logging.getLogger("metricas").setLevel(logging.WARNING)
+
+    pasta = tempfile.mkdtemp()
+    caminhos = {True: preparar(pasta, "ligado.db"), False: preparar(pasta, "desligado.db")}
+
+    cliente = app.test_client()
+    with cliente.session_transaction() as sessao:
+        sessao["cliente_id"] = 1
+        sessao["agendamento"] = {"servico_id": 1, "barbeiro_id": 1}
+
+    urls = [u.format(data=time.strftime("%Y-%m-%d")) for u in ROTAS]
+    resultados = {True: [], False: []}
+
+    try:
+        for _ in range(RODADAS):
+            for ligado in (False, True):
+                app.config["METRICAS"] = ligado
+                app.config["DATABASE"] = caminhos[ligado]
+                resultados[ligado].append(rodada(cliente, urls))
+    finally:
+        shutil.rmtree(pasta)
+
+    desligado = statistics.median(resultados[False])
+    ligado = statistics.median(resultados[True])
+
+    print(f"{'METRICAS':<10} | {'req/s (mediana)':>15}")
+    print(f"{'desligado':<10} | {desligado:>15.0f}")
+    print(f"{'ligado':<10} | {ligado:>15.0f}")
+    print(f"custo: {(1 - ligado / desligado) * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
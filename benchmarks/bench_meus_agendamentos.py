@@ -0,0 +1,129 @@
+"""
+Latência de /meus-agendamentos para clientes com 10, 1.000 e 10.000
+agendamentos: página paginada por cursor vs. a lista completa anterior.
+
+Uso:
+    python benchmarks/bench_meus_agendamentos.py
+"""
+
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from app import app, listar_meus_agendamentos  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+TAMANHOS = (10, 1000, 10000)
+REPETICOES = 50
+
+CONSULTA_ANTIGA = """
+    SELECT a.id, a.data, a.hora, a.status,
+           s.nome AS servico, b.nome AS barbeiro
+    FROM agendamentos a
+    JOIN servicos s ON s.id = a.servico_id
+    LEFT JOIN barbeiros b ON b.id = a.barbeiro_id
+    WHERE a.cliente_id = ?
+    ORDER BY a.data DESC, a.hora DESC
+"""
+
+
+def preparar_banco(caminho):
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+
+    db = sqlite3.connect(caminho)
+    rnd = random.Random(1)
+    hoje = date.today()
+    clientes = {}
+
+    for n in TAMANHOS:
+        cur = db.execute(
+            "INSERT INTO clientes (nome, email, senha_hash) VALUES (?, ?, 'x')",
+            (f"Cliente {n}", f"bench{n}@exemplo.com"),
+        )
+        clientes[n] = cur.lastrowid
+
+        # barbeiro fictício por cliente evita conflito no índice único de horário
+        barbeiro_id = 1000 + n
+
+        linhas = []
+        for i in range(n):
+            dia = hoje - timedelta(days=i // 4 - 5)
+            linhas.append(
+                (
+                    clientes[n],
+                    barbeiro_id,
+                    dia.isoformat(),
+                    f"{8 + i % 4 * 2:02d}:{rnd.choice(('00', '30'))}",
+                    "finalizado" if dia < hoje else "pendente",
+                )
+            )
+
+        db.executemany(
+            """
+            INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+            VALUES (?, ?, 1, ?, ?, ?)
+            """,
+            linhas,
+        )
+
+    db.commit()
+    db.close()
+
+    return clientes
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "bench.db")
+
+    try:
+        clientes = preparar_banco(caminho)
+        app.config["DATABASE"] = caminho
+
+        db = sqlite3.connect(caminho)
+        db.row_factory = sqlite3.Row
+        c = app.test_client()
+
+        print(f"{'agendamentos':>12} | {'consulta antiga (ms)':>20} | "
+              f"{'consultas paginadas (ms)':>24} | {'página inteira (ms)':>19}")
+
+        for n, cliente_id in clientes.items():
+            with c.session_transaction() as s:
+                s["cliente_id"] = cliente_id
+
+            inicio = time.perf_counter()
+            for _ in range(REPETICOES):
+                db.execute(CONSULTA_ANTIGA, (cliente_id,)).fetchall()
+            ms_antigo = (time.perf_counter() - inicio) / REPETICOES * 1000
+
+            inicio = time.perf_counter()
+            for _ in range(REPETICOES):
+                listar_meus_agendamentos(db, cliente_id, "proximos", limite=100)
+                listar_meus_agendamentos(db, cliente_id, "passados")
+            ms_consultas = (time.perf_counter() - inicio) / REPETICOES * 1000
+
+            c.get("/meus-agendamentos")
+            inicio = time.perf_counter()
+            for _ in range(REPETICOES):
+                c.get("/meus-agendamentos")
+            ms_pagina = (time.perf_counter() - inicio) / REPETICOES * 1000
+
+            print(f"{n:>12} | {ms_antigo:>20.2f} | {ms_consultas:>24.2f} | "
+                  f"{ms_pagina:>19.2f}")
+
+        db.close()
+    finally:
+        shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Teste de carga: pool de conexões + WAL vs. conexão nova por request.
+
+Dispara THREADS clientes simultâneos contra o app (test client do Flask),
+com 80% de leituras em /api/agenda e 20% de agendamentos gravados via
+/agendar/revisao, e compara requests/s e latência p50/p99.
+
+Uso:
+    python benchmarks/bench_pool.py
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import db as db_mod  # noqa: E402
+from app import app  # noqa: E402
+from comum import percentil  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+THREADS = 16
+REQUESTS_POR_THREAD = 150
+PROPORCAO_ESCRITA = 0.2
+
+MODOS = {
+    "antigo (conexão por request, journal DELETE)": {
+        "DB_POOL_SIZE": 0,
+        "SQLITE_PRAGMAS": {
+            "journal_mode": "DELETE",
+            "synchronous": "FULL",
+            "busy_timeout": 5000,
+            "mmap_size": 0,
+            "cache_size": -2000,
+        },
+    },
+    "pool + WAL": {},
+}
+
+
+def preparar_banco(pasta):
+    caminho = os.path.join(pasta, "bench.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+
+    import sqlite3
+
+    conn = sqlite3.connect(caminho)
+    conn.execute("DELETE FROM horarios WHERE barbeiro_id = 1")
+    horas = [f"{h:02d}:{m:02d}" for h in range(9, 19) for m in (0, 30)]
+    conn.executemany(
+        "INSERT INTO horarios (barbeiro_id, dia_semana, hora, ativo) VALUES (1, ?, ?, 1)",
+        [(d, h) for d in range(7) for h in horas],
+    )
+    conn.commit()
+    conn.close()
+
+    return caminho, horas
+
+
+def rodar(config, pasta):
+    caminho, horas = preparar_banco(pasta)
+
+    app.config.update(DATABASE=caminho, DB_POOL_SIZE=db_mod.POOL_TAMANHO_PADRAO)
+    app.config.pop("SQLITE_PRAGMAS", None)
+    app.config.update(config)
+    db_mod._pools.clear()
+
+    # journal_mode é persistente no arquivo
+    with app.app_context():
+        db_mod.get_db()
+        db_mod.close_db()
+
+    latencias = []
+    lock = threading.Lock()
+
+    def cliente(n):
+        rnd = random.Random(n)
+        c = app.test_client()
+        with c.session_transaction() as s:
+            s["cliente_id"] = 1
+
+        locais = []
+        for _ in range(REQUESTS_POR_THREAD):
+            inicio = time.perf_counter()
+
+            if rnd.random() < PROPORCAO_ESCRITA:
+                dia = date.today() + timedelta(days=rnd.randint(0, 29))
+                with c.session_transaction() as s:
+                    s["agendamento"] = {
+                        "servico_id": 1,
+                        "barbeiro_id": 1,
+                        "data": dia.isoformat(),
+                        "hora": rnd.choice(horas),
+                    }
+                c.post("/agendar/revisao")
+            else:
+                c.get("/api/agenda/1?dias=30")
+
+            locais.append(time.perf_counter() - inicio)
+
+        with lock:
+            latencias.extend(locais)
+
+    threads = [threading.Thread(target=cliente, args=(i,)) for i in range(THREADS)]
+
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    total = time.perf_counter() - inicio
+
+    for pool in db_mod._pools.values():
+        pool.fechar()
+    db_mod._pools.clear()
+
+    return len(latencias) / total, percentil(latencias, 0.5), percentil(latencias, 0.99)
+
+
+def main():
+    print(f"{THREADS} threads x {REQUESTS_POR_THREAD} requests, "
+          f"{int(PROPORCAO_ESCRITA * 100)}% escrita\n")
+
+    for nome, config in MODOS.items():
+        pasta = tempfile.mkdtemp()
+        try:
+            rps, p50, p99 = rodar(config, pasta)
+        finally:
+            shutil.rmtree(pasta)
+
+        print(f"{nome:<46} {rps:8.1f} req/s   p50 {p50 * 1000:7.2f} ms   "
+              f"p99 {p99 * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
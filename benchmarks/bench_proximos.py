@@ -0,0 +1,112 @@
+"""
+Busca dos primeiros horários livres entre todos os barbeiros, para 5 a
+50 barbeiros numa janela de 90 dias (bancos de gerar_dados.py com a
+agenda 85% ocupada):
+
+    por barbeiro  o que o navegador faria: /api/agenda de cada barbeiro
+                  (90 dias) e junta tudo
+    heap          proximos_livres fora do horizonte materializado: merge
+                  das agendas geradas uma semana por vez
+    slots         proximos_livres com os 90 dias materializados: uma
+                  consulta que para no K-ésimo horário
+
+Uso:
+    python benchmarks/bench_proximos.py
+"""
+
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import catalogo  # noqa: E402
+import slots  # noqa: E402
+from agenda import expandir_agenda, proximos_livres  # noqa: E402
+from gerar_dados import gerar  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+BARBEIROS = (5, 10, 25, 50)
+DIAS = 90
+LIMITES = (5, 20)
+REPETICOES = 30
+DURACAO = 60  # Corte + Barba: o serviço mais difícil de encaixar
+
+
+def mediana_ms(funcao):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def por_barbeiro(db, barbeiros, limite, agora):
+    depois_de = (agora.date().isoformat(), f"{agora.hour:02d}:{agora.minute:02d}")
+    livres = []
+    for b in barbeiros:
+        for dia in expandir_agenda(db, b, agora.date(), DIAS, DURACAO):
+            for slot in dia["slots"]:
+                if slot["disponivel"] and (dia["data"], slot["hora"]) > depois_de:
+                    livres.append((dia["data"], slot["hora"], b))
+    return sorted(livres)[:limite]
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    agora = datetime.now()
+
+    print(
+        f"{'barbeiros':>9} | {'K':>3} | {'por barbeiro (ms)':>17} | "
+        f"{'heap (ms)':>9} | {'slots (ms)':>10}"
+    )
+
+    for n in BARBEIROS:
+        caminho = os.path.join(pasta, f"proximos{n}.db")
+        gerar(caminho, barbeiros=n, clientes=50 * n, anos=0.1, futuro=DIAS, ocupacao=0.85)
+        migrar(caminho)
+
+        db = sqlite3.connect(caminho)
+        db.row_factory = sqlite3.Row
+        # o cache do catálogo é do processo: não pode vir do banco anterior
+        catalogo.invalidar(db)
+        db.commit()
+        barbeiros = [r[0] for r in db.execute("SELECT id FROM barbeiros WHERE ativo = 1")]
+
+        for limite in LIMITES:
+            ingenuo = mediana_ms(lambda: por_barbeiro(db, barbeiros, limite, agora))
+
+            # janela padrão (60 dias) não cobre os 90: caminho do heap
+            slots.HORIZONTE = 60
+            heap = mediana_ms(
+                lambda: proximos_livres(db, DURACAO, date.today(), DIAS, limite, agora)
+            )
+            esperado = proximos_livres(db, DURACAO, date.today(), DIAS, limite, agora)
+
+            slots.HORIZONTE = DIAS
+            slots.cobre(db, date.today(), date.today())
+            materializado = mediana_ms(
+                lambda: proximos_livres(db, DURACAO, date.today(), DIAS, limite, agora)
+            )
+            assert proximos_livres(db, DURACAO, date.today(), DIAS, limite, agora) == esperado
+
+            print(
+                f"{n:>9} | {limite:>3} | {ingenuo:>17.2f} | {heap:>9.2f} | "
+                f"{materializado:>10.3f}"
+            )
+
+        db.close()
+
+    for arquivo in os.listdir(pasta):
+        os.remove(os.path.join(pasta, arquivo))
+    os.rmdir(pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Relatórios do admin (relatorios.py) lendo resumo_diario vs. agregando
+agendamentos × servicos na hora, num banco sintético grande
+(gerar_dados.py, BARBEIROS barbeiros por ANOS anos):
+
+    ao vivo   resumo_diario e resumo_mensal substituídos por TEMP VIEWs
+              com o mesmo formato, que agrupam agendamentos JOIN servicos;
+              as funções de relatorios.py rodam iguais, então os números
+              têm de bater
+    resumo    as tabelas mantidas pelos triggers da m014
+
+Mede também o custo dos triggers na escrita: INSERT e UPDATE de status em
+lote, com e sem os triggers trg_resumo_*.
+
+Uso:
+    python benchmarks/bench_relatorios.py
+"""
+
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import relatorios  # noqa: E402
+from gerar_dados import gerar  # noqa: E402
+
+BARBEIROS = 30
+ANOS = 5
+REPETICOES = 5
+ESCRITAS = 20000
+
+PERIODOS = {"7 dias": 7, "30 dias": 30, "1 ano": 365, "5 anos": 365 * 5}
+
+AO_VIVO = (
+    """
+    CREATE TEMP VIEW resumo_diario AS
+    SELECT
+        a.data, COALESCE(a.barbeiro_id, 0) AS barbeiro_id, a.servico_id,
+        SUM(COALESCE(a.status, 'pendente') = 'pendente') AS pendentes,
+        SUM(a.status = 'confirmado') AS confirmados,
+        SUM(a.status = 'cancelado') AS cancelados,
+        SUM(a.status = 'finalizado') AS finalizados,
+        SUM(CASE WHEN a.status = 'finalizado' THEN COALESCE(s.preco, 0) ELSE 0 END) AS receita,
+        SUM(CASE WHEN COALESCE(a.status, 'pendente') != 'cancelado'
+                 THEN COALESCE(s.duracao_min, 0) ELSE 0 END) AS minutos
+    FROM agendamentos a
+    LEFT JOIN servicos s ON s.id = a.servico_id
+    GROUP BY a.data, COALESCE(a.barbeiro_id, 0), a.servico_id
+    """,
+    """
+    CREATE TEMP VIEW resumo_mensal AS
+    SELECT
+        substr(data, 1, 7) AS mes, barbeiro_id, servico_id,
+        SUM(pendentes) AS pendentes, SUM(confirmados) AS confirmados,
+        SUM(cancelados) AS cancelados, SUM(finalizados) AS finalizados,
+        SUM(receita) AS receita, SUM(minutos) AS minutos
+    FROM temp.resumo_diario
+    GROUP BY 1, 2, 3
+    """,
+)
+
+TRIGGERS_RESUMO = (
+    "trg_resumo_agendamento_insert",
+    "trg_resumo_agendamento_delete",
+    "trg_resumo_agendamento_update",
+)
+
+
+def conectar(banco, ao_vivo):
+    db = sqlite3.connect(banco)
+    db.row_factory = sqlite3.Row
+    if ao_vivo:
+        # a temp view tem precedência sobre a tabela de mesmo nome
+        for view in AO_VIVO:
+            db.execute(view)
+    return db
+
+
+def medir_ms(db, inicio, fim):
+    tempos = []
+    for _ in range(REPETICOES):
+        relogio = time.perf_counter()
+        resultado = relatorios.relatorio(db, inicio, fim)
+        tempos.append((time.perf_counter() - relogio) * 1000)
+    return statistics.median(tempos), resultado
+
+
+def escrita_ms(banco, com_triggers):
+    """INSERT de ESCRITAS agendamentos e UPDATE de status de todos eles."""
+    copia = banco + (".com" if com_triggers else ".sem")
+    shutil.copy(banco, copia)
+    db = sqlite3.connect(copia)
+    if not com_triggers:
+        for nome in TRIGGERS_RESUMO:
+            db.execute(f"DROP TRIGGER {nome}")
+        db.commit()
+
+    base = date.today() + timedelta(days=400)  # fora da agenda gerada
+    linhas = [
+        (
+            1,
+            1 + i % BARBEIROS,
+            1 + i % 5,
+            (base + timedelta(days=i // 500)).isoformat(),
+            f"{i % 500:05d}",
+            "pendente",
+        )
+        for i in range(ESCRITAS)
+    ]
+
+    relogio = time.perf_counter()
+    db.executemany(
+        """
+        INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        linhas,
+    )
+    db.commit()
+    insercao = (time.perf_counter() - relogio) * 1000
+
+    relogio = time.perf_counter()
+    db.execute(
+        "UPDATE agendamentos SET status = 'confirmado' WHERE data >= ?", (base.isoformat(),)
+    )
+    db.commit()
+    atualizacao = (time.perf_counter() - relogio) * 1000
+
+    db.close()
+    os.remove(copia)
+    return insercao, atualizacao
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, "relatorios.db")
+    contagens = gerar(banco, barbeiros=BARBEIROS, anos=ANOS)
+
+    vivo = conectar(banco, ao_vivo=True)
+    resumo = conectar(banco, ao_vivo=False)
+    diario, mensal = (
+        resumo.execute(f"SELECT COUNT(*) FROM {tabela}").fetchone()[0]
+        for tabela in ("resumo_diario", "resumo_mensal")
+    )
+    print(
+        f"{contagens['agendamentos']} agendamentos, {diario} linhas em resumo_diario, "
+        f"{mensal} em resumo_mensal\n"
+    )
+
+    print(f"{'período':<8} | {'ao vivo (ms)':>12} | {'resumo (ms)':>11} | {'ganho':>6}")
+    hoje = date.today()
+    for nome, dias in PERIODOS.items():
+        inicio, fim = hoje - timedelta(days=dias - 1), hoje
+        ms_vivo, esperado = medir_ms(vivo, inicio, fim)
+        ms_resumo, obtido = medir_ms(resumo, inicio, fim)
+        assert obtido == esperado, f"{nome}: resumo_diario diverge da agregação ao vivo"
+        print(f"{nome:<8} | {ms_vivo:>12.1f} | {ms_resumo:>11.2f} | {ms_vivo / ms_resumo:>5.0f}x")
+
+    vivo.close()
+    resumo.close()
+
+    print(f"\n{ESCRITAS} agendamentos   | {'INSERT (ms)':>11} | {'UPDATE status (ms)':>18}")
+    for com in (False, True):
+        insercao, atualizacao = escrita_ms(banco, com)
+        rotulo = "com triggers" if com else "sem triggers"
+        print(f"{rotulo:<21} | {insercao:>11.0f} | {atualizacao:>18.0f}")
+
+    shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Leva de logins contra o gunicorn (gthread, 2 workers) enquanto outros
+clientes consultam /api/agenda: logins/s e latência da agenda com o
+hash sem limite (como antes de senhas.py) e com o pool de threads
+limitado.
+
+    sem logins   só a agenda (referência)
+    inline       SENHA_CONCORRENCIA=64, SENHA_FILA=0 (sem limite prático)
+    pool         padrão de senhas.py (2 hashes e 2 na fila por worker;
+                 o resto recebe 503)
+
+Uso:
+    python benchmarks/bench_senhas.py
+"""
+
+import http.client
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+from werkzeug.security import generate_password_hash
+
+import comum
+from comum import cookie_sessao, percentil, porta_livre
+
+CENARIOS = {
+    "sem logins": ({}, 0),
+    "inline": ({"SENHA_CONCORRENCIA": "64", "SENHA_FILA": "0"}, 16),
+    "pool": ({}, 16),
+}
+CLIENTES_AGENDA = 4
+DURACAO = 10
+EMAIL = "bench-senhas@exemplo.com"
+SENHA = "senha-bench"
+
+
+def preparar_copia():
+    destino = comum.preparar_copia()
+
+    db = sqlite3.connect(os.path.join(destino, "database.db"))
+    db.execute(
+        "INSERT INTO clientes (nome, email, senha_hash) VALUES ('Bench', ?, ?)",
+        (EMAIL, generate_password_hash(SENHA)),
+    )
+    db.commit()
+    db.close()
+    return destino
+
+
+def iniciar(pasta, porta, env_extra):
+    env = {
+        **os.environ,
+        **env_extra,
+        "WEB_CONCURRENCY": "2",
+        "BIND": f"127.0.0.1:{porta}",
+        "METRICAS": "0",
+    }
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=pasta,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.1).close()
+            return processo
+        except OSError:
+            time.sleep(0.1)
+
+    processo.kill()
+    raise RuntimeError("gunicorn não subiu")
+
+
+# -----------------------------
+# CLIENTES
+# -----------------------------
+def logins(porta, fim, resultados):
+    corpo = urlencode({"email": EMAIL, "senha": SENHA})
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    while time.perf_counter() < fim:
+        con = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+        try:
+            con.request("POST", "/login", corpo, headers)
+            resposta = con.getresponse()
+            resultados.append(resposta.status)
+            # como um navegador que respeita o Retry-After do 503
+            if resposta.status == 503:
+                time.sleep(float(resposta.getheader("Retry-After", 1)))
+        except OSError:
+            resultados.append(None)
+        finally:
+            con.close()
+
+
+def agenda(porta, cookie, fim, latencias):
+    con = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+    # sem If-None-Match: cada request monta a agenda
+    headers = {"Cookie": cookie}
+
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        con.request("GET", "/api/agenda/1?dias=14", headers=headers)
+        con.getresponse().read()
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        time.sleep(0.02)
+
+    con.close()
+
+
+def rodar(porta, cookie, n_logins):
+    fim = time.perf_counter() + DURACAO
+    status, latencias = [], []
+
+    threads = [
+        threading.Thread(target=logins, args=(porta, fim, status)) for _ in range(n_logins)
+    ] + [
+        threading.Thread(target=agenda, args=(porta, cookie, fim, latencias))
+        for _ in range(CLIENTES_AGENDA)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    return status, sorted(latencias)
+
+
+def main():
+    pasta = preparar_copia()
+    cookie = cookie_sessao(pasta)
+
+    print(
+        f"{'cenário':<11} | {'logins/s':>8} | {'503':>4} | "
+        f"{'agenda p50':>10} | {'agenda p95':>10} | {'agenda p99':>10}"
+    )
+
+    try:
+        for nome, (env_extra, n_logins) in CENARIOS.items():
+            porta = porta_livre()
+            servidor = iniciar(pasta, porta, env_extra)
+
+            try:
+                # aquece: pool de processos e conexões sobem antes da medição
+                rodar_aquecimento = threading.Thread(
+                    target=logins, args=(porta, time.perf_counter() + 1, [])
+                )
+                rodar_aquecimento.start()
+                rodar_aquecimento.join()
+
+                status, latencias = rodar(porta, cookie, n_logins)
+                ok = sum(1 for s in status if s == 302)
+                ocupados = sum(1 for s in status if s == 503)
+
+                print(
+                    f"{nome:<11} | {ok / DURACAO:>8.1f} | {ocupados:>4} | "
+                    f"{statistics.median(latencias):>10.1f} | {percentil(latencias, 0.95):>10.1f} | "
+                    f"{percentil(latencias, 0.99):>10.1f}"
+                )
+            finally:
+                servidor.send_signal(signal.SIGTERM)
+                servidor.wait(10)
+    finally:
+        shutil.rmtree(os.path.dirname(pasta))
+
+    print("(latências em ms)")
+
+
+if __name__ == "__main__":
+    main()
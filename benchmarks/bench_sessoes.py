@@ -0,0 +1,174 @@
+"""
+Sessão no cookie assinado (padrão do Flask) vs. no servidor (sessoes.py),
+num banco sintético (gerar_dados.py):
+
+    custo     abrir + salvar a sessão de um request no meio do funil, só
+              leitura e com escrita (o que muda a cada etapa), em µs
+    funil     carga.sessao_cliente pelo test client: bytes de Cookie
+              enviados e de Set-Cookie recebidos por request
+
+"sem LRU" é o caso de um request que cai num worker que ainda não viu a
+sessão: sempre lê do armazém.
+
+Uso:
+    python benchmarks/bench_sessoes.py
+"""
+
+import logging
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from flask import request  # noqa: E402
+from flask.sessions import SecureCookieSessionInterface  # noqa: E402
+
+import catalogo  # noqa: E402
+import sessoes  # noqa: E402
+from carga import Coletor, NavegadorFlask, ler_dados, sessao_cliente  # noqa: E402
+from gerar_dados import gerar  # noqa: E402
+
+REPETICOES = 3000
+FUNIS = 40
+
+SESSAO = {
+    "cliente_id": 1234,
+    "cliente_nome": "Cliente 1234",
+    "role": "cliente",
+    "agendamento": {
+        "servico_id": "3",
+        "barbeiro_id": "2",
+        "data": "2026-10-20",
+        "hora": "10:30",
+    },
+    "agendamento_sucesso": {
+        "servico": "Corte + Barba",
+        "barbeiro": "Barbeiro 2",
+        "data": "20/10/2026",
+        "hora": "10:30",
+        "preco": 60.0,
+    },
+}
+
+
+def interfaces(app, pasta):
+    app.config["SESSAO_PASTA"] = os.path.join(pasta, "sessoes")
+    sqlite = sessoes.ArmazemSQLite(app)
+    arquivos = sessoes.ArmazemArquivos(app)
+
+    return {
+        "cookie": SecureCookieSessionInterface(),
+        "sqlite": sessoes.InterfaceSessoes(sqlite, sessoes.LRU),
+        "sqlite sem LRU": sessoes.InterfaceSessoes(sqlite, 0),
+        "arquivos": sessoes.InterfaceSessoes(arquivos, sessoes.LRU),
+        "arquivos sem LRU": sessoes.InterfaceSessoes(arquivos, 0),
+    }
+
+
+def custo_us(app, interface, escrita):
+    """Mediana de abrir + (alterar) + salvar a sessão, descontado o contexto vazio."""
+    app.session_interface = interface
+    valor = sessoes.criar(app, SESSAO)
+    nome = app.config["SESSION_COOKIE_NAME"]
+
+    tempos, vazios = [], []
+    for i in range(REPETICOES):
+        with app.test_request_context(headers={"Cookie": f"{nome}={valor}"}):
+            resposta = app.response_class()
+            inicio = time.perf_counter()
+            sessao = interface.open_session(app, request)
+            if escrita:
+                sessao["agendamento"]["hora"] = f"{8 + i % 10:02d}:00"
+                sessao.modified = True
+            interface.save_session(app, sessao, resposta)
+            tempos.append(time.perf_counter() - inicio)
+
+            cookie = resposta.headers.get("Set-Cookie")
+            if cookie:
+                valor = cookie.split(";")[0].partition("=")[2]
+
+        with app.test_request_context(headers={"Cookie": f"{nome}={valor}"}):
+            inicio = time.perf_counter()
+            vazios.append(time.perf_counter() - inicio)
+
+    return (statistics.median(tempos) - statistics.median(vazios)) * 1e6
+
+
+class NavegadorMedido(NavegadorFlask):
+    """Conta os bytes do cookie da sessão em cada direção."""
+
+    def __init__(self, app, totais):
+        super().__init__(app)
+        self.totais = totais
+
+    def pedir(self, metodo, url, dados=None):
+        cookie = self.cliente.get_cookie("session")
+        resposta = self.cliente.open(url, method=metodo, data=dados)
+
+        self.totais["requests"] += 1
+        self.totais["cookie"] += len(f"session={cookie.value}") if cookie else 0
+        self.totais["set_cookie"] += sum(
+            len(c) for c in resposta.headers.getlist("Set-Cookie")
+        )
+        return resposta.status_code, resposta.get_data()
+
+
+def funil(app, interface, dados):
+    app.session_interface = interface
+    totais = {"requests": 0, "cookie": 0, "set_cookie": 0}
+    coletor = Coletor()
+    rnd = random.Random(1)
+
+    for _ in range(FUNIS):
+        sessao_cliente(
+            NavegadorMedido(app, totais),
+            coletor,
+            rnd,
+            rnd.choice(dados["emails"]),
+            dados["servicos"],
+            dados["barbeiros"],
+        )
+
+    return totais["cookie"] / totais["requests"], totais["set_cookie"] / totais["requests"]
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, "sessoes.db")
+    gerar(banco, barbeiros=4, clientes=200, anos=0.2)
+    dados = ler_dados(banco)
+
+    from app import app
+
+    logging.getLogger("metricas").setLevel(logging.WARNING)
+    app.config["DATABASE"] = banco
+    with app.app_context():
+        from db import get_db
+
+        catalogo.invalidar(get_db())
+        get_db().commit()
+
+    print(
+        f"{'sessão':<16} | {'leitura (µs)':>12} | {'escrita (µs)':>12} | "
+        f"{'Cookie (B/req)':>14} | {'Set-Cookie (B/req)':>18}"
+    )
+    for nome, interface in interfaces(app, pasta).items():
+        leitura = custo_us(app, interface, escrita=False)
+        escrita = custo_us(app, interface, escrita=True)
+        enviado, recebido = funil(app, interface, dados)
+        print(
+            f"{nome:<16} | {leitura:>12.1f} | {escrita:>12.1f} | "
+            f"{enviado:>14.0f} | {recebido:>18.0f}"
+        )
+
+    shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
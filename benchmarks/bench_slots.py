@@ -0,0 +1,101 @@
+"""
+Disponibilidade lida da tabela `slots` materializada vs. expandida na
+hora (modelo semanal + agendamentos), num banco sintético de 2 anos
+(gerar_dados.py), para 7, 14 e 60 dias. Também mede o custo que os
+triggers somam a cada reserva e o tempo de gerar a janela inteira.
+
+Uso:
+    python benchmarks/bench_slots.py
+"""
+
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import slots  # noqa: E402
+from agenda import agenda_materializada, expandir_agenda  # noqa: E402
+from gerar_dados import gerar  # noqa: E402
+
+DIAS = (7, 14, 60)
+REPETICOES = 200
+RESERVAS = 300
+
+
+def medir(funcao, *args):
+    tempos = []
+    for _ in range(REPETICOES):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def reservas(db, barbeiros, hoje):
+    """Insere e cancela RESERVAS agendamentos; retorna ms por escrita."""
+    inicio = time.perf_counter()
+    for i in range(RESERVAS):
+        cur = db.execute(
+            """
+            INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+            VALUES (1, ?, 1, ?, '07:00', 'pendente')
+            """,
+            (barbeiros[i % len(barbeiros)], (hoje + timedelta(days=i % 59 + 1)).isoformat()),
+        )
+        db.commit()
+        db.execute("UPDATE agendamentos SET status = 'cancelado' WHERE id = ?", (cur.lastrowid,))
+        db.commit()
+    return (time.perf_counter() - inicio) * 1000 / (RESERVAS * 2)
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "slots.db")
+    resumo = gerar(caminho)
+    print(f"{resumo['agendamentos']} agendamentos, {resumo['barbeiros']} barbeiros")
+
+    db = sqlite3.connect(caminho)
+    db.row_factory = sqlite3.Row
+    hoje = date.today()
+    barbeiros = [r[0] for r in db.execute("SELECT id FROM barbeiros")]
+
+    escrita_sem = reservas(db, barbeiros, hoje)
+
+    inicio = time.perf_counter()
+    slots.estender(db, do_zero=True)
+    geracao = (time.perf_counter() - inicio) * 1000
+    total = db.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+    print(f"janela de {slots.HORIZONTE} dias: {total} slots gerados em {geracao:.0f} ms")
+
+    escrita_com = reservas(db, barbeiros, hoje)
+
+    print(f"\n{'dias':>4} | {'expandida (ms)':>14} | {'slots (ms)':>10} | {'ganho':>6}")
+    for dias in DIAS:
+        antes = statistics.mean(
+            medir(expandir_agenda, db, b, hoje, dias, 30) for b in barbeiros
+        )
+        depois = statistics.mean(
+            medir(agenda_materializada, db, b, hoje, dias, 30) for b in barbeiros
+        )
+        print(f"{dias:>4} | {antes:>14.3f} | {depois:>10.3f} | {antes / depois:>5.1f}x")
+
+    print(
+        f"\nescrita (reserva ou cancelamento + commit): {escrita_sem:.3f} ms sem slots, "
+        f"{escrita_com:.3f} ms com os triggers de slots"
+    )
+
+    db.close()
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+    os.rmdir(pasta)
+
+
+if __name__ == "__main__":
+    main()
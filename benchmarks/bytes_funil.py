@@ -0,0 +1,105 @@
+"""
+Bytes transferidos por página do funil, com os arquivos originais em
+/static/ e com o build de assets.py (/assets/, comprimido e immutable).
+
+Conta o HTML, as folhas de estilo, os scripts e as imagens referenciadas
+via url() no CSS (limite superior: o navegador só baixa as imagens de
+regras que casam com a página). Na segunda visita, o que está em /static/
+é revalidado (um request por arquivo); o que está em /assets/ sai do
+cache sem request.
+
+Uso:
+    python benchmarks/bytes_funil.py
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import assets  # noqa: E402
+from app import app  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+PAGINAS = [
+    "/",
+    "/login",
+    "/agendar/servico",
+    "/agendar/barbeiro",
+    "/agendar/data",
+    "/agendar/revisao",
+]
+
+RE_HTML = re.compile(r'<(?:link rel="stylesheet" href|script src)="(/[^"]+)"')
+RE_CSS = re.compile(r'url\("?(/[^")]+)"?\)')
+
+
+def _baixar(c, url):
+    r = c.get(url, headers={"Accept-Encoding": "gzip, br"})
+    corpo = r.get_data()
+    return r, len(corpo)
+
+
+def medir(manifest):
+    app.extensions["assets_manifest"] = manifest
+    c = app.test_client()
+
+    with c.session_transaction() as s:
+        s["cliente_id"] = 1
+        s["agendamento"] = {
+            "servico_id": 1,
+            "barbeiro_id": 1,
+            "data": "2099-01-05",
+            "hora": "10:00",
+        }
+
+    resultados = {}
+    for pagina in PAGINAS:
+        r, total = _baixar(c, pagina)
+        html = r.get_data(as_text=True)
+
+        recursos = set(RE_HTML.findall(html))
+        for css in [u for u in recursos if u.endswith(".css")]:
+            # sem Accept-Encoding: vem o CSS em texto para achar as url()
+            corpo = c.get(css).get_data(as_text=True)
+            recursos.update(RE_CSS.findall(corpo))
+
+        revalidacoes = 0
+        for url in recursos:
+            resposta, tamanho = _baixar(c, url)
+            total += tamanho
+            if "immutable" not in resposta.headers.get("Cache-Control", ""):
+                revalidacoes += 1
+
+        resultados[pagina] = (total, len(recursos), revalidacoes)
+
+    return resultados
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "bench.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+    app.config["DATABASE"] = caminho
+
+    try:
+        antes = medir({})
+        depois = medir(assets.build(RAIZ))
+    finally:
+        shutil.rmtree(pasta)
+
+    print(f"{'página':<20} | {'antes (KB)':>10} | {'depois (KB)':>11} | "
+          f"{'req. 2ª visita antes':>20} | {'depois':>6}")
+    for pagina in PAGINAS:
+        a, d = antes[pagina], depois[pagina]
+        print(f"{pagina:<20} | {a[0] / 1024:>10.1f} | {d[0] / 1024:>11.1f} | "
+              f"{a[2]:>20} | {d[2]:>6}")
+
+
+if __name__ == "__main__":
+    main()
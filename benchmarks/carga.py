@@ -0,0 +1,454 @@
+"""
+Teste de carga do funil de agendamento e das páginas do admin sobre um
+banco sintético (gerar_dados.py).
+
+Cada usuário virtual repete sessões completas: login → /agendar/servico
+→ /agendar/barbeiro → /agendar/data → /api/agenda → /agendar/revisao
+(parte delas reserva de fato) → /meus-agendamentos → logout. Uma em cada
+ADMIN_A_CADA sessões é de admin (painel, listas, horários, catálogo).
+
+Modos:
+    cliente   app.test_client() no próprio processo (custo da aplicação)
+    gunicorn  servidor real (gunicorn.conf.py) numa cópia do projeto,
+              com HTTP keep-alive
+
+Mostra requests/s e p50/p95/p99 por rota e grava o resultado em
+benchmarks/resultados/ para comparar com execuções anteriores.
+
+Uso:
+    python benchmarks/carga.py [--modo cliente|gunicorn] [--duracao 20]
+        [--usuarios N] [--banco dados.db | --barbeiros 8 --clientes 2000 --anos 2]
+        [--servidor sync|async] [--workers 2] [--rotulo nome]
+        [--comparar benchmarks/resultados/anterior.json]
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from urllib.parse import urlencode
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from comum import percentil, porta_livre, preparar_copia  # noqa: E402
+from gerar_dados import EMAIL_ADMIN, SENHA, gerar  # noqa: E402
+
+RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+CHANCE_RESERVA = 0.3
+ADMIN_A_CADA = 10
+DIAS_AGENDA = 14
+
+PAGINAS_ADMIN = [
+    "/admin/",
+    "/admin/agendamentos",
+    "/admin/api/agendamentos/historico",
+    "/admin/horarios",
+    "/admin/servicos",
+    "/admin/barbeiros",
+]
+
+
+# -----------------------------
+# NAVEGADORES
+# -----------------------------
+class NavegadorFlask:
+    """Requests pelo test client, sem seguir redirecionamentos."""
+
+    def __init__(self, app):
+        self.cliente = app.test_client()
+
+    def pedir(self, metodo, url, dados=None):
+        resposta = self.cliente.open(url, method=metodo, data=dados)
+        return resposta.status_code, resposta.get_data()
+
+    def fechar(self):
+        pass
+
+
+class NavegadorHttp:
+    """HTTP/1.1 keep-alive com os cookies da sessão."""
+
+    def __init__(self, porta):
+        self.porta = porta
+        self.conexao = None
+        self.cookies = {}
+
+    def pedir(self, metodo, url, dados=None):
+        headers = {}
+        corpo = None
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{k}={v}" for k, v in self.cookies.items())
+        if dados is not None:
+            corpo = urlencode(dados)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+
+        for tentativa in (1, 2):
+            if self.conexao is None:
+                self.conexao = http.client.HTTPConnection("127.0.0.1", self.porta, timeout=30)
+            try:
+                self.conexao.request(metodo, url, corpo, headers)
+                resposta = self.conexao.getresponse()
+                conteudo = resposta.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # keep-alive encerrado pelo servidor: reconecta uma vez
+                self.fechar()
+                if tentativa == 2:
+                    raise
+
+        for cabecalho in resposta.headers.get_all("Set-Cookie") or []:
+            nome, _, valor = cabecalho.split(";")[0].partition("=")
+            if valor and "expires=thu, 01 jan 1970" not in cabecalho.lower():
+                self.cookies[nome] = valor
+            else:
+                self.cookies.pop(nome, None)
+
+        return resposta.status, conteudo
+
+    def fechar(self):
+        if self.conexao is not None:
+            self.conexao.close()
+            self.conexao = None
+
+
+# -----------------------------
+# COLETA
+# -----------------------------
+class Coletor:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencias = {}
+        self.erros = {}
+
+    @staticmethod
+    def rota(metodo, url):
+        caminho = re.sub(r"/\d+", "/<id>", url.split("?")[0])
+        return f"{metodo} {caminho}"
+
+    def medir(self, navegador, metodo, url, dados=None, esperado=(200, 302)):
+        rota = self.rota(metodo, url)
+        inicio = time.perf_counter()
+        try:
+            status, corpo = navegador.pedir(metodo, url, dados)
+        except (http.client.HTTPException, OSError):
+            status, corpo = None, b""
+        segundos = time.perf_counter() - inicio
+
+        with self.lock:
+            self.latencias.setdefault(rota, []).append(segundos)
+            if status not in esperado:
+                self.erros[rota] = self.erros.get(rota, 0) + 1
+
+        return status, corpo
+
+
+def resumir(coletor, duracao):
+    rotas = {}
+    for rota, valores in sorted(coletor.latencias.items()):
+        valores = sorted(valores)
+        rotas[rota] = {
+            "requests": len(valores),
+            "req_s": round(len(valores) / duracao, 1),
+            "p50": round(percentil(valores, 0.50) * 1000, 2),
+            "p95": round(percentil(valores, 0.95) * 1000, 2),
+            "p99": round(percentil(valores, 0.99) * 1000, 2),
+            "max": round(valores[-1] * 1000, 2),
+            "erros": coletor.erros.get(rota, 0),
+        }
+
+    total = sum(r["requests"] for r in rotas.values())
+    return {
+        "requests": total,
+        "req_s": round(total / duracao, 1),
+        "erros": sum(r["erros"] for r in rotas.values()),
+        "rotas": rotas,
+    }
+
+
+# -----------------------------
+# CENÁRIOS
+# -----------------------------
+def sessao_cliente(nav, coletor, rnd, email, servicos, barbeiros):
+    medir = coletor.medir
+
+    medir(nav, "GET", "/login")
+    medir(nav, "POST", "/login", {"email": email, "senha": SENHA}, esperado=(302,))
+    medir(nav, "GET", "/")
+
+    servico_id = rnd.choice(servicos)
+    barbeiro_id = rnd.choice(barbeiros)
+
+    medir(nav, "GET", "/agendar/servico")
+    medir(nav, "POST", "/agendar/servico", {"servico_id": servico_id}, esperado=(302,))
+    medir(nav, "GET", "/agendar/barbeiro")
+    medir(nav, "POST", "/agendar/barbeiro", {"barbeiro_id": barbeiro_id}, esperado=(302,))
+    medir(nav, "GET", "/agendar/data")
+
+    status, corpo = medir(
+        nav,
+        "GET",
+        f"/api/agenda/{barbeiro_id}?dias={DIAS_AGENDA}&servico_id={servico_id}",
+    )
+    hoje = date.today().isoformat()
+    livres = []
+    if status == 200:
+        livres = [
+            (dia["data"], slot["hora"])
+            for dia in json.loads(corpo)
+            if dia["data"] > hoje
+            for slot in dia["slots"]
+            if slot["disponivel"]
+        ]
+
+    if livres:
+        data, hora = rnd.choice(livres)
+        medir(nav, "POST", "/agendar/data", {"data": data, "hora": hora}, esperado=(302,))
+        medir(nav, "GET", "/agendar/revisao")
+
+        if rnd.random() < CHANCE_RESERVA:
+            medir(nav, "POST", "/agendar/revisao", {}, esperado=(302,))
+            medir(nav, "GET", "/agendar/sucesso")
+
+    medir(nav, "GET", "/meus-agendamentos")
+    medir(nav, "GET", "/logout", esperado=(302,))
+
+
+def sessao_admin(nav, coletor, rnd):
+    coletor.medir(nav, "POST", "/login", {"email": EMAIL_ADMIN, "senha": SENHA}, esperado=(302,))
+    for url in PAGINAS_ADMIN:
+        coletor.medir(nav, "GET", url)
+    coletor.medir(nav, "GET", "/logout", esperado=(302,))
+
+
+def usuario(novo_navegador, coletor, semente, fim, dados):
+    rnd = random.Random(semente)
+    n = 0
+
+    while time.perf_counter() < fim:
+        nav = novo_navegador()
+        try:
+            if n % ADMIN_A_CADA == ADMIN_A_CADA - 1:
+                sessao_admin(nav, coletor, rnd)
+            else:
+                sessao_cliente(
+                    nav,
+                    coletor,
+                    rnd,
+                    rnd.choice(dados["emails"]),
+                    dados["servicos"],
+                    dados["barbeiros"],
+                )
+        finally:
+            nav.fechar()
+        n += 1
+
+
+def rodar(novo_navegador, usuarios, duracao, dados):
+    coletor = Coletor()
+    inicio = time.perf_counter()
+    fim = inicio + duracao
+
+    threads = [
+        threading.Thread(target=usuario, args=(novo_navegador, coletor, i, fim, dados))
+        for i in range(usuarios)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # a última sessão de cada usuário termina depois do prazo
+    return resumir(coletor, time.perf_counter() - inicio)
+
+
+# -----------------------------
+# PREPARAÇÃO
+# -----------------------------
+def ler_dados(caminho):
+    db = sqlite3.connect(caminho)
+    try:
+        return {
+            "emails": [r[0] for r in db.execute("SELECT email FROM clientes WHERE role = 'cliente'")],
+            "servicos": [r[0] for r in db.execute("SELECT id FROM servicos WHERE ativo = 1")],
+            "barbeiros": [r[0] for r in db.execute("SELECT id FROM barbeiros WHERE ativo = 1")],
+            "agendamentos": db.execute("SELECT COUNT(*) FROM agendamentos").fetchone()[0],
+        }
+    finally:
+        db.close()
+
+
+def iniciar_gunicorn(banco, servidor, workers):
+    pasta = preparar_copia("database.db*")
+    shutil.copy(banco, os.path.join(pasta, "database.db"))
+
+    porta = porta_livre()
+    env = {
+        **os.environ,
+        "SERVIDOR": servidor,
+        "WEB_CONCURRENCY": str(workers),
+        "BIND": f"127.0.0.1:{porta}",
+    }
+    alvo = "asgi:aplicacao" if servidor == "async" else "app:app"
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", alvo],
+        cwd=pasta,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", porta), timeout=0.1).close()
+            return processo, porta, pasta
+        except OSError:
+            time.sleep(0.1)
+
+    processo.kill()
+    raise RuntimeError("gunicorn não subiu")
+
+
+def commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=RAIZ,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        return None
+
+
+# -----------------------------
+# RELATÓRIO
+# -----------------------------
+def imprimir(resultado, anterior=None):
+    rotas_antes = anterior["rotas"] if anterior else {}
+
+    print(
+        f"{'rota':<38} | {'req':>6} | {'req/s':>7} | {'p50':>7} | {'p95':>7} | "
+        f"{'p99':>7} | {'erros':>5}" + (" | p95 antes" if anterior else "")
+    )
+    for rota, r in resultado["rotas"].items():
+        linha = (
+            f"{rota:<38} | {r['requests']:>6} | {r['req_s']:>7.1f} | {r['p50']:>7.1f} | "
+            f"{r['p95']:>7.1f} | {r['p99']:>7.1f} | {r['erros']:>5}"
+        )
+        if rota in rotas_antes:
+            antes = rotas_antes[rota]["p95"]
+            variacao = (r["p95"] / antes - 1) * 100 if antes else 0
+            linha += f" | {antes:>7.1f} ({variacao:+.0f}%)"
+        print(linha)
+
+    print(
+        f"total: {resultado['requests']} requests, {resultado['req_s']:.1f} req/s, "
+        f"{resultado['erros']} erros (tempos em ms)"
+    )
+    if anterior:
+        print(
+            f"antes: {anterior['req_s']:.1f} req/s "
+            f"({anterior['modo']}, {anterior['data']}, {anterior['commit']})"
+        )
+
+
+def salvar(resultado, rotulo):
+    os.makedirs(RESULTADOS, exist_ok=True)
+    nome = datetime.now().strftime("%Y%m%d-%H%M%S") + f"-{rotulo}.json"
+    caminho = os.path.join(RESULTADOS, nome)
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    return caminho
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--modo", choices=("cliente", "gunicorn"), default="cliente")
+    parser.add_argument("--duracao", type=float, default=20, help="segundos")
+    parser.add_argument("--usuarios", type=int, help="padrão: 1 (cliente) ou 16 (gunicorn)")
+    parser.add_argument("--banco", help="banco já gerado (não é alterado)")
+    parser.add_argument("--barbeiros", type=int, default=8)
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--anos", type=float, default=2)
+    parser.add_argument("--servidor", choices=("sync", "async"), default="sync")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--rotulo", help="sufixo do arquivo de resultado")
+    parser.add_argument("--comparar", help="resultado anterior (.json)")
+    args = parser.parse_args()
+
+    usuarios = args.usuarios or (1 if args.modo == "cliente" else 16)
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, "carga.db")
+
+    # as reservas da carga alteram o banco: sempre numa cópia
+    if args.banco:
+        shutil.copy(args.banco, banco)
+        parametros = {"banco": os.path.abspath(args.banco)}
+    else:
+        parametros = gerar(banco, args.barbeiros, args.clientes, args.anos)
+
+    dados = ler_dados(banco)
+    parametros["agendamentos"] = dados["agendamentos"]
+    print(
+        f"{len(dados['barbeiros'])} barbeiros, {len(dados['emails'])} clientes, "
+        f"{dados['agendamentos']} agendamentos; {args.modo}, {usuarios} usuário(s), "
+        f"{args.duracao:.0f}s"
+    )
+
+    processo = None
+    try:
+        if args.modo == "cliente":
+            from app import app
+
+            # uma linha de log por request só atrapalharia a leitura
+            logging.getLogger("metricas").setLevel(logging.WARNING)
+            app.config["DATABASE"] = banco
+            resultado = rodar(lambda: NavegadorFlask(app), usuarios, args.duracao, dados)
+        else:
+            processo, porta, copia = iniciar_gunicorn(banco, args.servidor, args.workers)
+            resultado = rodar(lambda: NavegadorHttp(porta), usuarios, args.duracao, dados)
+    finally:
+        if processo is not None:
+            processo.send_signal(signal.SIGTERM)
+            processo.wait(10)
+            shutil.rmtree(os.path.dirname(copia))
+        shutil.rmtree(pasta)
+
+    resultado = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit_atual(),
+        "modo": args.modo,
+        "servidor": args.servidor if args.modo == "gunicorn" else None,
+        "workers": args.workers if args.modo == "gunicorn" else None,
+        "usuarios": usuarios,
+        "duracao": args.duracao,
+        "dados": parametros,
+        **resultado,
+    }
+
+    anterior = None
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            anterior = json.load(f)
+
+    imprimir(resultado, anterior)
+    print(f"resultado: {salvar(resultado, args.rotulo or args.modo)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Carga no SSE de disponibilidade: centenas de ouvintes conectados ao
+mesmo tempo em /api/agenda/<id>/eventos e reservas/cancelamentos vindos
+do próprio processo e de "outro worker" (conexão sqlite separada).
+
+Mede a latência entre o commit e a chegada do evento em cada ouvinte,
+quantos eventos foram entregues e quantas consultas o barramento fez.
+
+Uso:
+    python benchmarks/carga_sse.py [ouvintes]
+"""
+
+import http.client
+import logging
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import eventos  # noqa: E402
+from agenda import reservar_horario  # noqa: E402
+from app import app  # noqa: E402
+from comum import cookie_sessao, percentil  # noqa: E402
+from db import get_db  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+OUVINTES = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+EVENTOS = 20
+
+recebidos = []  # (id do evento, instante)
+_lock = threading.Lock()
+
+
+def ouvir(porta, barbeiro_id, cookie, prontos):
+    con = http.client.HTTPConnection("127.0.0.1", porta, timeout=60)
+    con.request("GET", f"/api/agenda/{barbeiro_id}/eventos", headers={"Cookie": cookie})
+    resposta = con.getresponse()
+    prontos.release()
+
+    try:
+        while True:
+            linha = resposta.fp.readline()
+            if not linha:
+                break
+            if linha.startswith(b"id: "):
+                with _lock:
+                    recebidos.append((int(linha[4:]), time.perf_counter()))
+    except OSError:
+        pass
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "bench.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+
+    app.config["DATABASE"] = caminho
+    app.config["SSE_KEEPALIVE"] = 2
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    servidor = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    porta = servidor.server_port
+
+    externo = sqlite3.connect(caminho)
+    barbeiros = [r[0] for r in externo.execute("SELECT id FROM barbeiros WHERE ativo = 1")]
+    servico_id = externo.execute("SELECT id FROM servicos WHERE ativo = 1").fetchone()[0]
+
+    cookie = cookie_sessao()
+    prontos = threading.Semaphore(0)
+    por_barbeiro = {b: 0 for b in barbeiros}
+
+    for i in range(OUVINTES):
+        barbeiro_id = barbeiros[i % len(barbeiros)]
+        por_barbeiro[barbeiro_id] += 1
+        threading.Thread(
+            target=ouvir, args=(porta, barbeiro_id, cookie, prontos), daemon=True
+        ).start()
+
+    for _ in range(OUVINTES):
+        prontos.acquire()
+
+    barramento = eventos.barramento(caminho)
+    while barramento.total_ouvintes() < OUVINTES:
+        time.sleep(0.05)
+
+    print(f"{OUVINTES} ouvintes conectados")
+
+    enviados = {}  # id do evento -> (instante do commit, ouvintes esperados, origem)
+    dia = date.today() + timedelta(days=400)
+
+    for i in range(EVENTOS):
+        barbeiro_id = barbeiros[i % len(barbeiros)]
+        hora = f"{8 + i // len(barbeiros):02d}:00"
+
+        if i % 2 == 0:
+            # mesmo processo: reserva pelo caminho normal (acorda o barramento)
+            with app.app_context():
+                reservar_horario(
+                    get_db(), 1, barbeiro_id, servico_id, dia.isoformat(), hora
+                )
+            origem = "local"
+        else:
+            # outro worker: só o banco sabe
+            externo.execute(
+                """
+                INSERT INTO agendamentos
+                    (cliente_id, barbeiro_id, servico_id, data, hora, status)
+                VALUES (1, ?, ?, ?, ?, 'pendente')
+                """,
+                (barbeiro_id, servico_id, dia.isoformat(), hora),
+            )
+            externo.commit()
+            origem = "outro worker"
+
+        instante = time.perf_counter()
+        evento_id = externo.execute("SELECT MAX(id) FROM eventos_agenda").fetchone()[0]
+        enviados[evento_id] = (instante, por_barbeiro[barbeiro_id], origem)
+        time.sleep(0.05)
+
+    time.sleep(eventos.INTERVALO * 3)
+
+    latencias = {"local": [], "outro worker": []}
+    entregas = 0
+    with _lock:
+        for evento_id, chegada in recebidos:
+            if evento_id in enviados:
+                instante, _, origem = enviados[evento_id]
+                latencias[origem].append((chegada - instante) * 1000)
+                entregas += 1
+
+    esperado = sum(n for _, n, _ in enviados.values())
+    print(f"entregas: {entregas}/{esperado}")
+
+    for origem, valores in latencias.items():
+        if valores:
+            print(
+                f"{origem:<13} latência (ms): p50={statistics.median(valores):.1f} "
+                f"p95={percentil(valores, 0.95):.1f} máx={max(valores):.1f}"
+            )
+
+    print(f"barramento: {barramento.estatisticas}")
+    print(f"threads ativas: {threading.active_count()}")
+
+    servidor.shutdown()
+    externo.close()
+    shutil.rmtree(pasta)
+
+
+if __name__ == "__main__":
+    main()
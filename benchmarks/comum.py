@@ -0,0 +1,51 @@
+"""
+Ajudantes usados por mais de um benchmark: porta livre, percentil,
+cópia do projeto para subir o gunicorn e cookie de sessão.
+"""
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# cliente logado com o funil já no passo do barbeiro
+SESSAO_PADRAO = {"cliente_id": 1, "agendamento": {"servico_id": 1}}
+
+
+def porta_livre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def preparar_copia(*ignorar):
+    """Cópia do projeto numa pasta temporária (sem .git, uploads e benchmarks)."""
+    destino = os.path.join(tempfile.mkdtemp(), "app")
+    shutil.copytree(
+        RAIZ,
+        destino,
+        ignore=shutil.ignore_patterns(".git", "__pycache__", "uploads", "benchmarks", *ignorar),
+    )
+    return destino
+
+
+def cookie_sessao(pasta=None, dados=None):
+    """
+    Cookie de uma sessão criada pelo app de `pasta` (uma cópia do projeto)
+    ou, sem pasta, pelo app já importado: grava no banco dele (sessão no
+    servidor) ou assina (SESSAO_BACKEND=cookie).
+    """
+    if pasta:
+        sys.path.insert(0, pasta)
+    import sessoes
+    from app import app
+
+    return "session=" + sessoes.criar(app, dados or SESSAO_PADRAO)
@@ -0,0 +1,78 @@
+"""
+Teste de concorrência da reserva de horários.
+
+Dispara N reservas simultâneas (processos separados, cada um com sua
+conexão) para o mesmo barbeiro/data/hora e verifica que exatamente uma
+é gravada.
+
+Uso:
+    python benchmarks/concorrencia_reserva.py [N]
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from multiprocessing import Pool
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from agenda import HorarioIndisponivel, reservar_horario  # noqa: E402
+from migrations import migrar  # noqa: E402
+
+DATA = "2099-01-05"
+HORA = "10:00"
+
+
+def reservar(args):
+    caminho, cliente_id = args
+
+    db = sqlite3.connect(caminho, timeout=30)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode = WAL")
+
+    try:
+        reservar_horario(db, cliente_id, 1, 1, DATA, HORA)
+        return True
+    except HorarioIndisponivel:
+        return False
+    finally:
+        db.close()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+
+    pasta = tempfile.mkdtemp()
+    caminho = os.path.join(pasta, "concorrencia.db")
+    shutil.copy(os.path.join(RAIZ, "database.db"), caminho)
+    migrar(caminho)
+
+    try:
+        with Pool(min(n, 16)) as pool:
+            resultados = pool.map(reservar, [(caminho, i + 1) for i in range(n)])
+
+        db = sqlite3.connect(caminho)
+        gravados = db.execute(
+            """
+            SELECT COUNT(*) FROM agendamentos
+            WHERE barbeiro_id = 1 AND data = ? AND hora = ?
+              AND status IN ('pendente', 'confirmado')
+            """,
+            (DATA, HORA),
+        ).fetchone()[0]
+        db.close()
+    finally:
+        shutil.rmtree(pasta)
+
+    print(f"{n} reservas simultâneas: {sum(resultados)} aceita(s), "
+          f"{resultados.count(False)} recusada(s), {gravados} gravada(s)")
+
+    assert sum(resultados) == 1, "mais de uma reserva aceita"
+    assert gravados == 1, "horário gravado em duplicidade"
+
+
+if __name__ == "__main__":
+    main()
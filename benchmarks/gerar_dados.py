@@ -0,0 +1,279 @@
+"""
+Gera um banco sintético, com o schema atual, para medir o sistema em
+escala: barbeiros com suas grades de horários, clientes e anos de
+agendamentos com uma mistura de status realista (passado quase todo
+finalizado ou cancelado; futuro pendente/confirmado).
+
+A mesma semente gera o mesmo banco (as datas são relativas a hoje).
+Todos têm a senha "senha123"; o admin é admin@exemplo.com e os
+clientes são cliente<n>@exemplo.com (n a partir de 1).
+
+Uso:
+    python benchmarks/gerar_dados.py saida.db [--barbeiros 8] [--clientes 2000]
+        [--anos 2] [--futuro 60] [--ocupacao 0.65] [--semente 42]
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from migrations import migrar  # noqa: E402
+
+SENHA = "senha123"
+EMAIL_ADMIN = "admin@exemplo.com"
+
+SERVICOS = [
+    # nome, duração (min), preço
+    ("Corte", 30, 40.0),
+    ("Barba", 30, 30.0),
+    ("Corte + Barba", 60, 65.0),
+    ("Sobrancelha", 15, 15.0),
+    ("Pigmentação", 45, 50.0),
+    ("Corte infantil", 30, 35.0),
+]
+# Corte e Corte + Barba são a maior parte do movimento
+PESOS_SERVICOS = (40, 15, 30, 5, 5, 5)
+
+NOMES = [
+    "Rafael", "Bruno", "Diego", "Thiago", "Lucas", "Marcos", "André", "Felipe",
+    "Gustavo", "Rodrigo", "Leandro", "Vinícius", "Caio", "Mateus", "Paulo", "Renato",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa", "Almeida",
+    "Ferreira", "Rodrigues", "Gomes", "Martins", "Araújo", "Barbosa", "Ribeiro",
+]
+
+# grade de cada barbeiro: 09:00-18:30 de 30 em 30 min, com almoço
+HORAS = [f"{h:02d}:{m:02d}" for h in range(9, 19) for m in (0, 30) if h != 12]
+
+# status por período: (status, peso)
+STATUS_PASSADO = (("finalizado", 80), ("cancelado", 14), ("confirmado", 4), ("pendente", 2))
+STATUS_FUTURO = (("confirmado", 55), ("pendente", 35), ("cancelado", 10))
+
+
+def _minutos(hora):
+    h, m = hora.split(":")
+    return int(h) * 60 + int(m)
+
+
+def _dia_semana_sqlite(dia):
+    # 0=domingo ... 6=sábado, como em horarios.dia_semana
+    return (dia.weekday() + 1) % 7
+
+
+def _sortear(rnd, opcoes):
+    valores, pesos = zip(*opcoes)
+    return rnd.choices(valores, pesos)[0]
+
+
+# -----------------------------
+# TABELAS
+# -----------------------------
+def _servicos(db):
+    db.executemany(
+        """
+        INSERT INTO servicos (nome, duracao_min, preco, descricao)
+        VALUES (?, ?, ?, ?)
+        """,
+        [(nome, dur, preco, f"{nome} ({dur} min)") for nome, dur, preco in SERVICOS],
+    )
+    return [r[0] for r in db.execute("SELECT id FROM servicos ORDER BY id")]
+
+
+def _barbeiros(db, rnd, n):
+    grades = {}
+
+    for i in range(n):
+        nome = f"{NOMES[i % len(NOMES)]} {SOBRENOMES[(i * 7) % len(SOBRENOMES)]}"
+        cur = db.execute(
+            "INSERT INTO barbeiros (nome, bio) VALUES (?, ?)",
+            (nome, f"Barbeiro há {rnd.randint(2, 20)} anos."),
+        )
+
+        # terça a sábado para todos; alguns também segunda ou domingo
+        dias = {2, 3, 4, 5, 6}
+        if rnd.random() < 0.5:
+            dias.add(1)
+        if rnd.random() < 0.15:
+            dias.add(0)
+
+        # turnos um pouco diferentes entre barbeiros
+        inicio = rnd.choice((0, 0, 1, 2))
+        horas = HORAS[inicio:len(HORAS) - rnd.choice((0, 0, 1, 2))]
+
+        db.executemany(
+            "INSERT INTO horarios (barbeiro_id, dia_semana, hora) VALUES (?, ?, ?)",
+            [(cur.lastrowid, d, h) for d in sorted(dias) for h in horas],
+        )
+        grades[cur.lastrowid] = (dias, horas)
+
+    return grades
+
+
+def _clientes(db, n):
+    # um hash só: gerar milhares com o custo padrão levaria minutos
+    senha_hash = generate_password_hash(SENHA)
+
+    db.execute(
+        """
+        INSERT INTO clientes (nome, email, telefone, senha_hash, role)
+        VALUES ('Admin', ?, '', ?, 'admin')
+        """,
+        (EMAIL_ADMIN, senha_hash),
+    )
+    db.executemany(
+        "INSERT INTO clientes (nome, email, telefone, senha_hash) VALUES (?, ?, ?, ?)",
+        (
+            (
+                f"{NOMES[i % len(NOMES)]} {SOBRENOMES[i % len(SOBRENOMES)]} {i}",
+                f"cliente{i}@exemplo.com",
+                f"(11) 9{i:08d}",
+                senha_hash,
+            )
+            for i in range(1, n + 1)
+        ),
+    )
+    return [r[0] for r in db.execute("SELECT id FROM clientes WHERE role = 'cliente'")]
+
+
+def _agendamentos(db, rnd, grades, clientes, servicos, inicio, fim, ocupacao):
+    hoje = date.today()
+    duracoes = dict(zip(servicos, (s[1] for s in SERVICOS)))
+
+    # frequência de cada cliente: a maioria vem uma vez por mês ou menos,
+    # alguns toda semana
+    pesos_clientes = [rnd.lognormvariate(0, 0.75) for _ in clientes]
+
+    linhas = []
+    dia = inicio
+    while dia < fim:
+        passado = dia < hoje
+        for barbeiro_id, (dias, horas) in grades.items():
+            if _dia_semana_sqlite(dia) not in dias:
+                continue
+
+            livre_em = 0  # minuto a partir do qual o barbeiro está livre
+            for hora in horas:
+                ini = _minutos(hora)
+                if ini < livre_em or rnd.random() >= ocupacao:
+                    continue
+
+                servico_id = rnd.choices(servicos, PESOS_SERVICOS)[0]
+                status = _sortear(rnd, STATUS_PASSADO if passado else STATUS_FUTURO)
+                if status != "cancelado":
+                    livre_em = ini + duracoes[servico_id]
+
+                linhas.append(
+                    (
+                        rnd.choices(clientes, pesos_clientes)[0],
+                        barbeiro_id,
+                        servico_id,
+                        dia.isoformat(),
+                        hora,
+                        status,
+                    )
+                )
+        dia += timedelta(days=1)
+
+    db.executemany(
+        """
+        INSERT INTO agendamentos (cliente_id, barbeiro_id, servico_id, data, hora, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        linhas,
+    )
+    return len(linhas)
+
+
+def gerar(
+    caminho,
+    barbeiros=8,
+    clientes=2000,
+    anos=2,
+    futuro=60,
+    ocupacao=0.65,
+    semente=42,
+):
+    """Cria o banco em `caminho` (substituindo o existente). Retorna as contagens."""
+    for sufixo in ("", "-wal", "-shm"):
+        if os.path.exists(caminho + sufixo):
+            os.remove(caminho + sufixo)
+
+    migrar(caminho)
+
+    rnd = random.Random(semente)
+    hoje = date.today()
+    db = sqlite3.connect(caminho)
+
+    try:
+        servicos = _servicos(db)
+        grades = _barbeiros(db, rnd, barbeiros)
+        ids_clientes = _clientes(db, clientes)
+        total = _agendamentos(
+            db,
+            rnd,
+            grades,
+            ids_clientes,
+            servicos,
+            hoje - timedelta(days=int(365 * anos)),
+            hoje + timedelta(days=futuro),
+            ocupacao,
+        )
+
+        # os triggers registram cada insert como evento de SSE: não é histórico real
+        db.execute("DELETE FROM eventos_agenda")
+        db.commit()
+        db.execute("ANALYZE")
+        db.execute("VACUUM")
+    finally:
+        db.close()
+
+    return {
+        "barbeiros": barbeiros,
+        "clientes": clientes,
+        "agendamentos": total,
+        "anos": anos,
+        "futuro": futuro,
+        "ocupacao": ocupacao,
+        "semente": semente,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("saida")
+    parser.add_argument("--barbeiros", type=int, default=8)
+    parser.add_argument("--clientes", type=int, default=2000)
+    parser.add_argument("--anos", type=float, default=2)
+    parser.add_argument("--futuro", type=int, default=60, help="dias de agenda à frente")
+    parser.add_argument("--ocupacao", type=float, default=0.65)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumo = gerar(
+        args.saida,
+        args.barbeiros,
+        args.clientes,
+        args.anos,
+        args.futuro,
+        args.ocupacao,
+        args.semente,
+    )
+    print(
+        f"{args.saida}: {resumo['barbeiros']} barbeiros, {resumo['clientes']} clientes, "
+        f"{resumo['agendamentos']} agendamentos em {time.perf_counter() - inicio:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Confere os planos das consultas quentes: roda o funil do cliente, as
+páginas e APIs do admin e as APIs de agenda (agenda.py, app.py, admin.py)
+pelo test client num banco sintético migrado, com METRICAS_QUERY_LENTA_MS
+= 0. Assim cada consulta executada cai no log de consultas lentas de
+metricas.py junto com o EXPLAIN QUERY PLAN feito com os parâmetros reais.
+
+Falha (código de saída 1) se algum plano tiver um SCAN sem índice de
+agendamentos, clientes ou horarios; lista a consulta, a rota e o plano.
+
+Uso:
+    python benchmarks/planos.py
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import catalogo  # noqa: E402
+from carga import (  # noqa: E402
+    PAGINAS_ADMIN,
+    Coletor,
+    NavegadorFlask,
+    ler_dados,
+    sessao_admin,
+    sessao_cliente,
+)
+from gerar_dados import SENHA, gerar  # noqa: E402
+
+TABELAS = ("agendamentos", "clientes", "horarios")
+SESSOES = 10
+
+# "SCAN a" / "SCAN agendamentos" sem "USING ... INDEX"
+SCAN = re.compile(r"^SCAN (\w+)(?! USING)")
+ORIGEM = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.IGNORECASE)
+NAO_ALIAS = {"WHERE", "ON", "JOIN", "LEFT", "INNER", "CROSS", "GROUP", "ORDER", "INDEXED"}
+
+
+class Capturar(logging.Handler):
+    """Guarda os registros "query lenta" de metricas.py."""
+
+    def __init__(self):
+        super().__init__()
+        self.consultas = []
+
+    def emit(self, registro):
+        if registro.getMessage().startswith("query lenta "):
+            self.consultas.append(json.loads(registro.args[0]))
+
+
+def tabelas_da_consulta(sql):
+    """alias/nome -> tabela, dos FROM/JOIN da consulta."""
+    nomes = {}
+    for tabela, alias in ORIGEM.findall(sql):
+        nomes[tabela] = tabela
+        if alias and alias.upper() not in NAO_ALIAS:
+            nomes[alias] = tabela
+    return nomes
+
+
+def varreduras(consulta):
+    """Tabelas de TABELAS lidas por SCAN sem índice no plano."""
+    nomes = tabelas_da_consulta(consulta["sql"])
+    achadas = []
+    for passo in consulta["plano"]:
+        m = SCAN.match(passo)
+        if m and nomes.get(m.group(1), m.group(1)) in TABELAS:
+            achadas.append(passo)
+    return achadas
+
+
+def percorrer(app, dados):
+    rnd = random.Random(1)
+    coletor = Coletor()
+    hoje = date.today()
+    barbeiro = dados["barbeiros"][0]
+    servico = dados["servicos"][0]
+
+    for _ in range(SESSOES):
+        sessao_cliente(
+            NavegadorFlask(app),
+            coletor,
+            rnd,
+            rnd.choice(dados["emails"]),
+            dados["servicos"],
+            dados["barbeiros"],
+        )
+    sessao_admin(NavegadorFlask(app), coletor, rnd)
+
+    # o que o funil e as páginas padrão do admin não cobrem
+    cliente = app.test_client()
+    cliente.post("/login", data={"email": dados["emails"][0], "senha": SENHA})
+    for url in (
+        "/meus-agendamentos",
+        "/api/meus-agendamentos/passados",
+        f"/api/horarios?barbeiro_id={barbeiro}&data={hoje + timedelta(days=2)}"
+        f"&servico_id={servico}",
+        f"/api/proximos-horarios?servico_id={servico}",
+        "/perfil",
+    ):
+        cliente.get(url)
+
+    admin = app.test_client()
+    with admin.session_transaction() as sessao:
+        sessao.update(cliente_id=1, role="admin", is_admin=True)
+    de, ate = (hoje - timedelta(days=30)).isoformat(), hoje.isoformat()
+    for url in PAGINAS_ADMIN + [
+        f"/admin/agendamentos?barbeiro_id={barbeiro}&status=pendente&de={de}&ate={ate}",
+        "/admin/api/agendamentos/hoje",
+        "/admin/api/agendamentos/pendentes",
+        f"/admin/api/agendamentos/historico?barbeiro_id={barbeiro}",
+        f"/admin/relatorios?de={de}&ate={ate}",
+    ]:
+        admin.get(url)
+    admin.post(
+        "/admin/api/agendamentos/status",
+        json={"status": "confirmado", "filtro": {"status": "pendente", "de": ate}},
+    )
+
+
+def main():
+    pasta = tempfile.mkdtemp()
+    banco = os.path.join(pasta, "planos.db")
+    gerar(banco, barbeiros=4, clientes=300, anos=0.5)
+    dados = ler_dados(banco)
+
+    from app import app
+    from db import get_db
+
+    app.config.update(DATABASE=banco, TAREFAS=False, METRICAS_QUERY_LENTA_MS=0)
+    with app.app_context():
+        catalogo.invalidar(get_db())
+        get_db().commit()
+
+    # só a captura: sem o log por request e por consulta no terminal
+    log = logging.getLogger("metricas")
+    captura = Capturar()
+    handlers, log.handlers = log.handlers, [captura]
+    log.setLevel(logging.WARNING)
+    try:
+        percorrer(app, dados)
+    finally:
+        log.handlers = handlers
+        shutil.rmtree(pasta)
+
+    vistas, problemas = set(), {}
+    for consulta in captura.consultas:
+        if not consulta["plano"] or consulta["sql"] in vistas:
+            continue
+        vistas.add(consulta["sql"])
+        achadas = varreduras(consulta)
+        if achadas:
+            problemas[consulta["sql"]] = (consulta["rota"], consulta["plano"])
+
+    print(f"{len(vistas)} consultas distintas conferidas")
+    for sql, (rota, plano) in problemas.items():
+        print(f"\nSCAN sem índice em {rota}:\n  {sql}")
+        for passo in plano:
+            print(f"    {passo}")
+
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
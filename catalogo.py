@@ -0,0 +1,179 @@
+"""
+Cache em memória do catálogo: serviços, barbeiros e modelos de horários.
+
+Essas tabelas mudam poucas vezes por mês (só pelo admin), mas são lidas
+em todas as etapas do agendamento. Cada worker guarda uma cópia local;
+a coerência entre workers vem de um carimbo de versão na tabela
+configuracoes, conferido uma vez por request e incrementado por
+`invalidar()` na mesma transação da escrita.
+"""
+
+import threading
+from collections import defaultdict
+from flask import current_app, g, has_app_context
+
+CHAVE_VERSAO = "catalogo_versao"
+
+_lock = threading.Lock()
+_estado = {"versao": None, "dados": {}, "geracao": 0}
+
+estatisticas = {"hits": 0, "misses": 0, "invalidacoes": 0}
+
+
+def _ativo():
+    return not has_app_context() or current_app.config.get("CATALOGO_CACHE", True)
+
+
+def _versao_banco(db):
+    row = db.execute(
+        "SELECT valor FROM configuracoes WHERE chave = ?", (CHAVE_VERSAO,)
+    ).fetchone()
+    return row[0] if row else "0"
+
+
+def _sincronizar(db):
+    """Descarta a cópia local se outro worker alterou o catálogo."""
+    if has_app_context():
+        if g.get("catalogo_ok"):
+            return
+        g.catalogo_ok = True
+
+    versao = _versao_banco(db)
+
+    with _lock:
+        if _estado["versao"] != versao:
+            _estado["versao"] = versao
+            _estado["dados"] = {}
+            _estado["geracao"] += 1
+
+
+def versao(db):
+    """Carimbo atual do catálogo (para ETags)."""
+    _sincronizar(db)
+    return _estado["versao"] or _versao_banco(db)
+
+
+def _obter(db, chave, carregar):
+    if not _ativo():
+        return carregar(db)
+
+    _sincronizar(db)
+
+    with _lock:
+        if chave in _estado["dados"]:
+            estatisticas["hits"] += 1
+            return _estado["dados"][chave]
+        geracao = _estado["geracao"]
+
+    valor = carregar(db)
+
+    with _lock:
+        estatisticas["misses"] += 1
+        # não guarda o que foi lido antes de uma invalidação concorrente
+        if _estado["geracao"] == geracao:
+            _estado["dados"][chave] = valor
+
+    return valor
+
+
+def invalidar(db):
+    """
+    Marca o catálogo como alterado. Chamar antes do db.commit() da escrita,
+    para que a nova versão e os dados sejam gravados juntos.
+    """
+    db.execute(
+        """
+        INSERT INTO configuracoes (chave, valor) VALUES (?, '1')
+        ON CONFLICT(chave) DO UPDATE SET valor = CAST(valor AS INTEGER) + 1
+        """,
+        (CHAVE_VERSAO,),
+    )
+
+    with _lock:
+        _estado["versao"] = None
+        _estado["dados"] = {}
+        _estado["geracao"] += 1
+        estatisticas["invalidacoes"] += 1
+
+
+# -----------------------------
+# CARGAS
+# -----------------------------
+def _carregar_servicos(db):
+    return db.execute(
+        """
+        SELECT id, nome, preco, descricao, imagem, imagem_variantes, duracao_min, ativo
+        FROM servicos
+        ORDER BY nome
+        """
+    ).fetchall()
+
+
+def _carregar_barbeiros(db):
+    return db.execute(
+        """
+        SELECT id, nome, foto, foto_variantes, bio, ativo
+        FROM barbeiros
+        ORDER BY nome
+        """
+    ).fetchall()
+
+
+def carregar_modelo(db, barbeiro_id):
+    """Horários fixos do barbeiro agrupados por dia da semana."""
+    rows = db.execute(
+        """
+        SELECT dia_semana, hora
+        FROM horarios
+        WHERE barbeiro_id = ?
+          AND ativo = 1
+        ORDER BY hora
+        """,
+        (barbeiro_id,),
+    ).fetchall()
+
+    modelo = defaultdict(list)
+    for r in rows:
+        modelo[r["dia_semana"]].append(r["hora"])
+
+    return dict(modelo)
+
+
+# -----------------------------
+# LEITURAS
+# -----------------------------
+def servicos(db):
+    return _obter(db, "servicos", _carregar_servicos)
+
+
+def servicos_ativos(db):
+    return [s for s in servicos(db) if s["ativo"] == 1]
+
+
+def servico(db, servico_id):
+    for s in servicos(db):
+        if str(s["id"]) == str(servico_id):
+            return s
+    return None
+
+
+def barbeiros(db):
+    return _obter(db, "barbeiros", _carregar_barbeiros)
+
+
+def barbeiros_ativos(db):
+    return [b for b in barbeiros(db) if b["ativo"] == 1]
+
+
+def barbeiro(db, barbeiro_id):
+    for b in barbeiros(db):
+        if str(b["id"]) == str(barbeiro_id):
+            return b
+    return None
+
+
+def modelo_semanal(db, barbeiro_id):
+    barbeiro_id = int(barbeiro_id)
+    return _obter(
+        db, ("horarios", barbeiro_id), lambda db: carregar_modelo(db, barbeiro_id)
+    )
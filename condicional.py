@@ -0,0 +1,114 @@
+"""
+GET condicional (ETag / 304 Not Modified) para a agenda e o catálogo.
+
+O ETag é montado só a partir de carimbos de versão baratos de ler:
+  - 'barbeiro:<id>' em contadores, incrementado por triggers a cada
+    escrita em agendamentos/horarios do barbeiro (migrations.m008);
+  - a versão do catálogo (catalogo.versao);
+  - os parâmetros da resposta (datas, duração, etc.).
+Se o navegador já tem a versão atual, a resposta é 304 sem montar a
+agenda e sem consultar agendamentos.
+"""
+
+import hashlib
+import os
+
+from flask import current_app, request, session
+
+import catalogo
+
+estatisticas = {"respostas": 0, "nao_modificado": 0}
+
+
+def versao_barbeiro(db, barbeiro_id):
+    row = db.execute(
+        "SELECT valor FROM contadores WHERE chave = ?", (f"barbeiro:{int(barbeiro_id)}",)
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def gerar_etag(*partes):
+    return hashlib.sha1("|".join(map(str, partes)).encode()).hexdigest()[:20]
+
+
+def etag_agenda(db, barbeiro_id, inicio, dias, duracao):
+    # só carimbos de versão: com o ETag certo, agendamentos nem é consultado
+    return gerar_etag(
+        "agenda",
+        barbeiro_id,
+        versao_barbeiro(db, barbeiro_id),
+        catalogo.versao(db),
+        inicio,
+        dias,
+        duracao,
+    )
+
+
+def etag_horarios(db, barbeiro_id, dia, duracao):
+    return gerar_etag(
+        "horarios",
+        barbeiro_id,
+        versao_barbeiro(db, barbeiro_id),
+        catalogo.versao(db),
+        dia,
+        duracao,
+    )
+
+
+def condicional(etag, gerar):
+    """
+    Responde 304 se o If-None-Match do request bate com `etag`; senão
+    chama `gerar()` e devolve a resposta com o ETag. `no-cache` faz o
+    navegador revalidar sempre, então nada velho é mostrado.
+    """
+    estatisticas["respostas"] += 1
+
+    if request.if_none_match.contains(etag):
+        estatisticas["nao_modificado"] += 1
+        resposta = current_app.response_class(status=304)
+    else:
+        resposta = current_app.make_response(gerar())
+
+    resposta.set_etag(etag)
+    resposta.headers["Cache-Control"] = "private, no-cache"
+
+    return resposta
+
+
+# -----------------------------
+# PÁGINAS DO CATÁLOGO
+# -----------------------------
+def _versao_templates():
+    """Hash dos templates e do manifest de assets: muda a cada deploy."""
+    app = current_app
+    versao = app.extensions.get("versao_templates")
+
+    if versao is None or app.debug:
+        h = hashlib.sha1(repr(sorted(app.extensions.get("assets_manifest", {}).items())).encode())
+
+        pasta = os.path.join(app.root_path, app.template_folder)
+        for raiz, _, arquivos in sorted(os.walk(pasta)):
+            for nome in sorted(arquivos):
+                with open(os.path.join(raiz, nome), "rb") as f:
+                    h.update(f.read())
+
+        versao = app.extensions["versao_templates"] = h.hexdigest()[:12]
+
+    return versao
+
+
+def pagina_catalogo(db, nome, gerar):
+    """
+    Página HTML que só depende do catálogo (e do menu de admin).
+    Com mensagens flash pendentes a página muda, então vai sem ETag.
+    """
+    if session.get("_flashes"):
+        return gerar()
+
+    etag = gerar_etag(
+        nome,
+        catalogo.versao(db),
+        _versao_templates(),
+        session.get("is_admin"),
+    )
+    return condicional(etag, gerar)
@@ -1,16 +1,116 @@
 import sqlite3
 import os
+import queue
+import threading
 from flask import g, current_app
 
+import metricas
+
 DATABASE = "database.db"
 
+# Valores padrão; podem ser sobrescritos por app.config["SQLITE_PRAGMAS"]
+PRAGMAS_PADRAO = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 128 * 1024 * 1024,
+    "cache_size": -16000,  # negativo = KiB
+    "temp_store": "MEMORY",
+}
+
+# Conexões mantidas abertas por processo (0 desliga o pool)
+POOL_TAMANHO_PADRAO = 8
+
+
+def caminho_db(app=None):
+    app = app or current_app
+    return app.config.get("DATABASE") or os.path.join(app.root_path, DATABASE)
+
+
+# -----------------------------
+# POOL DE CONEXÕES
+# -----------------------------
+class Pool:
+    """Pool simples de conexões SQLite, um por processo/worker."""
+
+    def __init__(self, caminho, tamanho, pragmas, fabrica=sqlite3.Connection):
+        self.caminho = caminho
+        self.tamanho = tamanho
+        self.pragmas = pragmas
+        self.fabrica = fabrica
+        self.pid = os.getpid()
+        self._livres = queue.LifoQueue(maxsize=tamanho) if tamanho else None
+
+    def _conectar(self):
+        conn = sqlite3.connect(
+            self.caminho, check_same_thread=False, factory=self.fabrica
+        )
+        conn.row_factory = sqlite3.Row
+
+        for nome, valor in self.pragmas.items():
+            conn.execute(f"PRAGMA {nome} = {valor}")
+
+        return conn
+
+    def obter(self):
+        if self._livres is not None:
+            try:
+                return self._livres.get_nowait()
+            except queue.Empty:
+                pass
+
+        return self._conectar()
+
+    def devolver(self, conn):
+        # nunca devolve uma transação aberta para o próximo request
+        if conn.in_transaction:
+            conn.rollback()
+
+        if self._livres is not None:
+            try:
+                self._livres.put_nowait(conn)
+                return
+            except queue.Full:
+                pass
+
+        conn.close()
+
+    def fechar(self):
+        if self._livres is None:
+            return
+
+        while True:
+            try:
+                self._livres.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(app=None):
+    app = app or current_app
+    caminho = caminho_db(app)
+
+    with _pools_lock:
+        pool = _pools.get(caminho)
+
+        # após fork (gunicorn --preload) as conexões do pai não são reutilizadas
+        if pool is None or pool.pid != os.getpid():
+            pragmas = {**PRAGMAS_PADRAO, **app.config.get("SQLITE_PRAGMAS", {})}
+            tamanho = app.config.get("DB_POOL_SIZE", POOL_TAMANHO_PADRAO)
+            pool = _pools[caminho] = Pool(
+                caminho, tamanho, pragmas, metricas.fabrica_conexao(app)
+            )
+
+    return pool
+
 
 def get_db():
     if "db" not in g:
-        db_path = os.path.join(current_app.root_path, "database.db")
-
-        g.db = sqlite3.connect(db_path)
-        g.db.row_factory = sqlite3.Row
+        g.db = get_pool().obter()
 
     return g.db
 
@@ -18,4 +118,4 @@ def get_db():
 def close_db(e=None):
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool().devolver(db)
@@ -0,0 +1,267 @@
+"""
+Eventos de disponibilidade por barbeiro (horário ocupado / liberado),
+entregues ao navegador por Server-Sent Events.
+
+Quem publica é o próprio banco: triggers em agendamentos
+(migrations.m009) gravam em eventos_agenda na mesma transação da reserva,
+do cancelamento ou da mudança de status, então nenhum caminho de escrita
+esquece de avisar e eventos de outros workers chegam do mesmo jeito.
+Os triggers gravam com ou sem ouvintes; a tarefa limpar_eventos
+(tarefas.py) apaga o que passou de RETENCAO.
+
+Em cada worker, uma única thread lê as linhas novas da tabela e repassa
+para as filas dos ouvintes daquele processo (pub/sub em memória): N
+ouvintes custam uma consulta por intervalo, não N. `notificar()` acorda a
+thread logo depois de um commit local.
+
+Cada ouvinte SSE ocupa uma thread do servidor: com gunicorn, usar workers
+gthread (ou o modo assíncrono), não os workers sync padrão.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from db import caminho_db
+
+INTERVALO = 0.5
+KEEPALIVE = 15
+MAX_FILA = 100
+# eventos só servem para quem reconecta (Last-Event-ID); uma hora basta
+RETENCAO = "-1 hour"
+
+log = logging.getLogger(__name__)
+
+_barramentos = {}
+_lock = threading.Lock()
+
+
+class Barramento:
+    """Pub/sub do processo, alimentado pela tabela eventos_agenda."""
+
+    def __init__(self, caminho, intervalo=INTERVALO):
+        self.caminho = caminho
+        self.intervalo = intervalo
+        self.pid = os.getpid()
+        self.estatisticas = {"consultas": 0, "eventos": 0, "entregas": 0, "descartados": 0}
+
+        self._ouvintes = defaultdict(set)
+        self._lock = threading.Lock()
+        self._acordar = threading.Event()
+        self._ultimo = None
+        self._thread = None
+
+    def assinar(self, barbeiro_id, fila=None):
+        """`fila` precisa de put_nowait() que levante queue.Full (padrão: Queue)."""
+        fila = fila if fila is not None else queue.Queue(MAX_FILA)
+
+        with self._lock:
+            self._ouvintes[int(barbeiro_id)].add(fila)
+
+            # primeiro ouvinte: marca o ponto de partida já, não no próximo ciclo,
+            # senão um evento gravado nesse meio-tempo seria pulado
+            if self._ultimo is None:
+                self._ultimo = self._ultimo_id()
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="eventos-agenda", daemon=True
+                )
+                self._thread.start()
+
+        return fila
+
+    def _ultimo_id(self):
+        db = sqlite3.connect(self.caminho, timeout=30)
+        try:
+            return db.execute("SELECT COALESCE(MAX(id), 0) FROM eventos_agenda").fetchone()[0]
+        finally:
+            db.close()
+
+    def cancelar(self, barbeiro_id, fila):
+        with self._lock:
+            filas = self._ouvintes.get(int(barbeiro_id))
+            if filas is not None:
+                filas.discard(fila)
+                if not filas:
+                    del self._ouvintes[int(barbeiro_id)]
+
+    def total_ouvintes(self):
+        with self._lock:
+            return sum(len(f) for f in self._ouvintes.values())
+
+    def notificar(self):
+        self._acordar.set()
+
+    # -----------------------------
+    # THREAD
+    # -----------------------------
+    def _loop(self):
+        db = sqlite3.connect(self.caminho, timeout=30)
+        db.row_factory = sqlite3.Row
+
+        while True:
+            self._acordar.wait(self.intervalo)
+            self._acordar.clear()
+
+            try:
+                with self._lock:
+                    if not self._ouvintes:
+                        # ninguém ouvindo: não lê nada e recomeça do fim depois
+                        self._ultimo = None
+                        continue
+                    ultimo = self._ultimo
+
+                rows = db.execute(
+                    """
+                    SELECT id, barbeiro_id, tipo, data, hora
+                    FROM eventos_agenda
+                    WHERE id > ?
+                    ORDER BY id
+                    """,
+                    (ultimo,),
+                ).fetchall()
+                self.estatisticas["consultas"] += 1
+
+                for r in rows:
+                    self._publicar(dict(r))
+
+                if rows:
+                    with self._lock:
+                        self._ultimo = rows[-1]["id"]
+            except Exception:
+                # banco ocupado/travado: tenta de novo no próximo ciclo
+                log.exception("Falha ao ler eventos_agenda")
+                time.sleep(self.intervalo)
+
+    def _publicar(self, evento):
+        self.estatisticas["eventos"] += 1
+
+        with self._lock:
+            filas = list(self._ouvintes.get(evento["barbeiro_id"], ()))
+
+        for fila in filas:
+            try:
+                fila.put_nowait(evento)
+                self.estatisticas["entregas"] += 1
+            except queue.Full:
+                # cliente lento: qualquer evento seguinte já faz ele recarregar a agenda
+                self.estatisticas["descartados"] += 1
+
+
+def barramento(caminho=None):
+    caminho = caminho or caminho_db()
+
+    with _lock:
+        atual = _barramentos.get(caminho)
+        # após fork a thread do pai não existe no filho
+        if atual is None or atual.pid != os.getpid():
+            atual = _barramentos[caminho] = Barramento(caminho)
+
+    return atual
+
+
+def notificar():
+    """Chamar após o commit de uma escrita em agendamentos."""
+    # normalmente há um só; não depende do contexto do app
+    for atual in list(_barramentos.values()):
+        if atual.pid == os.getpid():
+            atual.notificar()
+
+
+def limpar(db):
+    """Apaga os eventos mais velhos que RETENCAO. Retorna quantos."""
+    # os ids crescem com criado_em: apaga por faixa de id, sem varrer a tabela
+    cur = db.execute(
+        """
+        DELETE FROM eventos_agenda
+        WHERE id < COALESCE(
+            (
+                SELECT id FROM eventos_agenda
+                WHERE criado_em >= datetime('now', ?)
+                ORDER BY id LIMIT 1
+            ),
+            (SELECT COALESCE(MAX(id), 0) + 1 FROM eventos_agenda)
+        )
+        """,
+        (RETENCAO,),
+    )
+    db.commit()
+    return cur.rowcount
+
+
+# -----------------------------
+# SSE
+# -----------------------------
+def formatar(evento):
+    dados = json.dumps({"data": evento["data"], "hora": evento["hora"]})
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {dados}\n\n"
+
+
+def atrasados(caminho, barbeiro_id, ultimo_id):
+    """Eventos perdidos por quem reconectou com Last-Event-ID."""
+    try:
+        ultimo_id = int(ultimo_id)
+    except (TypeError, ValueError):
+        return []
+
+    db = sqlite3.connect(caminho, timeout=30)
+    db.row_factory = sqlite3.Row
+    try:
+        return [
+            dict(r)
+            for r in db.execute(
+                """
+                SELECT id, barbeiro_id, tipo, data, hora
+                FROM eventos_agenda
+                WHERE barbeiro_id = ? AND id > ?
+                ORDER BY id
+                LIMIT ?
+                """,
+                (barbeiro_id, ultimo_id, MAX_FILA),
+            )
+        ]
+    finally:
+        db.close()
+
+
+def transmitir(barbeiro_id, ultimo_id=None, keepalive=KEEPALIVE, caminho=None):
+    """
+    Gerador do corpo text/event-stream. Roda fora do contexto do request
+    (não segura conexão do pool). Assina antes de buscar os eventos
+    perdidos, então nada se perde entre os dois; repetidos são pulados
+    pelo id.
+    """
+    caminho = caminho or caminho_db()
+    atual = barramento(caminho)
+
+    def gerar():
+        fila = atual.assinar(barbeiro_id)
+        enviado = 0
+        try:
+            yield "retry: 3000\n\n"
+
+            for evento in atrasados(caminho, barbeiro_id, ultimo_id):
+                enviado = evento["id"]
+                yield formatar(evento)
+
+            while True:
+                try:
+                    evento = fila.get(timeout=keepalive)
+                except queue.Empty:
+                    # comentário SSE: mantém proxies abertos e detecta desconexão
+                    yield ": ping\n\n"
+                    continue
+
+                if evento["id"] > enviado:
+                    enviado = evento["id"]
+                    yield formatar(evento)
+        finally:
+            atual.cancelar(barbeiro_id, fila)
+
+    return gerar()
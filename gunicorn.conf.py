@@ -0,0 +1,31 @@
+"""
+Configuração do gunicorn (carregada automaticamente do diretório atual).
+
+Síncrono (padrão), WSGI com workers gthread: clientes lentos e ouvintes
+SSE ocupam uma thread, não o worker inteiro.
+
+    gunicorn app:app
+
+Assíncrono: endpoints JSON/SSE no event loop (asgi.py), precisa de uvicorn.
+
+    SERVIDOR=async gunicorn asgi:aplicacao
+
+Variáveis: SERVIDOR (sync | async), WEB_CONCURRENCY (workers),
+THREADS (threads por worker no modo sync), BIND.
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+
+if os.environ.get("SERVIDOR") == "async":
+    worker_class = "uvicorn.workers.UvicornWorker"
+else:
+    worker_class = "gthread"
+    threads = int(os.environ.get("THREADS", 8))
+
+# SSE fica aberto indefinidamente; o keepalive do stream mantém a conexão viva
+timeout = 60
+keepalive = 5
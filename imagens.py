@@ -0,0 +1,336 @@
+"""
+Processamento das imagens enviadas pelo admin (serviços e barbeiros).
+
+O request só grava o arquivo original em disco e devolve o nome final;
+a decodificação, o redimensionamento e a gravação das variantes (JPEG e
+WebP em vários tamanhos) rodam num pool de threads do próprio worker.
+Enquanto isso a coluna *_variantes fica como 'pendente' e os templates
+mostram um placeholder. Se o worker morrer antes de processar, a tarefa
+retomar_imagens (tarefas.py) refaz os pendentes esquecidos.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from uuid import uuid4
+
+from flask import current_app, url_for
+from PIL import Image, ImageOps
+
+import catalogo
+from db import caminho_db
+
+LARGURAS = (320, 640, 1280)
+LARGURA_MAXIMA = 1600
+QUALIDADE_JPEG = 82
+QUALIDADE_WEBP = 78
+
+PENDENTE = "pendente"
+
+# pasta -> (tabela, coluna da imagem, coluna das variantes)
+DESTINOS = {
+    "servicos": ("servicos", "imagem", "imagem_variantes"),
+    "barbeiros": ("barbeiros", "foto", "foto_variantes"),
+}
+
+log = logging.getLogger(__name__)
+
+_executor = None
+_executor_pid = None
+_lock = threading.Lock()
+
+
+def _pool():
+    global _executor, _executor_pid
+
+    with _lock:
+        # após fork (gunicorn --preload) as threads do pai não existem
+        if _executor is None or _executor_pid != os.getpid():
+            workers = current_app.config.get("IMAGENS_WORKERS", 2)
+            _executor = ThreadPoolExecutor(workers, thread_name_prefix="imagens")
+            _executor_pid = os.getpid()
+
+    return _executor
+
+
+def pasta_uploads(pasta, raiz=None):
+    return os.path.join(raiz or current_app.root_path, "static", "uploads", pasta)
+
+
+# -----------------------------
+# REQUEST
+# -----------------------------
+def salvar_original(file, pasta):
+    """
+    Grava o upload sem decodificar e devolve o nome final da imagem
+    (<uuid>.jpg), que só existirá depois de processar().
+    """
+    if not file or not file.filename:
+        return None
+
+    originais = os.path.join(pasta_uploads(pasta), "originais")
+    os.makedirs(originais, exist_ok=True)
+
+    base = uuid4().hex
+    file.save(os.path.join(originais, base))
+
+    return f"{base}.jpg"
+
+
+def processar(pasta, nome):
+    """Agenda o processamento; chamar depois do commit que gravou `nome`."""
+    if not nome:
+        return
+
+    _pool().submit(
+        _processar, pasta, nome, current_app.root_path, caminho_db()
+    )
+
+
+# -----------------------------
+# WORKER
+# -----------------------------
+def _reduzir(img, largura):
+    copia = img.copy()
+    # reducing_gap usa Image.reduce() (inteiro, barato) antes do filtro fino
+    copia.thumbnail((largura, largura * 4), Image.LANCZOS, reducing_gap=3.0)
+    return copia
+
+
+def gerar_variantes(origem, destino, base):
+    """
+    Gera <base>.jpg, <base>-<largura>.{jpg,webp} nas LARGURAS menores que
+    ela e <base>-<largura dela>.webp; devolve o mapa das variantes.
+    """
+    variantes = {"jpg": {}, "webp": {}}
+
+    with Image.open(origem) as img:
+        # JPEG: decodifica direto numa escala menor (DCT), bem mais rápido
+        img.draft("RGB", (LARGURA_MAXIMA, LARGURA_MAXIMA))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        principal = _reduzir(img, LARGURA_MAXIMA)
+        principal.save(
+            os.path.join(destino, f"{base}.jpg"),
+            "JPEG",
+            quality=QUALIDADE_JPEG,
+            optimize=True,
+            progressive=True,
+        )
+
+        for largura in LARGURAS:
+            if largura >= principal.width:
+                break
+
+            menor = _reduzir(principal, largura)
+
+            nome_jpg = f"{base}-{largura}.jpg"
+            menor.save(
+                os.path.join(destino, nome_jpg),
+                "JPEG",
+                quality=QUALIDADE_JPEG,
+                optimize=True,
+                progressive=True,
+            )
+
+            nome_webp = f"{base}-{largura}.webp"
+            menor.save(
+                os.path.join(destino, nome_webp), "WEBP", quality=QUALIDADE_WEBP, method=4
+            )
+
+            variantes["jpg"][menor.width] = nome_jpg
+            variantes["webp"][menor.width] = nome_webp
+
+        # a principal também entra, com a largura dela: sem isso um upload
+        # de 500px só seria oferecido em 320w e um de 1000px em 640w
+        nome_webp = f"{base}-{principal.width}.webp"
+        principal.save(
+            os.path.join(destino, nome_webp), "WEBP", quality=QUALIDADE_WEBP, method=4
+        )
+        variantes["jpg"][principal.width] = f"{base}.jpg"
+        variantes["webp"][principal.width] = nome_webp
+
+    return variantes
+
+
+def _processar(pasta, nome, raiz, caminho):
+    tabela, coluna, coluna_variantes = DESTINOS[pasta]
+    base = nome.rsplit(".", 1)[0]
+    destino = pasta_uploads(pasta, raiz)
+    origem = os.path.join(destino, "originais", base)
+
+    try:
+        variantes = json.dumps(gerar_variantes(origem, destino, base))
+        valores = (nome, variantes)
+    except Exception:
+        log.exception("Falha ao processar a imagem %s/%s", pasta, nome)
+        valores = (None, None)
+    finally:
+        if os.path.exists(origem):
+            os.remove(origem)
+
+    db = sqlite3.connect(caminho, timeout=30)
+    try:
+        db.execute(
+            f"UPDATE {tabela} SET {coluna} = ?, {coluna_variantes} = ? WHERE {coluna} = ?",
+            (*valores, nome),
+        )
+        catalogo.invalidar(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def retomar_pendentes(db, idade_minima=600):
+    """
+    Processa agora as imagens ainda 'pendente' cujo original tem mais de
+    `idade_minima` segundos: o pool que as recebeu morreu com o worker
+    (reinício, deploy) antes de chegar nelas. Sem o original não há o que
+    refazer; a linha fica sem imagem, como numa falha de processamento.
+    Retorna quantas foram tratadas.
+    """
+    limite = time.time() - idade_minima
+    raiz = current_app.root_path
+    caminho = caminho_db()
+    tratadas = 0
+
+    for pasta, (tabela, coluna, coluna_variantes) in DESTINOS.items():
+        destino = pasta_uploads(pasta)
+        nomes = [
+            r[0]
+            for r in db.execute(
+                f"SELECT {coluna} FROM {tabela} WHERE {coluna_variantes} = ?", (PENDENTE,)
+            )
+        ]
+
+        for nome in nomes:
+            base = nome.rsplit(".", 1)[0]
+            origem = os.path.join(destino, "originais", base)
+
+            if os.path.exists(origem):
+                if os.path.getmtime(origem) >= limite:
+                    continue  # provavelmente ainda na fila de algum worker
+                _processar(pasta, nome, raiz, caminho)
+            elif os.path.exists(os.path.join(destino, nome)):
+                continue  # o worker acabou de gerar; falta só o UPDATE dele
+            else:
+                db.execute(
+                    f"""
+                    UPDATE {tabela} SET {coluna} = NULL, {coluna_variantes} = NULL
+                    WHERE {coluna} = ? AND {coluna_variantes} = ?
+                    """,
+                    (nome, PENDENTE),
+                )
+                catalogo.invalidar(db)
+                db.commit()
+            tratadas += 1
+
+    return tratadas
+
+
+def arquivos_da_imagem(nome, variantes=None):
+    """Caminhos (relativos à pasta de uploads) que pertencem a uma imagem."""
+    base = nome.rsplit(".", 1)[0]
+
+    arquivos = [nome, os.path.join("originais", base)]
+    if variantes and variantes != PENDENTE:
+        for formato in json.loads(variantes).values():
+            arquivos.extend(formato.values())
+
+    return arquivos
+
+
+def remover(pasta, nome, variantes=None):
+    """Apaga a imagem principal, as variantes e um original pendente."""
+    if not nome:
+        return
+
+    destino = pasta_uploads(pasta)
+
+    for arquivo in arquivos_da_imagem(nome, variantes):
+        caminho = os.path.join(destino, arquivo)
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+
+def remover_orfaos(db, idade_minima=24 * 3600):
+    """
+    Apaga arquivos de upload que nenhuma linha referencia: sobras de
+    exclusões antigas e de uploads cujo INSERT falhou. Só arquivos com mais
+    de `idade_minima` segundos, para não pegar um upload em andamento
+    (o original é gravado antes do commit). Retorna quantos saíram.
+    """
+    limite = time.time() - idade_minima
+    removidos = 0
+
+    for pasta, (tabela, coluna, coluna_variantes) in DESTINOS.items():
+        destino = pasta_uploads(pasta)
+        usados = set()
+        for nome, variantes in db.execute(
+            f"SELECT {coluna}, {coluna_variantes} FROM {tabela} WHERE {coluna} IS NOT NULL"
+        ):
+            usados.update(arquivos_da_imagem(nome, variantes))
+
+        for subpasta in ("", "originais"):
+            diretorio = os.path.join(destino, subpasta)
+            if not os.path.isdir(diretorio):
+                continue
+
+            with os.scandir(diretorio) as entradas:
+                for entrada in entradas:
+                    relativo = os.path.join(subpasta, entrada.name) if subpasta else entrada.name
+                    if (
+                        entrada.is_file()
+                        and relativo not in usados
+                        and entrada.stat().st_mtime < limite
+                    ):
+                        os.remove(entrada.path)
+                        removidos += 1
+
+    return removidos
+
+
+# -----------------------------
+# TEMPLATES
+# -----------------------------
+def imagem_upload(pasta, nome, variantes=None):
+    """
+    Atributos para <img>/<picture>: src, srcset (JPEG), webp (srcset WebP)
+    e pendente. Imagens antigas, sem variantes, usam só o arquivo original.
+    """
+    if not nome:
+        return None
+
+    if variantes == PENDENTE:
+        return {
+            "src": url_for("static", filename="img/logo.svg"),
+            "srcset": "",
+            "webp": "",
+            "pendente": True,
+        }
+
+    def url(arquivo):
+        return url_for("static", filename=f"uploads/{pasta}/{arquivo}")
+
+    if not variantes:
+        return {"src": url(nome), "srcset": "", "webp": "", "pendente": False}
+
+    mapa = json.loads(variantes)
+
+    def srcset(formato):
+        return ", ".join(f"{url(a)} {w}w" for w, a in mapa[formato].items())
+
+    return {
+        "src": url(nome),
+        "srcset": srcset("jpg"),
+        "webp": srcset("webp"),
+        "pendente": False,
+    }
+
+
+def registrar(app):
+    app.jinja_env.globals["imagem_upload"] = imagem_upload
@@ -0,0 +1,278 @@
+"""
+Instrumentação por request: tempo total, tempo em SQL e número de
+consultas, com log de consultas lentas (com o plano) e histogramas por
+rota em /admin/metricas.
+
+As conexões do pool são criadas com ConexaoMedida quando
+app.config["METRICAS"] está ligado; cada execute/fetch soma no contador do
+request atual (ContextVar), então fora de um request (threads de imagem,
+barramento de eventos) nada é medido. Desligado, o pool usa conexões
+sqlite3 comuns e o custo é zero.
+
+Os números são do worker que respondeu: cada processo tem os seus.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+
+from flask import g, request
+
+# limites superiores dos baldes dos histogramas, em ms
+LIMITES_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_LENTA_MS = 50
+MAX_LENTAS = 50
+
+log = logging.getLogger(__name__)
+
+_atual = ContextVar("metricas_request", default=None)
+_lock = threading.Lock()
+_rotas = {}
+_lentas = deque(maxlen=MAX_LENTAS)
+
+
+class Medida:
+    """Acumulado de um request."""
+
+    __slots__ = ("consultas", "segundos_db", "limite_lenta")
+
+    def __init__(self, limite_lenta):
+        self.consultas = 0
+        self.segundos_db = 0.0
+        self.limite_lenta = limite_lenta
+
+
+class Histograma:
+    def __init__(self):
+        self.baldes = [0] * (len(LIMITES_MS) + 1)
+        self.total = 0
+        self.soma = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, ms):
+        self.baldes[bisect_left(LIMITES_MS, ms)] += 1
+        self.total += 1
+        self.soma += ms
+        self.maximo = max(self.maximo, ms)
+
+    def percentil(self, p):
+        """Limite superior do balde que contém o percentil p (0-1)."""
+        alvo = self.total * p
+        acumulado = 0
+        for limite, n in zip(LIMITES_MS + (float("inf"),), self.baldes):
+            acumulado += n
+            if acumulado >= alvo:
+                return round(min(limite, self.maximo), 2)
+        return round(self.maximo, 2)
+
+    def resumo(self):
+        if not self.total:
+            return {"total": 0}
+
+        return {
+            "total": self.total,
+            "media": round(self.soma / self.total, 2),
+            "p50": self.percentil(0.50),
+            "p95": self.percentil(0.95),
+            "p99": self.percentil(0.99),
+            "max": round(self.maximo, 2),
+            # pares [limite, quantidade]; o último (None) é o que passou de 5000
+            "baldes": [list(b) for b in zip(LIMITES_MS + (None,), self.baldes)],
+        }
+
+
+# -----------------------------
+# CONEXÃO INSTRUMENTADA
+# -----------------------------
+def _registrar_consulta(medida, conexao, sql, params, segundos):
+    medida.consultas += 1
+    medida.segundos_db += segundos
+
+    ms = segundos * 1000
+    if ms >= medida.limite_lenta:
+        _consulta_lenta(conexao, sql, params, ms)
+
+
+def _consulta_lenta(conexao, sql, params, ms):
+    plano = []
+    try:
+        # cursor comum: o EXPLAIN não entra na conta do request
+        cur = sqlite3.Cursor(conexao)
+        plano = [r[-1] for r in cur.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+    except sqlite3.Error:
+        pass  # BEGIN/COMMIT/PRAGMA não têm plano
+
+    registro = {
+        "ms": round(ms, 2),
+        "sql": " ".join(sql.split()),
+        "plano": plano,
+        "rota": request.endpoint if request else None,
+    }
+    _lentas.append(registro)
+    log.warning("query lenta %s", json.dumps(registro, ensure_ascii=False))
+
+
+class CursorMedido(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        medida = _atual.get()
+        if medida is None:
+            return super().execute(sql, params)
+
+        inicio = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            _registrar_consulta(
+                medida, self.connection, sql, params, time.perf_counter() - inicio
+            )
+
+    def executemany(self, sql, lista):
+        medida = _atual.get()
+        if medida is None:
+            return super().executemany(sql, lista)
+
+        inicio = time.perf_counter()
+        try:
+            return super().executemany(sql, lista)
+        finally:
+            # sem plano: os parâmetros já foram consumidos
+            medida.consultas += 1
+            medida.segundos_db += time.perf_counter() - inicio
+
+    # o SQLite avança a consulta conforme as linhas são lidas: conta no tempo de SQL
+    def _medir_leitura(self, ler, *args):
+        medida = _atual.get()
+        if medida is None:
+            return ler(*args)
+
+        inicio = time.perf_counter()
+        try:
+            return ler(*args)
+        finally:
+            medida.segundos_db += time.perf_counter() - inicio
+
+    def fetchone(self):
+        return self._medir_leitura(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._medir_leitura(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._medir_leitura(super().fetchall)
+
+    def __next__(self):
+        return self._medir_leitura(super().__next__)
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """Connection.execute do sqlite3 não passa por cursor(): cria o cursor aqui."""
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, lista):
+        return self.cursor().executemany(sql, lista)
+
+
+def fabrica_conexao(app):
+    return ConexaoMedida if app.config.get("METRICAS", True) else sqlite3.Connection
+
+
+# -----------------------------
+# REQUEST
+# -----------------------------
+def _fim(resposta):
+    medida = _atual.get()
+    if medida is None or "metricas_inicio" not in g:
+        return resposta
+
+    ms = (time.perf_counter() - g.metricas_inicio) * 1000
+    db_ms = medida.segundos_db * 1000
+    rota = request.url_rule.rule if request.url_rule else "<404>"
+
+    if log.isEnabledFor(logging.INFO):
+        log.info(
+            json.dumps(
+                {
+                    "rota": rota,
+                    "metodo": request.method,
+                    "status": resposta.status_code,
+                    "ms": round(ms, 2),
+                    "db_ms": round(db_ms, 2),
+                    "consultas": medida.consultas,
+                }
+            )
+        )
+
+    chave = f"{request.method} {rota}"
+    with _lock:
+        if chave not in _rotas:
+            _rotas[chave] = {
+                "ms": Histograma(),
+                "db_ms": Histograma(),
+                "consultas": Histograma(),
+                "status": {},
+            }
+        r = _rotas[chave]
+        r["ms"].registrar(ms)
+        r["db_ms"].registrar(db_ms)
+        r["consultas"].registrar(medida.consultas)
+        r["status"][resposta.status_code] = r["status"].get(resposta.status_code, 0) + 1
+
+    return resposta
+
+
+def _limpar(e=None):
+    token = g.pop("metricas_token", None)
+    if token is not None:
+        _atual.reset(token)
+
+
+def resumo():
+    with _lock:
+        rotas = {
+            chave: {
+                "ms": r["ms"].resumo(),
+                "db_ms": r["db_ms"].resumo(),
+                "consultas": r["consultas"].resumo(),
+                "status": dict(r["status"]),
+            }
+            for chave, r in sorted(_rotas.items())
+        }
+
+    return {"pid": os.getpid(), "rotas": rotas, "lentas": list(_lentas)}
+
+
+def zerar():
+    with _lock:
+        _rotas.clear()
+        _lentas.clear()
+
+
+def registrar(app):
+    @app.before_request
+    def _inicio():
+        # conferido a cada request: dá para desligar sem reiniciar
+        if not app.config.get("METRICAS", True):
+            return
+
+        g.metricas_inicio = time.perf_counter()
+        limite = app.config.get("METRICAS_QUERY_LENTA_MS", QUERY_LENTA_MS)
+        g.metricas_token = _atual.set(Medida(limite))
+
+    app.after_request(_fim)
+    app.teardown_request(_limpar)
+
+    # sem logging configurado (dev / gunicorn padrão) a linha por request sumiria
+    if not log.handlers and not logging.getLogger().handlers:
+        log.addHandler(logging.StreamHandler())
+        log.setLevel(logging.INFO)
@@ -0,0 +1,858 @@
+"""
+Migrações versionadas do banco.
+
+A versão aplicada fica em `PRAGMA user_version`. Cada migração roda uma
+única vez, em ordem, dentro de uma transação. Para alterar o schema,
+adicione uma nova função ao final de MIGRACOES — nunca edite uma já
+publicada.
+
+Uso manual:
+    python migrations.py [caminho/do/banco.db]
+"""
+
+import sqlite3
+
+
+def _colunas(db, tabela):
+    return {r[1] for r in db.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _adicionar_coluna(db, tabela, coluna, definicao):
+    if coluna not in _colunas(db, tabela):
+        db.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+
+# -----------------------------
+# MIGRAÇÕES
+# -----------------------------
+def m001_schema_base(db):
+    """Schema atual do sistema (substitui o antigo init_db.py)."""
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            telefone TEXT,
+            senha_hash TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            role TEXT DEFAULT 'cliente'
+        )
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS barbeiros (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            ativo INTEGER DEFAULT 1,
+            foto TEXT,
+            bio TEXT
+        )
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS servicos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            duracao_min INTEGER NOT NULL,
+            preco REAL NOT NULL,
+            ativo INTEGER DEFAULT 1,
+            descricao TEXT,
+            imagem TEXT
+        )
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS agendamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            barbeiro_id INTEGER,
+            servico_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            hora TEXT NOT NULL,
+            status TEXT DEFAULT 'pendente',
+            observacao TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id),
+            FOREIGN KEY (barbeiro_id) REFERENCES barbeiros(id),
+            FOREIGN KEY (servico_id) REFERENCES servicos(id)
+        )
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS horarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            barbeiro_id INTEGER NOT NULL,
+            dia_semana INTEGER NOT NULL, -- 0=domingo ... 6=sabado
+            hora TEXT NOT NULL,          -- '09:00', '10:30'
+            ativo INTEGER DEFAULT 1,
+            FOREIGN KEY (barbeiro_id) REFERENCES barbeiros(id)
+        )
+        """
+    )
+
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS configuracoes (
+            chave TEXT PRIMARY KEY,
+            valor TEXT
+        )
+        """
+    )
+
+    # bancos criados pelo init_db.py antigo não têm estas colunas
+    _adicionar_coluna(db, "clientes", "role", "TEXT DEFAULT 'cliente'")
+    _adicionar_coluna(db, "barbeiros", "foto", "TEXT")
+    _adicionar_coluna(db, "barbeiros", "bio", "TEXT")
+    _adicionar_coluna(db, "servicos", "descricao", "TEXT")
+    _adicionar_coluna(db, "servicos", "imagem", "TEXT")
+
+
+def m002_indices_agenda(db):
+    """Índices das consultas de disponibilidade, histórico e listas do admin."""
+    # /api/agenda e /api/horarios
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_barbeiro_data
+        ON agendamentos (barbeiro_id, data, status, hora)
+        """
+    )
+    # meus agendamentos
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_cliente_data
+        ON agendamentos (cliente_id, data, hora)
+        """
+    )
+    # admin: pendentes / hoje / contagens por status
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_status_data
+        ON agendamentos (status, data)
+        """
+    )
+    # admin: histórico (data < hoje)
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_data_hora
+        ON agendamentos (data, hora)
+        """
+    )
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_horarios_barbeiro_dia
+        ON horarios (barbeiro_id, dia_semana, ativo, hora)
+        """
+    )
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_horarios_dia_hora
+        ON horarios (dia_semana, hora)
+        """
+    )
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_servicos_ativo_nome ON servicos (ativo, nome)"
+    )
+    db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_barbeiros_ativo_nome ON barbeiros (ativo, nome)"
+    )
+    db.execute("ANALYZE")
+
+
+def m003_horario_unico(db):
+    """Um único agendamento ativo por barbeiro/data/hora."""
+    # agendamentos duplicados anteriores à restrição: mantém o mais antigo
+    db.execute(
+        """
+        UPDATE agendamentos
+        SET status = 'cancelado',
+            observacao = 'Cancelado automaticamente: horário duplicado'
+        WHERE status IN ('pendente', 'confirmado')
+          AND EXISTS (
+              SELECT 1 FROM agendamentos o
+              WHERE o.barbeiro_id = agendamentos.barbeiro_id
+                AND o.data = agendamentos.data
+                AND o.hora = agendamentos.hora
+                AND o.status IN ('pendente', 'confirmado')
+                AND o.id < agendamentos.id
+          )
+        """
+    )
+    db.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_agendamentos_slot_ativo
+        ON agendamentos (barbeiro_id, data, hora)
+        WHERE status IN ('pendente', 'confirmado')
+        """
+    )
+
+
+def _somar(chave, delta):
+    """Corpo de trigger que soma `delta` ao contador `chave` (expressões SQL)."""
+    return f"""
+        INSERT OR IGNORE INTO contadores (chave, valor) VALUES ({chave}, 0);
+        UPDATE contadores SET valor = valor + ({delta}) WHERE chave = {chave};
+    """
+
+
+def m004_contadores(db):
+    """
+    Contadores do dashboard mantidos por triggers: qualquer INSERT/UPDATE/
+    DELETE em agendamentos ou clientes atualiza a tabela contadores, então
+    o dashboard lê totais em O(1) sem varrer agendamentos.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS contadores (
+            chave TEXT PRIMARY KEY,
+            valor REAL NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+    # carga inicial a partir dos dados existentes
+    db.execute("DELETE FROM contadores")
+    db.execute(
+        "INSERT INTO contadores (chave, valor) SELECT 'clientes', COUNT(*) FROM clientes"
+    )
+    db.execute(
+        """
+        INSERT INTO contadores (chave, valor)
+        SELECT 'agendamentos', COUNT(*) FROM agendamentos
+        """
+    )
+    db.execute(
+        """
+        INSERT INTO contadores (chave, valor)
+        SELECT 'status:' || COALESCE(status, 'pendente'), COUNT(*)
+        FROM agendamentos
+        GROUP BY 1
+        """
+    )
+    db.execute(
+        """
+        INSERT INTO contadores (chave, valor)
+        SELECT 'receita', COALESCE(SUM(s.preco), 0)
+        FROM agendamentos a
+        JOIN servicos s ON s.id = a.servico_id
+        WHERE a.status = 'finalizado'
+        """
+    )
+
+    def receita(linha, sinal):
+        return f"""
+            UPDATE contadores
+            SET valor = valor {sinal} COALESCE(
+                (SELECT preco FROM servicos WHERE id = {linha}.servico_id), 0
+            )
+            WHERE chave = 'receita' AND {linha}.status = 'finalizado';
+        """
+
+    gatilhos = {
+        "trg_contadores_agendamento_insert": (
+            "AFTER INSERT ON agendamentos",
+            _somar("'agendamentos'", 1)
+            + _somar("'status:' || COALESCE(NEW.status, 'pendente')", 1)
+            + receita("NEW", "+"),
+        ),
+        "trg_contadores_agendamento_delete": (
+            "AFTER DELETE ON agendamentos",
+            _somar("'agendamentos'", -1)
+            + _somar("'status:' || COALESCE(OLD.status, 'pendente')", -1)
+            + receita("OLD", "-"),
+        ),
+        "trg_contadores_agendamento_update": (
+            "AFTER UPDATE OF status, servico_id ON agendamentos",
+            _somar("'status:' || COALESCE(OLD.status, 'pendente')", -1)
+            + _somar("'status:' || COALESCE(NEW.status, 'pendente')", 1)
+            + receita("OLD", "-")
+            + receita("NEW", "+"),
+        ),
+        "trg_contadores_cliente_insert": (
+            "AFTER INSERT ON clientes",
+            _somar("'clientes'", 1),
+        ),
+        "trg_contadores_cliente_delete": (
+            "AFTER DELETE ON clientes",
+            _somar("'clientes'", -1),
+        ),
+    }
+
+    # um execute por trigger: executescript faria COMMIT no meio da migração
+    for nome, (evento, corpo) in gatilhos.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END")
+
+
+def m005_indice_status_ordenado(db):
+    """Listas paginadas do admin percorrem (status, data, hora) já em ordem."""
+    db.execute("DROP INDEX IF EXISTS idx_agendamentos_status_data")
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_agendamentos_status_data_hora
+        ON agendamentos (status, data, hora)
+        """
+    )
+
+
+def m006_horario_unico_por_barbeiro(db):
+    """Permite gerar horários em lote com INSERT OR IGNORE."""
+    db.execute(
+        """
+        DELETE FROM horarios
+        WHERE id NOT IN (
+            SELECT MIN(id) FROM horarios GROUP BY barbeiro_id, dia_semana, hora
+        )
+        """
+    )
+    db.execute(
+        """
+        CREATE UNIQUE INDEX IF NOT EXISTS uq_horarios_barbeiro_dia_hora
+        ON horarios (barbeiro_id, dia_semana, hora)
+        """
+    )
+
+
+def m007_variantes_imagens(db):
+    """Tamanhos/formatos gerados para cada imagem (JSON) ou 'pendente'."""
+    _adicionar_coluna(db, "servicos", "imagem_variantes", "TEXT")
+    _adicionar_coluna(db, "barbeiros", "foto_variantes", "TEXT")
+
+
+def m008_versoes_barbeiro(db):
+    """
+    Versão por barbeiro (contadores 'barbeiro:<id>'), incrementada por
+    triggers a cada escrita em agendamentos ou horarios desse barbeiro.
+    É a base dos ETags da agenda: conferir se algo mudou custa uma leitura
+    por chave primária, sem tocar em agendamentos.
+    """
+
+    def versao(linha):
+        return _somar(f"'barbeiro:' || {linha}.barbeiro_id", 1)
+
+    gatilhos = {}
+    for tabela in ("agendamentos", "horarios"):
+        gatilhos[f"trg_versao_{tabela}_insert"] = (f"AFTER INSERT ON {tabela}", versao("NEW"))
+        gatilhos[f"trg_versao_{tabela}_delete"] = (f"AFTER DELETE ON {tabela}", versao("OLD"))
+        gatilhos[f"trg_versao_{tabela}_update"] = (
+            f"AFTER UPDATE ON {tabela}",
+            versao("OLD") + versao("NEW"),
+        )
+
+    for nome, (evento, corpo) in gatilhos.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END")
+
+
+def m009_eventos_agenda(db):
+    """
+    Fila de eventos de disponibilidade para o SSE (eventos.py). Triggers
+    gravam 'ocupado'/'liberado' na mesma transação que muda o agendamento,
+    seja reserva, cancelamento pelo cliente ou mudança de status no admin.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS eventos_agenda (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            barbeiro_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            data TEXT NOT NULL,
+            hora TEXT NOT NULL,
+            criado_em TEXT NOT NULL DEFAULT (datetime('now'))
+        )
+        """
+    )
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_eventos_agenda_barbeiro
+        ON eventos_agenda (barbeiro_id, id)
+        """
+    )
+
+    def ativo(linha):
+        return f"COALESCE({linha}.status, 'pendente') IN ('pendente', 'confirmado')"
+
+    def evento(tipo, linha):
+        return f"""
+            INSERT INTO eventos_agenda (barbeiro_id, tipo, data, hora)
+            VALUES ({linha}.barbeiro_id, '{tipo}', {linha}.data, {linha}.hora);
+        """
+
+    mesmo_horario = (
+        "OLD.barbeiro_id = NEW.barbeiro_id AND OLD.data = NEW.data AND OLD.hora = NEW.hora"
+    )
+
+    gatilhos = {
+        "trg_eventos_agendamento_insert": (
+            f"AFTER INSERT ON agendamentos WHEN {ativo('NEW')}",
+            evento("ocupado", "NEW"),
+        ),
+        "trg_eventos_agendamento_delete": (
+            f"AFTER DELETE ON agendamentos WHEN {ativo('OLD')}",
+            evento("liberado", "OLD"),
+        ),
+        "trg_eventos_agendamento_libera": (
+            "AFTER UPDATE OF status, barbeiro_id, data, hora ON agendamentos "
+            f"WHEN {ativo('OLD')} AND NOT ({ativo('NEW')} AND {mesmo_horario})",
+            evento("liberado", "OLD"),
+        ),
+        "trg_eventos_agendamento_ocupa": (
+            "AFTER UPDATE OF status, barbeiro_id, data, hora ON agendamentos "
+            f"WHEN {ativo('NEW')} AND NOT ({ativo('OLD')} AND {mesmo_horario})",
+            evento("ocupado", "NEW"),
+        ),
+    }
+
+    for nome, (evento_sql, corpo) in gatilhos.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento_sql} BEGIN {corpo} END")
+
+
+def _minuto(coluna):
+    """'09:30' -> 570, em SQL."""
+    return (
+        f"(CAST(substr({coluna}, 1, instr({coluna}, ':') - 1) AS INTEGER) * 60"
+        f" + CAST(substr({coluna}, instr({coluna}, ':') + 1, 2) AS INTEGER))"
+    )
+
+
+def _recalcular_slots(onde):
+    """
+    Corpo de trigger que recalcula estado/livre_ate dos slots filtrados
+    por `onde` a partir dos agendamentos ativos do mesmo barbeiro e dia.
+    """
+    inicio = _minuto("a.hora")
+    return f"""
+        UPDATE slots SET
+            estado = CASE WHEN EXISTS (
+                SELECT 1
+                FROM agendamentos a
+                LEFT JOIN servicos s ON s.id = a.servico_id
+                WHERE a.barbeiro_id = slots.barbeiro_id
+                  AND a.data = slots.data
+                  AND a.status IN ('pendente', 'confirmado')
+                  AND {inicio} <= slots.minuto
+                  AND {inicio} + MAX(COALESCE(s.duracao_min, 0), 1) > slots.minuto
+            ) THEN 'ocupado' ELSE 'livre' END,
+            livre_ate = (
+                SELECT MIN({inicio})
+                FROM agendamentos a
+                WHERE a.barbeiro_id = slots.barbeiro_id
+                  AND a.data = slots.data
+                  AND a.status IN ('pendente', 'confirmado')
+                  AND {inicio} > slots.minuto
+            )
+        WHERE {onde};
+    """
+
+
+def m010_slots(db):
+    """
+    Slots concretos (barbeiro, data, hora) materializados para os dias de
+    calendario_slots (horizonte móvel, estendido por slots.py). Triggers
+    mantêm a tabela em dia com horarios, agendamentos e a duração dos
+    serviços, então a disponibilidade é uma leitura por faixa da chave.
+
+    estado 'ocupado': algum agendamento ativo cobre o início do slot.
+    livre_ate: início do próximo agendamento ativo no dia (NULL: nenhum);
+    um serviço de d minutos cabe se livre_ate >= minuto + d.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS calendario_slots (
+            data TEXT PRIMARY KEY,
+            dia_semana INTEGER NOT NULL -- 0=domingo ... 6=sabado
+        ) WITHOUT ROWID
+        """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS slots (
+            barbeiro_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            hora TEXT NOT NULL,
+            minuto INTEGER NOT NULL,
+            estado TEXT NOT NULL DEFAULT 'livre',
+            livre_ate INTEGER,
+            PRIMARY KEY (barbeiro_id, data, hora)
+        ) WITHOUT ROWID
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_slots_data ON slots (data)")
+
+    def inserir_horarios(filtro, data):
+        return f"""
+            INSERT OR IGNORE INTO slots (barbeiro_id, data, hora, minuto)
+            SELECT h.barbeiro_id, {data}, h.hora, {_minuto("h.hora")}
+            FROM horarios h
+            WHERE {filtro};
+        """
+
+    dias_do_horario = (
+        "SELECT data FROM calendario_slots WHERE dia_semana = {linha}.dia_semana"
+    )
+
+    def horario_entra(linha):
+        dias = dias_do_horario.format(linha=linha)
+        return f"""
+            INSERT OR IGNORE INTO slots (barbeiro_id, data, hora, minuto)
+            SELECT {linha}.barbeiro_id, c.data, {linha}.hora, {_minuto(f"{linha}.hora")}
+            FROM calendario_slots c
+            WHERE c.dia_semana = {linha}.dia_semana AND {linha}.ativo = 1;
+        """ + _recalcular_slots(
+            f"barbeiro_id = {linha}.barbeiro_id AND hora = {linha}.hora AND data IN ({dias})"
+        )
+
+    def horario_sai(linha):
+        dias = dias_do_horario.format(linha=linha)
+        return f"""
+            DELETE FROM slots
+            WHERE barbeiro_id = {linha}.barbeiro_id
+              AND hora = {linha}.hora
+              AND data IN ({dias});
+        """
+
+    def dia(linha):
+        return _recalcular_slots(
+            f"barbeiro_id = {linha}.barbeiro_id AND data = {linha}.data"
+        )
+
+    # dias (no horizonte) com agendamentos ativos de um serviço
+    dias_do_servico = """
+        (barbeiro_id, data) IN (
+            SELECT barbeiro_id, data FROM agendamentos
+            WHERE servico_id = OLD.id AND status IN ('pendente', 'confirmado')
+              AND data >= (SELECT MIN(data) FROM calendario_slots)
+        )
+    """
+
+    gatilhos = {
+        "trg_slots_calendario_insert": (
+            "AFTER INSERT ON calendario_slots",
+            inserir_horarios("h.dia_semana = NEW.dia_semana AND h.ativo = 1", "NEW.data")
+            + _recalcular_slots("data = NEW.data"),
+        ),
+        "trg_slots_calendario_delete": (
+            "AFTER DELETE ON calendario_slots",
+            "DELETE FROM slots WHERE data = OLD.data;",
+        ),
+        "trg_slots_horarios_insert": ("AFTER INSERT ON horarios", horario_entra("NEW")),
+        "trg_slots_horarios_delete": ("AFTER DELETE ON horarios", horario_sai("OLD")),
+        "trg_slots_horarios_update": (
+            "AFTER UPDATE OF barbeiro_id, dia_semana, hora, ativo ON horarios",
+            horario_sai("OLD") + horario_entra("NEW"),
+        ),
+        "trg_slots_agendamentos_insert": ("AFTER INSERT ON agendamentos", dia("NEW")),
+        "trg_slots_agendamentos_delete": ("AFTER DELETE ON agendamentos", dia("OLD")),
+        "trg_slots_agendamentos_update": (
+            "AFTER UPDATE OF status, barbeiro_id, servico_id, data, hora ON agendamentos",
+            dia("OLD") + dia("NEW"),
+        ),
+        "trg_slots_servicos_duracao": (
+            "AFTER UPDATE OF duracao_min ON servicos",
+            _recalcular_slots(dias_do_servico),
+        ),
+        # sem o serviço, o agendamento passa a ocupar 1 minuto (LEFT JOIN)
+        "trg_slots_servicos_delete": (
+            "AFTER DELETE ON servicos",
+            _recalcular_slots(dias_do_servico),
+        ),
+    }
+
+    for nome, (evento, corpo) in gatilhos.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END")
+
+
+def m011_indice_slots_horario(db):
+    """
+    Busca do primeiro horário livre entre todos os barbeiros: percorre os
+    slots em ordem de (data, minuto) e para nos K primeiros livres. O
+    índice cobre o filtro (a chave primária vem junto na WITHOUT ROWID).
+    """
+    db.execute("DROP INDEX IF EXISTS idx_slots_data")
+    db.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_slots_data_minuto
+        ON slots (data, minuto, estado, livre_ate)
+        """
+    )
+
+
+def m012_sessoes(db):
+    """
+    Sessões guardadas no servidor (sessoes.py): o cookie leva só o id.
+    `expira` em epoch (segundos) para a coleta em lotes pelo índice.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS sessoes (
+            id TEXT PRIMARY KEY,
+            versao TEXT NOT NULL,
+            expira REAL NOT NULL,
+            dados TEXT NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS idx_sessoes_expira ON sessoes (expira)")
+
+
+def m013_tarefas(db):
+    """
+    Estado das tarefas de manutenção (tarefas.py), para o agendamento
+    sobreviver a reinícios, e a linha de liderança: só o worker dono de
+    um `lider` não expirado roda as tarefas.
+    """
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS tarefas (
+            nome TEXT PRIMARY KEY,
+            proxima REAL NOT NULL,
+            ultima_inicio REAL,
+            ultima_ms REAL,
+            ultimo_status TEXT,
+            ultimo_erro TEXT,
+            resultado TEXT,
+            execucoes INTEGER NOT NULL DEFAULT 0,
+            falhas INTEGER NOT NULL DEFAULT 0,
+            total_ms REAL NOT NULL DEFAULT 0,
+            maximo_ms REAL NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+        """
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS lider (
+            papel TEXT PRIMARY KEY,
+            dono TEXT NOT NULL,
+            expira REAL NOT NULL
+        ) WITHOUT ROWID
+        """
+    )
+
+
+# tabela -> (coluna do período, expressão sobre a data do agendamento)
+RESUMOS = {
+    "resumo_diario": ("data", "{linha}.data"),
+    "resumo_mensal": ("mes", "substr({linha}.data, 1, 7)"),
+}
+
+
+def _resumir(linha, sinal, tabela):
+    """
+    Corpo de trigger que soma (sinal "") ou subtrai (sinal "-") o
+    agendamento `linha` (NEW/OLD) da sua linha em `tabela` (RESUMOS).
+    """
+    coluna, periodo = RESUMOS[tabela]
+    periodo = periodo.format(linha=linha)
+    status = f"COALESCE({linha}.status, 'pendente')"
+    return f"""
+        INSERT INTO {tabela} (
+            {coluna}, barbeiro_id, servico_id,
+            pendentes, confirmados, cancelados, finalizados, receita, minutos
+        )
+        SELECT
+            {periodo}, COALESCE({linha}.barbeiro_id, 0), {linha}.servico_id,
+            {sinal}({status} = 'pendente'),
+            {sinal}({status} = 'confirmado'),
+            {sinal}({status} = 'cancelado'),
+            {sinal}({status} = 'finalizado'),
+            {sinal}(CASE WHEN {status} = 'finalizado' THEN COALESCE(s.preco, 0) ELSE 0 END),
+            {sinal}(CASE WHEN {status} != 'cancelado' THEN COALESCE(s.duracao_min, 0) ELSE 0 END)
+        FROM (SELECT 1) LEFT JOIN servicos s ON s.id = {linha}.servico_id
+        WHERE 1
+        ON CONFLICT ({coluna}, barbeiro_id, servico_id) DO UPDATE SET
+            pendentes = pendentes + excluded.pendentes,
+            confirmados = confirmados + excluded.confirmados,
+            cancelados = cancelados + excluded.cancelados,
+            finalizados = finalizados + excluded.finalizados,
+            receita = receita + excluded.receita,
+            minutos = minutos + excluded.minutos;
+    """
+
+
+def m014_resumo_diario(db):
+    """
+    Totais por dia × barbeiro × serviço (resumo_diario) e por mês ×
+    barbeiro × serviço (resumo_mensal) para os relatórios (relatorios.py):
+    contagem por status, receita (finalizados, preço atual do serviço) e
+    minutos reservados (tudo menos cancelados). Mantidos por triggers como
+    os contadores; um relatório de um ano lê os meses inteiros do mensal e
+    só as pontas do diário, não os agendamentos. barbeiro_id 0 = sem
+    barbeiro.
+    """
+    for tabela, (coluna, periodo) in RESUMOS.items():
+        db.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {tabela} (
+                {coluna} TEXT NOT NULL,
+                barbeiro_id INTEGER NOT NULL,
+                servico_id INTEGER NOT NULL,
+                pendentes INTEGER NOT NULL DEFAULT 0,
+                confirmados INTEGER NOT NULL DEFAULT 0,
+                cancelados INTEGER NOT NULL DEFAULT 0,
+                finalizados INTEGER NOT NULL DEFAULT 0,
+                receita REAL NOT NULL DEFAULT 0,
+                minutos INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY ({coluna}, barbeiro_id, servico_id)
+            ) WITHOUT ROWID
+            """
+        )
+
+        # carga inicial a partir dos dados existentes
+        periodo = periodo.format(linha="a")
+        db.execute(f"DELETE FROM {tabela}")
+        db.execute(
+            f"""
+            INSERT INTO {tabela}
+            SELECT
+                {periodo}, COALESCE(a.barbeiro_id, 0), a.servico_id,
+                SUM(COALESCE(a.status, 'pendente') = 'pendente'),
+                SUM(a.status = 'confirmado'),
+                SUM(a.status = 'cancelado'),
+                SUM(a.status = 'finalizado'),
+                SUM(CASE WHEN a.status = 'finalizado' THEN COALESCE(s.preco, 0) ELSE 0 END),
+                SUM(CASE WHEN COALESCE(a.status, 'pendente') != 'cancelado'
+                         THEN COALESCE(s.duracao_min, 0) ELSE 0 END)
+            FROM agendamentos a
+            LEFT JOIN servicos s ON s.id = a.servico_id
+            GROUP BY {periodo}, COALESCE(a.barbeiro_id, 0), a.servico_id
+            """
+        )
+
+    def resumir(linha, sinal):
+        return "".join(_resumir(linha, sinal, tabela) for tabela in RESUMOS)
+
+    gatilhos = {
+        "trg_resumo_agendamento_insert": (
+            "AFTER INSERT ON agendamentos",
+            resumir("NEW", ""),
+        ),
+        "trg_resumo_agendamento_delete": (
+            "AFTER DELETE ON agendamentos",
+            resumir("OLD", "-"),
+        ),
+        "trg_resumo_agendamento_update": (
+            "AFTER UPDATE OF status, data, barbeiro_id, servico_id ON agendamentos",
+            resumir("OLD", "-") + resumir("NEW", ""),
+        ),
+        # cada linha é de um serviço só: refaz receita/minutos sem reler agendamentos
+        "trg_resumo_servicos_update": (
+            "AFTER UPDATE OF preco, duracao_min ON servicos",
+            "".join(
+                f"""
+                UPDATE {tabela}
+                SET receita = finalizados * NEW.preco,
+                    minutos = (pendentes + confirmados + finalizados) * NEW.duracao_min
+                WHERE servico_id = NEW.id;
+                """
+                for tabela in RESUMOS
+            ),
+        ),
+    }
+
+    for nome, (evento, corpo) in gatilhos.items():
+        db.execute(f"CREATE TRIGGER IF NOT EXISTS {nome} {evento} BEGIN {corpo} END")
+
+
+def m015_receita_preco(db):
+    """
+    O contador 'receita' (m004) soma o preço do serviço na hora em que o
+    agendamento é finalizado; mudar servicos.preco depois deixava o
+    dashboard errado. O trigger corrige pela diferença de preço vezes os
+    finalizados do serviço, lidos de resumo_mensal (m014) em vez de varrer
+    agendamentos. A carga refaz o contador com os preços atuais.
+    """
+    db.execute(
+        """
+        INSERT OR REPLACE INTO contadores (chave, valor)
+        SELECT 'receita', COALESCE(SUM(receita), 0) FROM resumo_mensal
+        """
+    )
+    db.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_contadores_servicos_preco
+        AFTER UPDATE OF preco ON servicos
+        WHEN NEW.preco IS NOT OLD.preco
+        BEGIN
+            UPDATE contadores
+            SET valor = valor + (COALESCE(NEW.preco, 0) - COALESCE(OLD.preco, 0)) * (
+                SELECT COALESCE(SUM(finalizados), 0)
+                FROM resumo_mensal
+                WHERE servico_id = NEW.id
+            )
+            WHERE chave = 'receita';
+        END
+        """
+    )
+
+
+MIGRACOES = [
+    m001_schema_base,
+    m002_indices_agenda,
+    m003_horario_unico,
+    m004_contadores,
+    m005_indice_status_ordenado,
+    m006_horario_unico_por_barbeiro,
+    m007_variantes_imagens,
+    m008_versoes_barbeiro,
+    m009_eventos_agenda,
+    m010_slots,
+    m011_indice_slots_horario,
+    m012_sessoes,
+    m013_tarefas,
+    m014_resumo_diario,
+    m015_receita_preco,
+]
+
+
+# -----------------------------
+# EXECUÇÃO
+# -----------------------------
+def versao_atual(db):
+    return db.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(caminho):
+    """Aplica as migrações pendentes. Retorna a versão final do banco."""
+    db = sqlite3.connect(caminho, isolation_level=None)
+
+    try:
+        db.execute("BEGIN IMMEDIATE")
+
+        # relê dentro da transação: outro worker pode ter migrado antes
+        versao = versao_atual(db)
+
+        for numero, migracao in enumerate(MIGRACOES, start=1):
+            if numero <= versao:
+                continue
+
+            migracao(db)
+            db.execute(f"PRAGMA user_version = {numero}")
+            versao = numero
+
+        db.execute("COMMIT")
+        return versao
+    except Exception:
+        if db.in_transaction:
+            db.execute("ROLLBACK")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import sys
+    import os
+
+    caminho = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.db")
+    )
+
+    print(f"Banco migrado para a versão {migrar(caminho)}")
@@ -0,0 +1,72 @@
+"""
+Paginação por cursor (keyset) sobre agendamentos, ordenada por
+(data, hora, id).
+
+Em vez de OFFSET, cada página continua a partir da última linha da
+anterior, então o custo de uma página não depende de quantas vieram antes
+nem do tamanho da tabela. As consultas precisam selecionar a.data, a.hora
+e a.id.
+"""
+
+import base64
+import binascii
+
+LIMITE_PADRAO = 20
+LIMITE_MAXIMO = 100
+
+
+def codificar_cursor(row):
+    chave = f"{row['data']}|{row['hora']}|{row['id']}"
+    return base64.urlsafe_b64encode(chave.encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    """Devolve (data, hora, id) ou None se o cursor estiver ausente/inválido."""
+    if not cursor:
+        return None
+
+    try:
+        data, hora, id_ = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return data, hora, int(id_)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+
+
+def ler_limite(valor):
+    try:
+        return max(1, min(int(valor), LIMITE_MAXIMO))
+    except (TypeError, ValueError):
+        return LIMITE_PADRAO
+
+
+def paginar(db, consulta, condicoes, params, desc=False, cursor=None, limite=None):
+    """
+    Executa `consulta` (SELECT ... FROM agendamentos a ..., sem WHERE/ORDER BY)
+    com as condições dadas (parâmetros nomeados em `params`) e devolve
+    (linhas, proximo_cursor).
+    """
+    condicoes = list(condicoes)
+    params = dict(params)
+    limite = limite or LIMITE_PADRAO
+
+    chave = decodificar_cursor(cursor)
+    if chave:
+        condicoes.append(
+            f"(a.data, a.hora, a.id) {'<' if desc else '>'} "
+            "(:cursor_data, :cursor_hora, :cursor_id)"
+        )
+        params.update(cursor_data=chave[0], cursor_hora=chave[1], cursor_id=chave[2])
+
+    sql = consulta
+    if condicoes:
+        sql += " WHERE " + " AND ".join(f"({c})" for c in condicoes)
+
+    direcao = "DESC" if desc else "ASC"
+    sql += f" ORDER BY a.data {direcao}, a.hora {direcao}, a.id {direcao} LIMIT :limite"
+    params["limite"] = limite + 1
+
+    rows = db.execute(sql, params).fetchall()
+
+    proximo = codificar_cursor(rows[limite - 1]) if len(rows) > limite else None
+
+    return rows[:limite], proximo
@@ -0,0 +1,81 @@
+"""
+Indicadores do dashboard do admin.
+
+Os totais vêm da tabela contadores (mantida por triggers, ver
+migrations.m004_contadores), então o custo não cresce com o tamanho de
+agendamentos. O único trabalho proporcional a dados é o dia de hoje,
+lido pelo índice de data.
+"""
+
+from datetime import date
+
+from agenda import dia_semana_sqlite
+import catalogo
+
+STATUS = ("pendente", "confirmado", "cancelado", "finalizado")
+
+
+def _contadores(db):
+    rows = db.execute("SELECT chave, valor FROM contadores").fetchall()
+    return {r["chave"]: r["valor"] for r in rows}
+
+
+def ocupacao_hoje(db, hoje=None):
+    """Agendamentos ativos de hoje por barbeiro, contra os horários do dia."""
+    hoje = hoje or date.today()
+
+    rows = db.execute(
+        """
+        WITH marcados AS (
+            SELECT barbeiro_id, COUNT(*) AS total
+            FROM agendamentos
+            WHERE data = ?
+              AND status IN ('pendente', 'confirmado')
+            GROUP BY barbeiro_id
+        ),
+        slots AS (
+            SELECT barbeiro_id, COUNT(*) AS total
+            FROM horarios
+            WHERE dia_semana = ?
+              AND ativo = 1
+            GROUP BY barbeiro_id
+        )
+        SELECT b.id, b.nome,
+               COALESCE(m.total, 0) AS agendados,
+               COALESCE(s.total, 0) AS slots
+        FROM barbeiros b
+        LEFT JOIN marcados m ON m.barbeiro_id = b.id
+        LEFT JOIN slots s ON s.barbeiro_id = b.id
+        WHERE b.ativo = 1
+        ORDER BY b.nome
+        """,
+        (hoje.isoformat(), dia_semana_sqlite(hoje)),
+    ).fetchall()
+
+    return [
+        {
+            "nome": r["nome"],
+            "agendados": r["agendados"],
+            "slots": r["slots"],
+            "ocupacao": round(100 * r["agendados"] / r["slots"]) if r["slots"] else 0,
+        }
+        for r in rows
+    ]
+
+
+def resumo(db, hoje=None):
+    contadores = _contadores(db)
+    barbeiros = ocupacao_hoje(db, hoje)
+
+    por_status = {s: int(contadores.get(f"status:{s}", 0)) for s in STATUS}
+
+    return {
+        "total_clientes": int(contadores.get("clientes", 0)),
+        "total_agendamentos": int(contadores.get("agendamentos", 0)),
+        "total_pendentes": por_status["pendente"],
+        "total_servicos": len(catalogo.servicos_ativos(db)),
+        "por_status": por_status,
+        "receita": contadores.get("receita", 0),
+        "agendamentos_hoje": sum(b["agendados"] for b in barbeiros),
+        "ocupacao_barbeiros": barbeiros,
+    }
@@ -0,0 +1,255 @@
+"""
+Relatórios do admin: receita, ocupação por barbeiro, cancelamentos e
+serviços mais pedidos num período.
+
+Tudo sai de resumo_diario e resumo_mensal (migração m014), que os
+triggers mantêm a cada reserva, mudança de status ou exclusão: um período
+longo lê os meses inteiros do mensal e só os dias das pontas do diário,
+qualquer que seja o tamanho de agendamentos. Nomes e horários vêm do
+cache do catálogo.
+
+Ocupação segue o dashboard (painel.py): agendamentos que ocuparam horário
+(tudo menos cancelados) sobre os horários do modelo semanal atual no
+período. O sistema não tem status de falta; agendamentos passados ainda
+pendentes aparecem como "sem confirmação".
+"""
+
+import csv
+import io
+from datetime import date, timedelta
+
+import catalogo
+from agenda import dia_semana_sqlite
+
+PERIODO_PADRAO = 30  # dias, quando a querystring não diz
+SERIE_DIARIA = 62  # até quantos dias a evolução é por dia (e só lê o diário)
+
+_COLUNAS = """
+    barbeiro_id, servico_id,
+    pendentes, confirmados, cancelados, finalizados, receita, minutos
+"""
+
+_SOMAS = """
+    SUM(pendentes) AS pendentes,
+    SUM(confirmados) AS confirmados,
+    SUM(cancelados) AS cancelados,
+    SUM(finalizados) AS finalizados,
+    SUM(receita) AS receita,
+    SUM(minutos) AS minutos
+"""
+
+# tipo -> colunas do CSV (na ordem)
+COLUNAS_CSV = {
+    "barbeiros": (
+        "barbeiro", "agendamentos", "finalizados", "cancelados", "taxa_cancelamento",
+        "sem_confirmacao", "receita", "ticket_medio", "minutos", "horarios", "ocupacao",
+    ),
+    "servicos": (
+        "servico", "agendamentos", "finalizados", "cancelados", "taxa_cancelamento",
+        "receita", "ticket_medio", "minutos",
+    ),
+    "periodo": (
+        "periodo", "agendamentos", "finalizados", "cancelados", "taxa_cancelamento",
+        "receita", "ticket_medio", "minutos",
+    ),
+}
+
+
+def periodo(args, hoje=None):
+    """(início, fim), inclusivos, de ?de=&ate=; None se as datas forem inválidas."""
+    hoje = hoje or date.today()
+
+    try:
+        fim = date.fromisoformat(args["ate"]) if args.get("ate") else hoje
+        inicio = (
+            date.fromisoformat(args["de"])
+            if args.get("de")
+            else fim - timedelta(days=PERIODO_PADRAO - 1)
+        )
+    except ValueError:
+        return None
+
+    return (inicio, fim) if inicio <= fim else (fim, inicio)
+
+
+def _mes_seguinte(dia):
+    return (dia.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _origem(inicio, fim):
+    """
+    Subconsulta (sql, params) com as linhas de [inicio, fim], colunas
+    dia (NULL nas mensais), mes, barbeiro_id, servico_id e os totais.
+    """
+    diario = f"SELECT data AS dia, substr(data, 1, 7) AS mes, {_COLUNAS} FROM resumo_diario"
+
+    # meses inteiros dentro do período: [primeiro, depois)
+    primeiro = inicio if inicio.day == 1 else _mes_seguinte(inicio)
+    depois = _mes_seguinte(fim)
+    if depois - timedelta(days=1) != fim:
+        depois = fim.replace(day=1)
+
+    if (fim - inicio).days < SERIE_DIARIA or primeiro >= depois:
+        return f"{diario} WHERE data BETWEEN ? AND ?", (inicio.isoformat(), fim.isoformat())
+
+    return (
+        f"""
+        {diario} WHERE data BETWEEN ? AND ?
+        UNION ALL
+        {diario} WHERE data BETWEEN ? AND ?
+        UNION ALL
+        SELECT NULL, mes, {_COLUNAS} FROM resumo_mensal WHERE mes BETWEEN ? AND ?
+        """,
+        (
+            inicio.isoformat(),
+            (primeiro - timedelta(days=1)).isoformat(),
+            depois.isoformat(),
+            fim.isoformat(),
+            primeiro.isoformat()[:7],
+            (depois - timedelta(days=1)).isoformat()[:7],
+        ),
+    )
+
+
+def _somar(db, inicio, fim, chave=None):
+    """Totais de [inicio, fim], agrupados pela coluna `chave` de _origem."""
+    origem, params = _origem(inicio, fim)
+    if chave is None:
+        return db.execute(f"SELECT {_SOMAS} FROM ({origem})", params).fetchone()
+
+    return db.execute(
+        f"SELECT {chave}, {_SOMAS} FROM ({origem}) GROUP BY {chave} ORDER BY {chave}",
+        params,
+    ).fetchall()
+
+
+def _indicadores(r):
+    """Linha de somas -> números derivados (taxas, ticket médio)."""
+    pendentes = r["pendentes"] or 0
+    finalizados = r["finalizados"] or 0
+    cancelados = r["cancelados"] or 0
+    total = pendentes + (r["confirmados"] or 0) + cancelados + finalizados
+    receita = r["receita"] or 0
+
+    return {
+        "agendamentos": total,
+        "pendentes": pendentes,
+        "confirmados": r["confirmados"] or 0,
+        "finalizados": finalizados,
+        "cancelados": cancelados,
+        "taxa_cancelamento": round(100 * cancelados / total, 1) if total else 0,
+        "receita": round(receita, 2),
+        "ticket_medio": round(receita / finalizados, 2) if finalizados else 0,
+        "minutos": r["minutos"] or 0,
+    }
+
+
+def totais(db, inicio, fim):
+    return _indicadores(_somar(db, inicio, fim))
+
+
+def _ocorrencias(inicio, fim):
+    """Quantas vezes cada dia da semana (0=domingo) cai em [inicio, fim]."""
+    dias = (fim - inicio).days + 1
+    contagem = {d: dias // 7 for d in range(7)}
+    for i in range(dias % 7):
+        contagem[dia_semana_sqlite(inicio + timedelta(days=i))] += 1
+    return contagem
+
+
+def por_barbeiro(db, inicio, fim, hoje=None):
+    hoje = hoje or date.today()
+    somas = {r["barbeiro_id"]: r for r in _somar(db, inicio, fim, "barbeiro_id")}
+
+    # pendentes de dias que já passaram: ninguém confirmou
+    passado = min(fim, hoje - timedelta(days=1))
+    sem_confirmacao = (
+        {
+            r["barbeiro_id"]: r["pendentes"]
+            for r in _somar(db, inicio, passado, "barbeiro_id")
+        }
+        if passado >= inicio
+        else {}
+    )
+
+    ocorrencias = _ocorrencias(inicio, fim)
+    nomes = {b["id"]: b["nome"] for b in catalogo.barbeiros(db)}
+    linhas = []
+
+    # barbeiros ativos sem nenhum agendamento também aparecem (ocupação 0)
+    vazia = dict.fromkeys(
+        ("pendentes", "confirmados", "cancelados", "finalizados", "receita", "minutos")
+    )
+    for b in catalogo.barbeiros_ativos(db):
+        somas.setdefault(b["id"], vazia)
+
+    for barbeiro_id, r in somas.items():
+        linha = _indicadores(r)
+        modelo = catalogo.modelo_semanal(db, barbeiro_id) if barbeiro_id else {}
+        horarios = sum(len(horas) * ocorrencias[dia] for dia, horas in modelo.items())
+        ocupados = linha["agendamentos"] - linha["cancelados"]
+
+        linhas.append(
+            {
+                "barbeiro_id": barbeiro_id,
+                "barbeiro": nomes.get(barbeiro_id, "(sem barbeiro)"),
+                **linha,
+                "sem_confirmacao": sem_confirmacao.get(barbeiro_id) or 0,
+                "horarios": horarios,
+                "ocupacao": round(100 * ocupados / horarios, 1) if horarios else 0,
+            }
+        )
+
+    return sorted(linhas, key=lambda l: l["receita"], reverse=True)
+
+
+def por_servico(db, inicio, fim):
+    """Serviços do mais ao menos pedido."""
+    nomes = {s["id"]: s["nome"] for s in catalogo.servicos(db)}
+
+    linhas = [
+        {
+            "servico_id": r["servico_id"],
+            "servico": nomes.get(r["servico_id"], "(removido)"),
+            **_indicadores(r),
+        }
+        for r in _somar(db, inicio, fim, "servico_id")
+    ]
+
+    return sorted(linhas, key=lambda l: l["agendamentos"], reverse=True)
+
+
+def serie(db, inicio, fim):
+    """Evolução no período: por dia até SERIE_DIARIA dias, por mês acima disso."""
+    chave = "dia" if (fim - inicio).days < SERIE_DIARIA else "mes"
+
+    return [
+        {"periodo": r[chave], **_indicadores(r)}
+        for r in _somar(db, inicio, fim, chave)
+    ]
+
+
+def relatorio(db, inicio, fim):
+    return {
+        "totais": totais(db, inicio, fim),
+        "barbeiros": por_barbeiro(db, inicio, fim),
+        "servicos": por_servico(db, inicio, fim),
+        "serie": serie(db, inicio, fim),
+    }
+
+
+def exportar_csv(db, tipo, inicio, fim):
+    """CSV (separado por ';', como o Excel em português abre direto)."""
+    linhas = {
+        "barbeiros": por_barbeiro,
+        "servicos": por_servico,
+        "periodo": serie,
+    }[tipo](db, inicio, fim)
+
+    saida = io.StringIO()
+    escritor = csv.DictWriter(
+        saida, COLUNAS_CSV[tipo], delimiter=";", extrasaction="ignore", lineterminator="\n"
+    )
+    escritor.writeheader()
+    escritor.writerows(linhas)
+    return saida.getvalue()
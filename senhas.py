@@ -0,0 +1,158 @@
+"""
+Hash de senhas fora do worker web.
+
+O KDF (scrypt/pbkdf2) é CPU pura e leva dezenas de ms por login. Rodado
+inline, uma leva de logins ocupa todas as threads/CPUs e as páginas do
+agendamento esperam. Aqui o trabalho vai para um pool de threads por
+worker com no máximo SENHA_CONCORRENCIA hashes ao mesmo tempo (hashlib
+solta o GIL durante o scrypt/pbkdf2, então as outras threads seguem
+atendendo). A fila também é curta: cada request esperando
+segura uma thread do worker, então além de SENHA_FILA na espera, ou de
+SENHA_FILA_TIMEOUT segundos nela, o request recebe SenhaOcupada (o login
+responde 503 em vez de tomar as threads das outras páginas).
+
+Política: SENHA_METODO (formato do werkzeug, ex. "scrypt:32768:8:1" ou
+"pbkdf2:sha256:1000000"). Um hash antigo, de outro método, continua
+válido; no login ele é refeito com o método atual em segundo plano.
+
+Configuração (app.config ou variável de ambiente): SENHA_METODO,
+SENHA_CONCORRENCIA, SENHA_FILA, SENHA_FILA_TIMEOUT.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import check_password_hash, generate_password_hash
+
+METODO = "scrypt:32768:8:1"
+CONCORRENCIA = 2
+FILA = 2
+FILA_TIMEOUT = 5
+
+log = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_estado = {"pid": None, "executor": None, "vagas": None, "fila": None}
+_prefixos = {}
+
+estatisticas = {"hashes": 0, "verificacoes": 0, "recusadas": 0, "atualizadas": 0}
+
+
+class SenhaOcupada(Exception):
+    """Fila de hash cheia: tentar de novo em instantes."""
+
+
+def _config(chave, padrao):
+    nome = f"SENHA_{chave}"
+    if has_app_context() and nome in current_app.config:
+        return current_app.config[nome]
+    if nome in os.environ:
+        return type(padrao)(os.environ[nome])
+    return padrao
+
+
+# -----------------------------
+# POOL
+# -----------------------------
+def _pool():
+    """Executor e semáforos do processo atual (recriados depois de fork)."""
+    with _lock:
+        if _estado["pid"] != os.getpid():
+            concorrencia = _config("CONCORRENCIA", CONCORRENCIA)
+
+            _estado.update(
+                pid=os.getpid(),
+                executor=ThreadPoolExecutor(concorrencia, thread_name_prefix="senhas"),
+                vagas=threading.BoundedSemaphore(concorrencia),
+                fila=threading.BoundedSemaphore(concorrencia + _config("FILA", FILA)),
+            )
+
+        return _estado["executor"], _estado["vagas"], _estado["fila"]
+
+
+def _executar(funcao, *args):
+    executor, vagas, fila = _pool()
+
+    if not fila.acquire(blocking=False):
+        estatisticas["recusadas"] += 1
+        raise SenhaOcupada()
+
+    try:
+        if not vagas.acquire(timeout=_config("FILA_TIMEOUT", FILA_TIMEOUT)):
+            estatisticas["recusadas"] += 1
+            raise SenhaOcupada()
+
+        try:
+            return executor.submit(funcao, *args).result()
+        finally:
+            vagas.release()
+    finally:
+        fila.release()
+
+
+# -----------------------------
+# API
+# -----------------------------
+def metodo():
+    return _config("METODO", METODO)
+
+
+def gerar(senha):
+    estatisticas["hashes"] += 1
+    return _executar(generate_password_hash, senha, metodo())
+
+
+def verificar(senha_hash, senha):
+    estatisticas["verificacoes"] += 1
+    return _executar(check_password_hash, senha_hash, senha)
+
+
+def _prefixo(metodo_hash):
+    """Prefixo gravado pelo werkzeug ("pbkdf2:sha256" -> "pbkdf2:sha256:1000000")."""
+    if metodo_hash not in _prefixos:
+        _prefixos[metodo_hash] = generate_password_hash("", metodo_hash).split("$")[0]
+    return _prefixos[metodo_hash]
+
+
+def desatualizado(senha_hash):
+    return senha_hash.split("$", 1)[0] != _prefixo(metodo())
+
+
+def atualizar_depois(caminho, cliente_id, senha_hash, senha):
+    """
+    Refaz o hash com o método atual sem segurar o request. Só grava se a
+    senha não mudou nesse meio tempo; com o pool cheio, fica para o
+    próximo login.
+    """
+    executor, vagas, _ = _pool()
+    if not vagas.acquire(blocking=False):
+        return
+
+    def gravar(futuro):
+        try:
+            nova = futuro.result()
+            conexao = sqlite3.connect(caminho, timeout=10)
+            try:
+                conexao.execute(
+                    "UPDATE clientes SET senha_hash = ? WHERE id = ? AND senha_hash = ?",
+                    (nova, cliente_id, senha_hash),
+                )
+                conexao.commit()
+            finally:
+                conexao.close()
+            estatisticas["atualizadas"] += 1
+        except Exception:
+            log.exception("falha ao atualizar o hash do cliente %s", cliente_id)
+        finally:
+            vagas.release()
+
+    try:
+        futuro = executor.submit(generate_password_hash, senha, metodo())
+    except Exception:
+        vagas.release()
+        raise
+    futuro.add_done_callback(gravar)
@@ -0,0 +1,390 @@
+"""
+Sessões guardadas no servidor.
+
+Com a sessão padrão do Flask, o estado do agendamento (`agendamento`,
+`agendamento_sucesso`) vai inteiro no cookie: cada etapa do funil
+reassina e reenvia o cookie, e cada request decodifica e confere a
+assinatura. Aqui o cookie leva só "<id>.<versão>" e os dados ficam num
+armazém do servidor:
+
+    sqlite    tabela `sessoes` (migração m012), compartilhada pelos workers
+    arquivos  um arquivo por sessão em SESSAO_PASTA (mesma máquina)
+    cookie    a sessão assinada do Flask, como antes
+
+Na frente do armazém, cada worker tem um LRU em memória. A versão no
+cookie muda a cada gravação, então um LRU com a versão do cookie está em
+dia mesmo que outro worker tenha gravado antes; se não bate, lê do
+armazém. Sessões expiradas saem em lotes (`coletar`), no máximo um lote
+a cada SESSAO_GC_INTERVALO segundos por worker.
+
+Configuração: SESSAO_BACKEND, SESSAO_LRU (0 desliga), SESSAO_PASTA,
+SESSAO_GC_INTERVALO, SESSAO_GC_LOTE. A validade é a
+PERMANENT_SESSION_LIFETIME do Flask.
+"""
+
+import os
+import re
+import secrets
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SecureCookieSession, SessionInterface, session_json_serializer
+from itsdangerous import BadSignature
+
+from db import PRAGMAS_PADRAO, POOL_TAMANHO_PADRAO, Pool, caminho_db
+
+BACKEND = "sqlite"
+LRU = 2048
+GC_INTERVALO = 300
+GC_LOTE = 500
+
+_ID_VALIDO = re.compile(r"^[A-Za-z0-9_-]{43}$")
+
+estatisticas = {"lru_hits": 0, "leituras": 0, "gravacoes": 0, "renovadas": 0, "coletadas": 0}
+
+
+class Sessao(SecureCookieSession):
+    """Sessão com id no servidor; `renovar` troca o id na próxima gravação."""
+
+    def __init__(self, dados=None, sid=None, versao=None, expira=0.0):
+        super().__init__(dados)
+        self.sid = sid
+        self.versao = versao
+        self.expira = expira
+        self.renovar = False
+
+    def clear(self):
+        # login e logout limpam a sessão: o id antigo deixa de valer
+        # (evita fixação de sessão)
+        self.renovar = True
+        super().clear()
+
+
+# -----------------------------
+# ARMAZÉNS
+# -----------------------------
+class ArmazemSQLite:
+    def __init__(self, app):
+        self.app = app
+        self._pool = None
+
+    def _conexao(self):
+        # pool próprio: o commit da sessão não pode levar junto uma
+        # transação que a view deixou aberta em g.db. Como db.get_pool,
+        # vale por processo e por arquivo (DATABASE pode mudar em testes)
+        caminho = caminho_db(self.app)
+        pool = self._pool
+        if pool is None or pool.pid != os.getpid() or pool.caminho != caminho:
+            if pool is not None and pool.pid == os.getpid():
+                pool.fechar()
+            tamanho = self.app.config.get("DB_POOL_SIZE", POOL_TAMANHO_PADRAO)
+            pragmas = {**PRAGMAS_PADRAO, **self.app.config.get("SQLITE_PRAGMAS", {})}
+            self._pool = Pool(caminho, tamanho, pragmas)
+        return self._pool
+
+    def _executar(self, sql, parametros, gravar=False):
+        pool = self._conexao()
+        db = pool.obter()
+        try:
+            cursor = db.execute(sql, parametros)
+            if gravar:
+                db.commit()
+                return cursor.rowcount
+            return cursor.fetchone()
+        finally:
+            pool.devolver(db)
+
+    def ler(self, sid, agora):
+        """(versao, expira, dados) ou None."""
+        row = self._executar(
+            "SELECT versao, expira, dados FROM sessoes WHERE id = ? AND expira > ?",
+            (sid, agora),
+        )
+        return tuple(row) if row else None
+
+    def gravar(self, sid, versao, expira, dados):
+        self._executar(
+            "INSERT OR REPLACE INTO sessoes (id, versao, expira, dados) VALUES (?, ?, ?, ?)",
+            (sid, versao, expira, dados),
+            gravar=True,
+        )
+
+    def tocar(self, sid, expira):
+        self._executar(
+            "UPDATE sessoes SET expira = ? WHERE id = ?", (expira, sid), gravar=True
+        )
+
+    def apagar(self, sid):
+        self._executar("DELETE FROM sessoes WHERE id = ?", (sid,), gravar=True)
+
+    def coletar(self, agora, lote):
+        return self._executar(
+            """
+            DELETE FROM sessoes WHERE id IN (
+                SELECT id FROM sessoes WHERE expira < ? LIMIT ?
+            )
+            """,
+            (agora, lote),
+            gravar=True,
+        )
+
+
+class ArmazemArquivos:
+    """
+    Um arquivo por sessão: primeira linha é a versão, o resto os dados.
+    A validade é o mtime do arquivo, então a coleta só precisa de stat.
+    """
+
+    def __init__(self, app):
+        self.pasta = app.config.get("SESSAO_PASTA") or os.path.join(app.root_path, "sessoes")
+        os.makedirs(self.pasta, exist_ok=True)
+
+    def ler(self, sid, agora):
+        try:
+            with open(os.path.join(self.pasta, sid), encoding="utf-8") as arquivo:
+                expira = os.fstat(arquivo.fileno()).st_mtime
+                if expira <= agora:
+                    return None
+                versao = arquivo.readline().rstrip("\n")
+                return versao, expira, arquivo.read()
+        except FileNotFoundError:
+            return None
+
+    def gravar(self, sid, versao, expira, dados):
+        # escreve ao lado e troca: quem lê nunca vê o arquivo pela metade
+        descritor, temporario = tempfile.mkstemp(dir=self.pasta, prefix=".tmp-")
+        try:
+            with os.fdopen(descritor, "w", encoding="utf-8") as arquivo:
+                arquivo.write(f"{versao}\n{dados}")
+            os.utime(temporario, (expira, expira))
+            os.replace(temporario, os.path.join(self.pasta, sid))
+        except BaseException:
+            os.unlink(temporario)
+            raise
+
+    def tocar(self, sid, expira):
+        try:
+            os.utime(os.path.join(self.pasta, sid), (expira, expira))
+        except FileNotFoundError:
+            pass
+
+    def apagar(self, sid):
+        try:
+            os.unlink(os.path.join(self.pasta, sid))
+        except FileNotFoundError:
+            pass
+
+    def coletar(self, agora, lote):
+        apagadas = 0
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if apagadas >= lote:
+                    break
+                try:
+                    if entrada.stat().st_mtime < agora:
+                        os.unlink(entrada.path)
+                        apagadas += 1
+                except FileNotFoundError:
+                    pass
+        return apagadas
+
+
+ARMAZENS = {"sqlite": ArmazemSQLite, "arquivos": ArmazemArquivos}
+
+
+# -----------------------------
+# INTERFACE DO FLASK
+# -----------------------------
+class InterfaceSessoes(SessionInterface):
+    session_class = Sessao
+    serializer = session_json_serializer
+
+    def __init__(self, armazem, lru):
+        self.armazem = armazem
+        self.lru_maximo = lru
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._proxima_coleta = 0.0
+
+    # --- LRU ---
+    def _lembrar(self, sid, versao, expira, dados):
+        if not self.lru_maximo:
+            return
+        with self._lock:
+            self._lru[sid] = (versao, expira, dados)
+            self._lru.move_to_end(sid)
+            while len(self._lru) > self.lru_maximo:
+                self._lru.popitem(last=False)
+
+    def _esquecer(self, sid):
+        with self._lock:
+            self._lru.pop(sid, None)
+
+    def _estender(self, sid, expira):
+        with self._lock:
+            entrada = self._lru.get(sid)
+            if entrada is not None:
+                self._lru[sid] = (entrada[0], expira, entrada[2])
+
+    def _do_lru(self, sid, versao):
+        with self._lock:
+            entrada = self._lru.get(sid)
+            if entrada is None or entrada[0] != versao:
+                return None
+            self._lru.move_to_end(sid)
+            return entrada
+
+    # --- leitura ---
+    def carregar(self, app, valor):
+        """Sessão a partir do valor do cookie ("<id>.<versão>")."""
+        sid, _, versao = (valor or "").partition(".")
+        if not _ID_VALIDO.match(sid):
+            return self.session_class()
+
+        agora = time.time()
+        entrada = self._do_lru(sid, versao)
+        if entrada is not None and entrada[1] > agora:
+            estatisticas["lru_hits"] += 1
+        else:
+            estatisticas["leituras"] += 1
+            entrada = self.armazem.ler(sid, agora)
+            if entrada is None:
+                self._esquecer(sid)
+                return self.session_class()
+            self._lembrar(sid, *entrada)
+
+        versao, expira, dados = entrada
+        return self.session_class(self.serializer.loads(dados), sid, versao, expira)
+
+    def open_session(self, app, request):
+        return self.carregar(app, request.cookies.get(self.get_cookie_name(app)))
+
+    # --- gravação ---
+    def gravar(self, app, dados, sid=None):
+        """Grava `dados` (novo id se não vier um); retorna o valor do cookie."""
+        sid = sid or secrets.token_urlsafe(32)
+        versao = secrets.token_hex(4)
+        expira = time.time() + app.permanent_session_lifetime.total_seconds()
+        texto = self.serializer.dumps(dict(dados))
+
+        self.armazem.gravar(sid, versao, expira, texto)
+        self._lembrar(sid, versao, expira, texto)
+        estatisticas["gravacoes"] += 1
+        return f"{sid}.{versao}"
+
+    def _apagar(self, sid):
+        self.armazem.apagar(sid)
+        self._esquecer(sid)
+
+    def _cookie(self, app):
+        return {
+            "domain": self.get_cookie_domain(app),
+            "path": self.get_cookie_path(app),
+            "secure": self.get_cookie_secure(app),
+            "partitioned": self.get_cookie_partitioned(app),
+            "samesite": self.get_cookie_samesite(app),
+            "httponly": self.get_cookie_httponly(app),
+        }
+
+    def save_session(self, app, session, response):
+        nome = self.get_cookie_name(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        self._talvez_coletar(app)
+
+        if not session:
+            if session.sid:
+                self._apagar(session.sid)
+                response.delete_cookie(nome, **self._cookie(app))
+                response.vary.add("Cookie")
+            return
+
+        if session.renovar and session.sid:
+            self._apagar(session.sid)
+            session.sid = None
+
+        if session.sid and not session.modified:
+            # sem mudança: só estende a validade quando passou da metade
+            vida = app.permanent_session_lifetime.total_seconds()
+            agora = time.time()
+            if session.expira - agora > vida / 2:
+                return
+            session.expira = agora + vida
+            self.armazem.tocar(session.sid, session.expira)
+            self._estender(session.sid, session.expira)
+            estatisticas["renovadas"] += 1
+            if not session.permanent:
+                return
+            valor = f"{session.sid}.{session.versao}"
+        else:
+            valor = self.gravar(app, session, session.sid)
+
+        response.set_cookie(
+            nome, valor, expires=self.get_expiration_time(app, session), **self._cookie(app)
+        )
+        response.vary.add("Cookie")
+
+    # --- coleta ---
+    def coletar(self, app, lote=None):
+        """Apaga um lote de sessões expiradas. Retorna quantas saíram."""
+        lote = lote or app.config.get("SESSAO_GC_LOTE", GC_LOTE)
+        apagadas = self.armazem.coletar(time.time(), lote)
+        estatisticas["coletadas"] += apagadas
+        return apagadas
+
+    def _talvez_coletar(self, app):
+        agora = time.monotonic()
+        with self._lock:
+            if agora < self._proxima_coleta:
+                return
+            self._proxima_coleta = agora + app.config.get("SESSAO_GC_INTERVALO", GC_INTERVALO)
+        self.coletar(app)
+
+
+# -----------------------------
+# API
+# -----------------------------
+def registrar(app):
+    backend = app.config.get("SESSAO_BACKEND", BACKEND)
+    if backend == "cookie":
+        return
+
+    armazem = ARMAZENS[backend](app)
+    app.session_interface = InterfaceSessoes(armazem, app.config.get("SESSAO_LRU", LRU))
+
+
+def carregar(app, valor):
+    """Dados da sessão a partir do valor do cookie, fora de um request (asgi.py)."""
+    interface = app.session_interface
+    if isinstance(interface, InterfaceSessoes):
+        return interface.carregar(app, valor)
+
+    if not valor:
+        return {}
+
+    serializer = interface.get_signing_serializer(app)
+    try:
+        return serializer.loads(
+            valor, max_age=int(app.permanent_session_lifetime.total_seconds())
+        )
+    except BadSignature:
+        return {}
+
+
+def criar(app, dados):
+    """Cria uma sessão com `dados` e retorna o valor do cookie (benchmarks)."""
+    interface = app.session_interface
+    if isinstance(interface, InterfaceSessoes):
+        return interface.gravar(app, dados)
+    return interface.get_signing_serializer(app).dumps(dados)
+
+
+def coletar(app, lote=None):
+    """Lote de coleta das sessões expiradas (0 se a sessão vai no cookie)."""
+    interface = app.session_interface
+    if isinstance(interface, InterfaceSessoes):
+        return interface.coletar(app, lote)
+    return 0
@@ -0,0 +1,116 @@
+"""
+Horizonte da tabela `slots` (migração m010).
+
+Os triggers mantêm os slots em dia com horarios e agendamentos; aqui só
+se decide QUAIS dias estão materializados. Cada dia em calendario_slots
+tem seus slots gerados (trigger de INSERT) e, ao sair, apagados (trigger
+de DELETE). estender() é idempotente e roda em lote numa transação: a
+subida do app e o primeiro request de cada dia avançam a janela, os
+demais só conferem MIN/MAX da chave primária.
+
+Reconstruir tudo (ex.: depois de mexer no banco à mão):
+    python slots.py [caminho/do/banco.db]
+"""
+
+import sqlite3
+from datetime import date, timedelta
+
+HORIZONTE = 60  # dias a partir de hoje, inclusive
+
+
+def _dia_semana_sqlite(dia):
+    # 0=domingo ... 6=sábado, como em horarios.dia_semana
+    return (dia.weekday() + 1) % 7
+
+
+def janela(db):
+    """(primeiro, último) dia materializado, ou (None, None)."""
+    primeiro, ultimo = db.execute(
+        "SELECT MIN(data), MAX(data) FROM calendario_slots"
+    ).fetchone()
+    return primeiro, ultimo
+
+
+def estender(db, hoje=None, horizonte=None, do_zero=False):
+    """
+    Deixa materializados exatamente os dias [hoje, hoje + horizonte); com
+    `do_zero`, gera todos de novo. Retorna quantos dias entraram.
+    """
+    hoje = hoje or date.today()
+    horizonte = horizonte or HORIZONTE
+    dias = [hoje + timedelta(days=i) for i in range(horizonte)]
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if do_zero:
+            db.execute("DELETE FROM calendario_slots")
+        else:
+            # outro worker pode ter estendido enquanto esperávamos o lock
+            db.execute(
+                "DELETE FROM calendario_slots WHERE data < ? OR data > ?",
+                (dias[0].isoformat(), dias[-1].isoformat()),
+            )
+        antes = db.execute("SELECT COUNT(*) FROM calendario_slots").fetchone()[0]
+
+        db.executemany(
+            "INSERT OR IGNORE INTO calendario_slots (data, dia_semana) VALUES (?, ?)",
+            [(d.isoformat(), _dia_semana_sqlite(d)) for d in dias],
+        )
+        depois = db.execute("SELECT COUNT(*) FROM calendario_slots").fetchone()[0]
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    return depois - antes
+
+
+def cobre(db, inicio, fim, horizonte=None):
+    """
+    True se todos os dias de [inicio, fim) estão materializados. Avança a
+    janela quando ela ficou para trás (virada do dia).
+    """
+    hoje = date.today()
+    horizonte = horizonte or HORIZONTE
+    primeiro, ultimo = janela(db)
+    esperado = (hoje + timedelta(days=horizonte - 1)).isoformat()
+
+    if primeiro != hoje.isoformat() or ultimo != esperado:
+        if db.in_transaction:
+            return False
+        estender(db, hoje, horizonte)
+        primeiro, ultimo = hoje.isoformat(), esperado
+
+    return primeiro <= inicio.isoformat() and (fim - timedelta(days=1)).isoformat() <= ultimo
+
+
+def preparar(caminho):
+    """Gera a janela na subida do app, para o primeiro request não pagar."""
+    conexao = sqlite3.connect(caminho)
+    try:
+        cobre(conexao, date.today(), date.today())
+    finally:
+        conexao.close()
+
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from migrations import migrar
+
+    caminho = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join(os.path.dirname(os.path.abspath(__file__)), "database.db")
+    )
+    migrar(caminho)
+
+    conexao = sqlite3.connect(caminho)
+    try:
+        dias = estender(conexao, do_zero=True)
+        total = conexao.execute("SELECT COUNT(*) FROM slots").fetchone()[0]
+    finally:
+        conexao.close()
+
+    print(f"{dias} dias, {total} slots materializados")
@@ -99,10 +99,25 @@ document.addEventListener("DOMContentLoaded", () => {
 });
 
 
+// escolhe a variante WebP mais próxima da largura do card
+function melhorVariante(srcset, largura) {
+  const opcoes = srcset
+    .split(",")
+    .map(item => item.trim().split(" "))
+    .map(([url, w]) => ({ url, w: parseInt(w, 10) }))
+    .sort((a, b) => a.w - b.w);
+
+  const alvo = largura * (window.devicePixelRatio || 1);
+  return (opcoes.find(o => o.w >= alvo) || opcoes[opcoes.length - 1]).url;
+}
+
 document.querySelectorAll('.service-card').forEach(card => {
-    const img = card.dataset.image;
-  if (img) {
-    card.style.backgroundImage =
-    `url('/static/uploads/servicos/${img}')`;
-    }
-  });
+  const img = card.dataset.image;
+  const variantes = card.dataset.imageSet;
+
+  if (variantes) {
+    card.style.backgroundImage = `url('${melhorVariante(variantes, card.clientWidth)}')`;
+  } else if (img) {
+    card.style.backgroundImage = `url('${img}')`;
+  }
+});
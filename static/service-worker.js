@@ -1,9 +1,8 @@
-self.addEventListener("install", event => {
-    self.skipWaiting();
-});
+// Substituído por /service-worker.js (escopo na raiz).
+// Quem ainda tem este registrado em /static/ só se desregistra; o antigo
+// nunca gravou nada no cache.
+self.addEventListener("install", () => self.skipWaiting());
 
-self.addEventListener("fetch", event => {
-    event.respondWith(
-        fetch(event.request).catch(() => caches.match(event.request))
-    );
+self.addEventListener("activate", event => {
+  event.waitUntil(self.registration.unregister());
 });
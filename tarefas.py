@@ -0,0 +1,320 @@
+"""
+Tarefas de manutenção em segundo plano, dentro do próprio app.
+
+Cada worker tem uma thread que acorda a cada VERIFICACAO segundos, mas só
+o líder roda alguma coisa: a liderança é a linha `lider` (migração m013),
+tomada com um UPDATE condicional quando está vencida e renovada a cada
+volta. Se o líder morre, outro worker assume depois de LIDERANCA
+segundos. O agendamento (próxima execução) e as métricas de cada tarefa
+ficam na tabela `tarefas`, então um reinício não roda tudo de novo.
+
+As tarefas são idempotentes: rodar duas vezes (ex.: manualmente pela
+linha de comando enquanto o líder também roda) não estraga nada.
+
+    python tarefas.py                 estado de cada tarefa
+    python tarefas.py <nome> [...]    roda agora, sem esperar o líder
+    python tarefas.py --todas
+
+Configuração: TAREFAS (False desliga a thread), TAREFAS_VERIFICACAO.
+"""
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+import agenda
+import eventos
+import imagens
+import sessoes
+import slots
+from db import get_db
+
+VERIFICACAO = 15  # segundos entre voltas da thread
+LIDERANCA = 60  # validade da liderança sem renovação
+PAPEL = "tarefas"
+
+log = logging.getLogger(__name__)
+
+TAREFAS = {}  # nome -> (função(db), intervalo em segundos)
+
+_lock = threading.Lock()
+_estado = {"pid": None, "thread": None}
+_sufixo = uuid.uuid4().hex[:8]
+
+
+def _dono():
+    # o pid distingue os workers criados por fork, que herdam o sufixo
+    return f"{socket.gethostname()}:{os.getpid()}:{_sufixo}"
+
+
+def tarefa(intervalo):
+    """Registra `funcao(db)` para rodar a cada `intervalo` segundos."""
+
+    def registrar_tarefa(funcao):
+        TAREFAS[funcao.__name__] = (funcao, intervalo)
+        return funcao
+
+    return registrar_tarefa
+
+
+# -----------------------------
+# TAREFAS
+# -----------------------------
+@tarefa(3600)
+def finalizar_passados(db):
+    """Confirmados de dias anteriores viram finalizados."""
+    return agenda.finalizar_passados(db)["alterados"]
+
+
+@tarefa(3600)
+def estender_slots(db):
+    """Avança a janela materializada de slots na virada do dia."""
+    return slots.estender(db)
+
+
+@tarefa(3600)
+def coletar_sessoes(db):
+    """Sessões expiradas, em lotes, até acabar."""
+    total = 0
+    lote = current_app.config.get("SESSAO_GC_LOTE", sessoes.GC_LOTE)
+    while True:
+        apagadas = sessoes.coletar(current_app, lote)
+        total += apagadas
+        if apagadas < lote:
+            return total
+
+
+@tarefa(600)
+def limpar_eventos(db):
+    """eventos_agenda além da retenção: os triggers gravam com ou sem ouvintes."""
+    return eventos.limpar(db)
+
+
+@tarefa(600)
+def retomar_imagens(db):
+    """Uploads 'pendente' que ficaram para trás quando um worker morreu."""
+    return imagens.retomar_pendentes(db)
+
+
+@tarefa(24 * 3600)
+def remover_uploads_orfaos(db):
+    """Arquivos de imagem que nenhum serviço/barbeiro referencia."""
+    return imagens.remover_orfaos(db)
+
+
+@tarefa(300)
+def checkpoint_wal(db):
+    """Copia o WAL para o banco sem bloquear leitores (PASSIVE)."""
+    ocupado, paginas, copiadas = db.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+    return {"ocupado": ocupado, "paginas_wal": paginas, "copiadas": copiadas}
+
+
+@tarefa(6 * 3600)
+def otimizar(db):
+    """PRAGMA optimize: ANALYZE só das tabelas/índices que precisam."""
+    db.execute("PRAGMA optimize")
+
+
+# -----------------------------
+# EXECUÇÃO
+# -----------------------------
+def _sincronizar(db, agora):
+    """Cria a linha das tarefas novas (vencidas já)."""
+    db.executemany(
+        "INSERT OR IGNORE INTO tarefas (nome, proxima) VALUES (?, ?)",
+        [(nome, agora) for nome in TAREFAS],
+    )
+    db.commit()
+
+
+def liderar(db, dono=None, agora=None):
+    """Toma ou renova a liderança; True se este processo é o líder."""
+    dono = dono or _dono()
+    agora = agora or time.time()
+    db.execute(
+        "INSERT OR IGNORE INTO lider (papel, dono, expira) VALUES (?, ?, 0)", (PAPEL, dono)
+    )
+    cur = db.execute(
+        """
+        UPDATE lider SET dono = ?, expira = ?
+        WHERE papel = ? AND (dono = ? OR expira < ?)
+        """,
+        (dono, agora + LIDERANCA, PAPEL, dono, agora),
+    )
+    db.commit()
+    return cur.rowcount == 1
+
+
+def executar(db, nome):
+    """Roda uma tarefa e grava tempo, resultado e próxima execução."""
+    funcao, intervalo = TAREFAS[nome]
+    inicio = time.time()
+    relogio = time.perf_counter()
+
+    try:
+        resultado = funcao(db)
+        status, erro = "ok", None
+    except Exception as e:
+        if db.in_transaction:
+            db.rollback()
+        log.exception("tarefa %s falhou", nome)
+        resultado, status, erro = None, "erro", repr(e)
+
+    ms = (time.perf_counter() - relogio) * 1000
+    db.execute(
+        """
+        UPDATE tarefas SET
+            proxima = ?, ultima_inicio = ?, ultima_ms = ?, ultimo_status = ?,
+            ultimo_erro = ?, resultado = ?, execucoes = execucoes + 1,
+            falhas = falhas + ?, total_ms = total_ms + ?, maximo_ms = MAX(maximo_ms, ?)
+        WHERE nome = ?
+        """,
+        (
+            inicio + intervalo,
+            inicio,
+            ms,
+            status,
+            erro,
+            json.dumps(resultado),
+            status == "erro",
+            ms,
+            ms,
+            nome,
+        ),
+    )
+    db.commit()
+    return status, resultado, ms
+
+
+def rodar_vencidas(db, agora=None):
+    """Uma volta do líder: roda as tarefas vencidas. Retorna os nomes."""
+    agora = agora or time.time()
+    _sincronizar(db, agora)
+
+    vencidas = [
+        r[0]
+        for r in db.execute(
+            "SELECT nome FROM tarefas WHERE proxima <= ? ORDER BY proxima", (agora,)
+        )
+        if r[0] in TAREFAS
+    ]
+
+    for nome in vencidas:
+        # renova antes de cada uma: uma tarefa longa não pode deixar a
+        # liderança vencer no meio da volta
+        if not liderar(db):
+            break
+        executar(db, nome)
+
+    return vencidas
+
+
+def estado(db):
+    """Estado e métricas de cada tarefa (para /admin/metricas e a CLI)."""
+    linhas = db.execute("SELECT * FROM tarefas ORDER BY nome").fetchall()
+    lider = db.execute("SELECT dono, expira FROM lider WHERE papel = ?", (PAPEL,)).fetchone()
+
+    return {
+        "lider": dict(lider) if lider and lider["expira"] > time.time() else None,
+        "tarefas": [
+            {
+                **dict(r),
+                "media_ms": round(r["total_ms"] / r["execucoes"], 2) if r["execucoes"] else None,
+            }
+            for r in linhas
+        ],
+    }
+
+
+# -----------------------------
+# THREAD
+# -----------------------------
+def _loop(app):
+    intervalo = app.config.get("TAREFAS_VERIFICACAO", VERIFICACAO)
+
+    while True:
+        try:
+            with app.app_context():
+                db = get_db()
+                if liderar(db):
+                    rodar_vencidas(db)
+        except Exception:
+            log.exception("falha no agendador de tarefas")
+
+        time.sleep(intervalo)
+
+
+def iniciar(app):
+    """Sobe a thread deste processo (uma vez por pid; seguro após fork)."""
+    with _lock:
+        if _estado["pid"] == os.getpid():
+            return
+
+        _estado["pid"] = os.getpid()
+        _estado["thread"] = threading.Thread(
+            target=_loop, args=(app,), name="tarefas", daemon=True
+        )
+        _estado["thread"].start()
+
+
+def registrar(app):
+    @app.before_request
+    def _iniciar_tarefas():
+        # no primeiro request de cada worker; com --preload a thread do
+        # mestre não sobreviveria ao fork
+        if _estado["pid"] != os.getpid() and app.config.get("TAREFAS", True):
+            iniciar(app)
+
+
+# -----------------------------
+# LINHA DE COMANDO
+# -----------------------------
+def cli(app, argumentos):
+    with app.app_context():
+        db = get_db()
+        _sincronizar(db, time.time())
+
+        nomes = list(TAREFAS) if argumentos == ["--todas"] else argumentos
+        desconhecidas = [n for n in nomes if n not in TAREFAS]
+        if desconhecidas:
+            print(f"tarefa(s) desconhecida(s): {', '.join(desconhecidas)}")
+            print(f"disponíveis: {', '.join(TAREFAS)}")
+            return 2
+
+        for nome in nomes:
+            status, resultado, ms = executar(db, nome)
+            print(f"{nome}: {status} em {ms:.1f} ms -> {json.dumps(resultado)}")
+
+        if not nomes:
+            atual = estado(db)
+            print(f"líder: {atual['lider']['dono'] if atual['lider'] else '-'}")
+            for t in atual["tarefas"]:
+                ultima = (
+                    time.strftime("%Y-%m-%d %H:%M", time.localtime(t["ultima_inicio"]))
+                    if t["ultima_inicio"]
+                    else "nunca"
+                )
+                print(
+                    f"{t['nome']:<24} {t['ultimo_status'] or '-':<5} última: {ultima:<17} "
+                    f"execuções: {t['execucoes']:<5} falhas: {t['falhas']:<3} "
+                    f"média: {t['media_ms'] or 0:.1f} ms"
+                )
+
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    from app import app
+
+    # o registro que vale é o do módulo importado pelo app, não o deste __main__
+    import tarefas as modulo
+
+    sys.exit(modulo.cli(app, sys.argv[1:]))
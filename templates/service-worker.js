@@ -0,0 +1,132 @@
+/* ========================
+   SERVICE WORKER
+   Gerado por /service-worker.js: VERSAO e SHELL vêm do build de assets
+   (nomes com hash), então um deploy novo instala um SW novo.
+========================= */
+const VERSAO = {{ versao | tojson }};
+const SHELL = {{ shell | tojson }};
+
+const CACHE_SHELL = `shell-${VERSAO}`;
+const CACHE_IMAGENS = "imagens-v1";
+const CACHE_AGENDA = "agenda-v1";
+const CACHES_ATUAIS = [CACHE_SHELL, CACHE_IMAGENS, CACHE_AGENDA];
+
+const MAX_IMAGENS = 80;
+const TTL_AGENDA = {{ ttl_agenda }} * 1000;
+const CABECALHO_DATA = "x-sw-cache-em";
+
+/* ========================
+   INSTALL / ACTIVATE
+========================= */
+self.addEventListener("install", event => {
+  event.waitUntil(
+    caches.open(CACHE_SHELL)
+      .then(cache => cache.addAll(SHELL))
+      .then(() => self.skipWaiting())
+  );
+});
+
+self.addEventListener("activate", event => {
+  event.waitUntil(
+    caches.keys()
+      .then(nomes => Promise.all(
+        nomes
+          .filter(nome => !CACHES_ATUAIS.includes(nome))
+          .map(nome => caches.delete(nome))
+      ))
+      .then(() => self.clients.claim())
+  );
+});
+
+/* ========================
+   ESTRATÉGIAS
+========================= */
+// shell e /assets/: o nome muda com o conteúdo, então o cache nunca fica velho
+async function cacheFirst(request) {
+  const cache = await caches.open(CACHE_SHELL);
+  const salvo = await cache.match(request);
+  if (salvo) return salvo;
+
+  const res = await fetch(request);
+  if (res.ok) cache.put(request, res.clone());
+  return res;
+}
+
+async function limitarCache(cache, maximo) {
+  const chaves = await cache.keys();
+  // keys() vem em ordem de inserção: remove as mais antigas
+  await Promise.all(chaves.slice(0, Math.max(0, chaves.length - maximo)).map(k => cache.delete(k)));
+}
+
+// imagens de serviços/barbeiros: responde do cache e atualiza em segundo plano
+async function staleWhileRevalidate(event) {
+  const cache = await caches.open(CACHE_IMAGENS);
+  const salvo = await cache.match(event.request);
+
+  const rede = fetch(event.request)
+    .then(async res => {
+      if (res.ok) {
+        await cache.put(event.request, res.clone());
+        await limitarCache(cache, MAX_IMAGENS);
+      }
+      return res;
+    })
+    .catch(() => salvo);
+
+  if (salvo) {
+    event.waitUntil(rede);
+    return salvo;
+  }
+  return rede;
+}
+
+// /api/agenda: cache curto; sem rede, devolve o último resultado mesmo vencido
+// (a reserva é revalidada no servidor de qualquer jeito)
+async function agendaComTtl(request) {
+  const cache = await caches.open(CACHE_AGENDA);
+  const salvo = await cache.match(request);
+  // fetch(..., { cache: "no-cache" }): a página sabe que a agenda mudou (SSE)
+  const forcar = request.cache === "no-cache" || request.cache === "reload";
+
+  if (salvo && !forcar && Date.now() - Number(salvo.headers.get(CABECALHO_DATA)) < TTL_AGENDA) {
+    return salvo;
+  }
+
+  try {
+    const res = await fetch(request);
+
+    if (res.ok) {
+      const headers = new Headers(res.headers);
+      headers.set(CABECALHO_DATA, String(Date.now()));
+      const corpo = await res.clone().blob();
+      await cache.put(request, new Response(corpo, { status: res.status, headers }));
+    }
+    return res;
+  } catch (e) {
+    if (salvo) return salvo;
+    throw e;
+  }
+}
+
+/* ========================
+   FETCH
+========================= */
+self.addEventListener("fetch", event => {
+  const request = event.request;
+  if (request.method !== "GET") return;
+
+  const url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  // SSE (/api/agenda/<id>/eventos) é um stream: nunca passa pelo cache
+  if (request.headers.get("Accept") === "text/event-stream") return;
+
+  if (SHELL.includes(url.pathname) || url.pathname.startsWith("/assets/")) {
+    event.respondWith(cacheFirst(request));
+  } else if (url.pathname.startsWith("/static/uploads/")) {
+    event.respondWith(staleWhileRevalidate(event));
+  } else if (url.pathname.startsWith("/api/agenda/")) {
+    event.respondWith(agendaComTtl(request));
+  }
+  // o resto (páginas, POSTs, admin) vai direto para a rede
+});